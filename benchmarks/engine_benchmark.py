@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Compares the threaded boto3 path of the scan with the asyncio engine.
+
+Both paths call a local stub of the EC2 query API that answers every request
+after a fixed delay, so the numbers reflect how well each engine overlaps
+round trips rather than how fast AWS is. No AWS credentials are needed.
+
+    python benchmarks/engine_benchmark.py --regions 17 --calls 10 --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "Lambda Scan Function"))
+
+from executor import fan_out
+from async_engine import AsyncScanEngine, async_engine_available
+from provider import DataProvider
+
+REGIONS = [
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2", "ca-central-1", "eu-west-1", "eu-west-2", "eu-west-3",
+    "eu-central-1", "eu-north-1", "ap-south-1", "ap-northeast-1", "ap-northeast-2", "ap-northeast-3",
+    "ap-southeast-1", "ap-southeast-2", "sa-east-1",
+]
+
+def make_stub_handler(latency):
+
+    class StubEC2Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            action = parse_qs(body).get("Action", ["DescribeSecurityGroups"])[0]
+            time.sleep(latency)
+            payload = ('<%sResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+                       '<requestId>benchmark</requestId></%sResponse>' % (action, action)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StubEC2Handler
+
+def start_stub(latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:%d" % server.server_address[1]
+
+def measure(name, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("%-28s %8.3fs %10.1f KiB" % (name, elapsed, peak / 1024.0))
+
+def bench_threaded(boto3_session, endpoint, work, workers):
+    lock = threading.Lock()
+    clients = {}
+
+    def client_for(region):
+        with lock:
+            if region not in clients:
+                clients[region] = boto3_session.client("ec2", region_name=region, endpoint_url=endpoint)
+            return clients[region]
+
+    fan_out(lambda region: client_for(region).describe_security_groups(), work, workers)
+
+def bench_async_facade(engine, work, workers):
+    fan_out(lambda region: engine.client("ec2", region).describe_security_groups(), work, workers)
+
+def bench_async_gather(engine, work):
+    engine.gather([("ec2", region, "describe_security_groups", {}) for region in work])
+
+def bench_async_prefetch(engine, work):
+    # The path of the scan inventories, distinct requests so none is answered from the registry
+    provider = DataProvider(engine.client, gather=engine.fetch_all)
+    provider.prefetch([("ec2", "describe_security_groups", region, {"GroupIds": ["sg-%d" % i]}, False) for i, region in enumerate(work)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, default=len(REGIONS), help="number of regions to fan out over")
+    parser.add_argument("--calls", type=int, default=10, help="API calls per region")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated round trip in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="thread pool size of the threaded path")
+    parser.add_argument("--concurrency", type=int, default=64, help="in-flight request bound of the async engine")
+    args = parser.parse_args()
+
+    server, endpoint = start_stub(args.latency)
+    boto3_session = boto3.Session(aws_access_key_id="benchmark", aws_secret_access_key="benchmark", region_name="us-east-1")
+    work = [region for region in REGIONS[:args.regions] for _ in range(args.calls)]
+    print("%d calls, %.0f ms simulated latency" % (len(work), args.latency * 1000))
+
+    measure("threaded (%d workers)" % args.workers, lambda: bench_threaded(boto3_session, endpoint, work, args.workers))
+    if async_engine_available():
+        engine = AsyncScanEngine(boto3_session, args.concurrency, endpoint_url=endpoint)
+        try:
+            measure("async facade (%d workers)" % args.workers, lambda: bench_async_facade(engine, work, args.workers))
+            measure("async gather (%d in flight)" % args.concurrency, lambda: bench_async_gather(engine, work))
+            measure("async prefetch (%d in flight)" % args.concurrency, lambda: bench_async_prefetch(engine, work))
+        finally:
+            engine.close()
+    else:
+        print("aiobotocore is not installed, skipping the async engine")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session as get_async_session
+except ImportError:
+    AioConfig = None
+    get_async_session = None
+
+# Upper bound on the number of AWS requests in flight on the event loop.
+MAX_ASYNC_CONCURRENCY = int(os.environ.get('MAX_ASYNC_CONCURRENCY', 64))
+
+def async_engine_available():
+    return get_async_session is not None
+
+class AsyncScanEngine(object):
+    """Runs every AWS call of the scan on a single asyncio event loop.
+
+    The loop lives in a background thread and owns one aiobotocore client per
+    (service, region). The regional and per-resource requests of the scan
+    inventories go through fetch_all(), the gather backend of the
+    DataProvider: one coroutine per region or resource, bounded by a
+    semaphore, so their calls in flight are not bounded by the worker
+    threads. The control logic stays blocking and reads the gathered
+    responses. The calls it still makes directly go through client(), a
+    boto3-like facade that blocks its thread until the loop answers.
+    """
+
+    def __init__(self, boto3_session, max_concurrency=None, endpoint_url=None, rate_limiter=None, retry_policy=None, concurrency=None, circuit_breaker=None, redirects=None):
+        if get_async_session is None:
+            raise RuntimeError("The async scan engine requires the aiobotocore package")
+        self.credentials = boto3_session.get_credentials().get_frozen_credentials()
+        self.default_region = boto3_session.region_name
+        self.endpoint_url = endpoint_url
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.concurrency = concurrency
+        self.circuit_breaker = circuit_breaker
+        self.redirects = redirects
+        self.max_concurrency = max_concurrency or MAX_ASYNC_CONCURRENCY
+        self.session = get_async_session()
+        self.clients = {}
+        self.contexts = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-scan-engine", daemon=True)
+        self.thread.start()
+        self.semaphore = self.run(self._make_semaphore())
+
+    async def _make_semaphore(self):
+        # Created on the loop so it is bound to it
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def run(self, coroutine):
+        """Blocks the calling thread until the coroutine has run on the engine loop.
+
+        The coroutine runs in a copy of the caller's context (call_soon_threadsafe
+        copies it), so context variables such as the current scan task reach the
+        client hooks, eg. the retry attribution of RetryPolicy.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _open_client(self, service, region):
+        config = AioConfig(max_pool_connections=self.max_concurrency)
+        if self.retry_policy is not None:
+            # Retries are left to the retry policy, see RetryPolicy.attach
+            config = config.merge(AioConfig(retries={'mode': 'standard', 'total_max_attempts': 1}))
+        context = self.session.create_client(
+            service,
+            region_name=region,
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.credentials.access_key,
+            aws_secret_access_key=self.credentials.secret_key,
+            aws_session_token=self.credentials.token,
+            config=config,
+        )
+        self.contexts.append(context)
+        client = await context.__aenter__()
+        # Same order as ClientCache.get
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.attach(client, service, region)
+        if self.rate_limiter is not None:
+            self.rate_limiter.attach_async(client, service, region)
+        if self.concurrency is not None:
+            self.concurrency.attach_async(client, service, region)
+        if self.retry_policy is not None:
+            self.retry_policy.attach(client)
+        if self.redirects is not None and service == 's3':
+            self.redirects.attach(client)
+        return client
+
+    async def _get_client(self, service, region):
+        key = (service, region)
+        # The task is stored before it is awaited so concurrent callers share one client
+        if key not in self.clients:
+            self.clients[key] = self.loop.create_task(self._open_client(service, region))
+        return await self.clients[key]
+
+    async def _call(self, service, region, operation, params):
+        client = await self._get_client(service, region)
+        async with self.semaphore:
+            return await getattr(client, operation)(**params)
+
+    async def _paginate(self, service, region, operation, params):
+        client = await self._get_client(service, region)
+        pages = []
+        async with self.semaphore:
+            async for page in client.get_paginator(operation).paginate(**params):
+                pages.append(page)
+        return pages
+
+    async def _gather(self, calls):
+        return await asyncio.gather(*[self._call(*call) for call in calls])
+
+    async def _fetch_all(self, requests):
+        coroutines = []
+        for service, operation, region, params, paginated in requests:
+            fetch = self._paginate if paginated else self._call
+            coroutines.append(fetch(service, region or self.default_region, operation, params))
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    def call(self, service, region, operation, params):
+        return self.run(self._call(service, region or self.default_region, operation, params))
+
+    def paginate(self, service, region, operation, params):
+        return self.run(self._paginate(service, region or self.default_region, operation, params))
+
+    def gather(self, calls):
+        """Runs (service, region, operation, params) calls as one coroutine each and returns the responses in order."""
+        calls = [(service, region or self.default_region, operation, params) for service, region, operation, params in calls]
+        return self.run(self._gather(calls))
+
+    def fetch_all(self, requests):
+        """Runs DataProvider (service, operation, region, params, paginated) requests as one coroutine each.
+
+        Returns the responses, the list of pages of the paginated requests, in
+        order, with the exception of a failed request in place of its response.
+        """
+        return self.run(self._fetch_all(requests))
+
+    def client(self, service, region=None):
+        return SyncClientProxy(self, service, region)
+
+    async def _close(self):
+        for context in self.contexts:
+            await context.__aexit__(None, None, None)
+
+    def close(self):
+        try:
+            self.run(self._close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+class SyncClientProxy(object):
+    """Blocking facade with the boto3 client calling convention, backed by the async engine."""
+
+    def __init__(self, engine, service, region):
+        self._engine = engine
+        self._service = service
+        self._region = region
+
+    def get_paginator(self, operation):
+        return SyncPaginatorProxy(self._engine, self._service, self._region, operation)
+
+    def __getattr__(self, operation):
+        if operation.startswith('_'):
+            raise AttributeError(operation)
+
+        def api_call(**params):
+            return self._engine.call(self._service, self._region, operation, params)
+        return api_call
+
+class SyncPaginatorProxy(object):
+
+    def __init__(self, engine, service, region, operation):
+        self._engine = engine
+        self._service = service
+        self._region = region
+        self._operation = operation
+
+    def paginate(self, **params):
+        return iter(self._engine.paginate(self._service, self._region, self._operation, params))
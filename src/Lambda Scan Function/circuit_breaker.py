@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+from retry import classify_error
+
+# Consecutive failed calls of a (region, service) that open its circuit, and seconds
+# before an open circuit lets one call through again to probe the region.
+CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD', 3))
+CIRCUIT_BREAKER_RESET = float(os.environ.get('CIRCUIT_BREAKER_RESET', 300))
+
+# Error codes of a region the credentials cannot use at all
+REGION_FAILURE_CODES = frozenset([
+    'AuthFailure', 'UnrecognizedClientException', 'InvalidClientTokenId', 'OptInRequired',
+])
+
+class RegionUnavailableError(Exception):
+
+    def __init__(self, region, service):
+        super(RegionUnavailableError, self).__init__("Region " + str(region) + " is unavailable for " + str(service))
+        self.region = region
+        self.service = service
+
+def is_region_failure(exception):
+    """True for the errors that mean the region cannot be scanned, as opposed to an error of a single call.
+
+    Transient errors left after the retries are raised as any other error, they
+    only take a region out once they opened its circuit.
+    """
+    if isinstance(exception, RegionUnavailableError):
+        return True
+    response = getattr(exception, 'response', None)
+    return isinstance(response, dict) and response.get('Error', {}).get('Code', '') in REGION_FAILURE_CODES
+
+class CircuitBreaker(object):
+    """Scan wide circuit breaker keyed by (region, service).
+
+    attach() hooks a client so that calls to a (region, service) whose circuit
+    is open raise RegionUnavailableError before anything is sent. Connection
+    errors, server errors left after the retries and the region failure codes
+    count as failures, any other response closes the circuit again.
+    """
+
+    def __init__(self, threshold=None, reset=None):
+        self.threshold = threshold or CIRCUIT_BREAKER_THRESHOLD
+        self.reset = reset or CIRCUIT_BREAKER_RESET
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.opened = {}
+
+    def allow(self, key):
+        with self.lock:
+            opened = self.opened.get(key)
+            if opened is None:
+                return True
+            if time.monotonic() - opened >= self.reset:
+                # Half open, the next failure opens the circuit again since the failure count is kept
+                self.opened[key] = time.monotonic()
+                return True
+            return False
+
+    def record(self, key, failed):
+        with self.lock:
+            if not failed:
+                self.failures[key] = 0
+                self.opened.pop(key, None)
+                return
+            self.failures[key] = self.failures.get(key, 0) + 1
+            if self.failures[key] >= self.threshold and key not in self.opened:
+                print("Circuit opened :: " + key[1] + " in " + str(key[0]))
+                self.opened[key] = time.monotonic()
+
+    def attach(self, client, service, region):
+        key = (region, service)
+
+        # Handlers returning a value would change the call, these return None or raise
+        def check(**kwargs):
+            if not self.allow(key):
+                raise RegionUnavailableError(region, service)
+
+        def after_call(http_response=None, parsed=None, **kwargs):
+            code = parsed.get('Error', {}).get('Code', '') if parsed else ''
+            failed = code in REGION_FAILURE_CODES or classify_error((http_response, parsed or {}), None) == 'transient'
+            self.record(key, failed)
+
+        def after_call_error(exception=None, **kwargs):
+            self.record(key, classify_error(None, exception) == 'transient')
+
+        client.meta.events.register('before-call', check)
+        client.meta.events.register('after-call', after_call)
+        client.meta.events.register('after-call-error', after_call_error)
+
+    def open_circuits(self):
+        with self.lock:
+            return sorted(self.opened)
@@ -0,0 +1,87 @@
+import os
+import threading
+from botocore.config import Config
+
+from concurrency import AIMD_MAX_CONCURRENCY
+from executor import MAX_REGION_WORKERS
+from scheduler import MAX_CONTROL_WORKERS
+
+# Connections kept open per client, enough for every control worker to fan out over its regions at once
+# and for the AIMD limit to reach its maximum without calls queuing for a connection.
+MAX_POOL_CONNECTIONS = int(os.environ.get('MAX_POOL_CONNECTIONS', max(10, MAX_CONTROL_WORKERS * MAX_REGION_WORKERS, AIMD_MAX_CONCURRENCY)))
+
+# S3 answers a request sent to another region than the bucket's with one of these, botocore then resends it
+S3_REDIRECT_CODES = frozenset([
+    'PermanentRedirect', 'TemporaryRedirect', 'AuthorizationHeaderMalformed', 'IllegalLocationConstraintException',
+])
+
+class RedirectCounter(object):
+    """Counts the S3 responses that made botocore redirect a request to the bucket region."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def observe(self, response=None, **kwargs):
+        if response is None:
+            return None
+        http_response, parsed = response
+        if http_response.status_code in (301, 307) or parsed.get('Error', {}).get('Code', '') in S3_REDIRECT_CODES:
+            with self.lock:
+                self.count += 1
+        return None
+
+    def attach(self, client):
+        client.meta.events.register('needs-retry.s3', self.observe)
+
+class ClientCache(object):
+    """Scan scoped boto3 clients, one per (service, region).
+
+    Creating a client loads the service model and opens its own connection
+    pool, so every control asking for the same service and region gets the
+    same client and reuses its kept-alive connections. With a retry policy
+    the clients leave retries to it instead of the botocore retry handler.
+    boto3 clients are thread safe once created but the session creating them
+    is not, clients are therefore created under the lock.
+    """
+
+    def __init__(self, boto3_session, max_pool_connections=None, rate_limiter=None, retry_policy=None, concurrency=None, circuit_breaker=None):
+        self.boto3_session = boto3_session
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry_policy = retry_policy
+        self.config = Config(
+            max_pool_connections=max_pool_connections or MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+        )
+        if retry_policy is not None:
+            self.config = self.config.merge(Config(retries={'mode': 'standard', 'total_max_attempts': 1}))
+        self.redirects = RedirectCounter()
+        self.lock = threading.Lock()
+        self.clients = {}
+
+    def get(self, service, region=None):
+        key = (service, region or self.boto3_session.region_name)
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                client = self.boto3_session.client(service, region_name=key[1], config=self.config)
+                # The circuit breaker goes first so an open circuit is refused before a token or a concurrency
+                # slot is taken, the rate limiter before the concurrency so a call waiting for a token holds no slot
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.attach(client, service, key[1])
+                if self.rate_limiter is not None:
+                    self.rate_limiter.attach(client, service, key[1])
+                if self.concurrency is not None:
+                    self.concurrency.attach(client, service, key[1])
+                if self.retry_policy is not None:
+                    self.retry_policy.attach(client)
+                if service == 's3':
+                    self.redirects.attach(client)
+                self.clients[key] = client
+        return client
+
+    def __len__(self):
+        with self.lock:
+            return len(self.clients)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from retry import classify_error
+
+# AIMD controller of the in-flight AWS calls per (service, region). Each key starts
+# at the initial limit, grows by about one slot per window of successful calls made
+# while the limit was saturated, up to the maximum, and is halved on throttling, at
+# most once per cooldown.
+ADAPTIVE_CONCURRENCY = str(os.environ.get('ADAPTIVE_CONCURRENCY', 'True')).lower() == 'true'
+AIMD_INITIAL_CONCURRENCY = int(os.environ.get('AIMD_INITIAL_CONCURRENCY', 8))
+AIMD_MAX_CONCURRENCY = int(os.environ.get('AIMD_MAX_CONCURRENCY', 64))
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_DECREASE_COOLDOWN = 1.0
+
+class AdaptiveLimit(object):
+    """Concurrency limit of one (service, region) adjusted by additive increase, multiplicative decrease.
+
+    Slots are handed to waiters in arrival order. Threads wait on an event,
+    coroutines of the async engine wait on a future of their loop.
+    """
+
+    def __init__(self, initial, maximum, minimum=1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.calls = 0
+        self.throttles = 0
+        self.last_decrease = 0.0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        if self.in_flight < int(self.limit) and len(self.waiters) == 0:
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake(self):
+        # The slot is taken on behalf of the waiter before it is woken up
+        while len(self.waiters) != 0 and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self.waiters.popleft()()
+
+    def acquire(self):
+        with self.lock:
+            if self._take():
+                return
+            event = threading.Event()
+            self.waiters.append(event.set)
+        event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self._take():
+                return
+            future = loop.create_future()
+            self.waiters.append(lambda: loop.call_soon_threadsafe(future.set_result, None))
+        await future
+
+    def release(self):
+        with self.lock:
+            # Only a call that completed with every slot in use shows the limit is what holds the scan back
+            if self.in_flight >= int(self.limit):
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.in_flight -= 1
+            self.calls += 1
+            self._wake()
+
+    def throttled(self):
+        with self.lock:
+            self.throttles += 1
+            now = time.monotonic()
+            # One throttling burst hits many calls in flight, it only counts as one decrease
+            if now - self.last_decrease >= AIMD_DECREASE_COOLDOWN:
+                self.limit = max(self.minimum, self.limit * AIMD_DECREASE_FACTOR)
+                self.last_decrease = now
+
+    def stats(self):
+        with self.lock:
+            return {
+                'limit': int(self.limit),
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'throttle_rate': round(self.throttles / float(max(self.calls, 1)), 4),
+            }
+
+class AdaptiveConcurrency(object):
+    """Registry of the AdaptiveLimit of every (service, region) the scan calls.
+
+    attach() registers client hooks: before-call takes a slot, after-call and
+    after-call-error give it back, and needs-retry reports throttled attempts.
+    Every API call and paginator page of a client goes through its limit.
+    """
+
+    def __init__(self, initial=None, maximum=None):
+        self.initial = initial or AIMD_INITIAL_CONCURRENCY
+        self.maximum = maximum or AIMD_MAX_CONCURRENCY
+        self.lock = threading.Lock()
+        self.limits = {}
+
+    def limit(self, service, region):
+        key = (service, region)
+        with self.lock:
+            if key not in self.limits:
+                self.limits[key] = AdaptiveLimit(self.initial, self.maximum)
+            return self.limits[key]
+
+    def _register(self, client, limit, acquire):
+        # Handlers returning a value would change the call, the release and throttle hooks return None
+        def release(**kwargs):
+            limit.release()
+
+        def observe(response=None, caught_exception=None, **kwargs):
+            if classify_error(response, caught_exception) == 'throttle':
+                limit.throttled()
+
+        client.meta.events.register('before-call', acquire)
+        client.meta.events.register('after-call', release)
+        client.meta.events.register('after-call-error', release)
+        client.meta.events.register('needs-retry', observe)
+
+    def attach(self, client, service, region):
+        limit = self.limit(service, region)
+
+        def acquire(**kwargs):
+            limit.acquire()
+        self._register(client, limit, acquire)
+
+    def attach_async(self, client, service, region):
+        limit = self.limit(service, region)
+
+        async def acquire(**kwargs):
+            await limit.acquire_async()
+        self._register(client, limit, acquire)
+
+    def stats(self):
+        with self.lock:
+            limits = dict(self.limits)
+        return dict((service + '/' + str(region), limit.stats()) for (service, region), limit in limits.items())
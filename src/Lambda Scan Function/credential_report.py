@@ -0,0 +1,81 @@
+import csv
+from array import array
+from datetime import datetime
+from operator import itemgetter
+
+# Columns of the IAM credential report that are read as true / false flags
+FLAG_COLUMNS = ('password_enabled', 'mfa_active', 'access_key_1_active', 'access_key_2_active')
+
+# Columns of the IAM credential report that hold ISO 8601 timestamps
+TIME_COLUMNS = (
+    'password_last_used',
+    'access_key_1_last_rotated', 'access_key_1_last_used_date',
+    'access_key_2_last_rotated', 'access_key_2_last_used_date',
+)
+
+# Stored for "N/A", "no_information", "not_supported" and missing cells, every comparison with it is False
+MISSING = float('nan')
+
+def parse_timestamp(value):
+    if not value or not value[0].isdigit():
+        return MISSING
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return MISSING
+
+def parse_time_column(values):
+    """Converts a column of timestamps to epoch seconds in one pass.
+
+    The comprehension only calls the C implemented fromisoformat and timestamp,
+    a malformed value sends the column through parse_timestamp one cell at a time.
+    """
+    fromisoformat = datetime.fromisoformat
+    timestamp = datetime.timestamp
+    try:
+        return array('d', [timestamp(fromisoformat(value)) if value[:1].isdigit() else MISSING for value in values])
+    except ValueError:
+        return array('d', map(parse_timestamp, values))
+
+class CredentialReport(object):
+    """Columnar view of the IAM credential report.
+
+    The CSV is parsed once: flags become array('b') columns, timestamps become
+    array('d') columns of epoch seconds, one pass per column, and the other
+    columns are cut out as tuples of strings when first read. Row 0 is the
+    root account. Columns missing from the report (the root row may omit the
+    key usage columns) read as empty.
+    """
+
+    def __init__(self, content):
+        rows = list(csv.reader(content.splitlines()))
+        header = rows[0] if rows else []
+        width = len(header)
+        self.body = [row if len(row) >= width else row + [''] * (width - len(row)) for row in rows[1:]]
+        self.size = len(self.body)
+        self.positions = dict((name, position) for position, name in enumerate(header))
+        self.columns = {}
+        self.flags = {}
+        self.times = {}
+        for name in FLAG_COLUMNS:
+            self.flags[name] = array('b', map("true".__eq__, self.text(name)))
+        for name in TIME_COLUMNS:
+            self.times[name] = parse_time_column(self.text(name))
+
+    def __len__(self):
+        return self.size
+
+    def text(self, name):
+        # Columns are cut out of the rows the first time they are read
+        if name not in self.columns:
+            if name in self.positions:
+                self.columns[name] = tuple(map(itemgetter(self.positions[name]), self.body))
+            else:
+                self.columns[name] = ('',) * self.size
+        return self.columns[name]
+
+    def flag(self, name):
+        return self.flags[name]
+
+    def time(self, name):
+        return self.times[name]
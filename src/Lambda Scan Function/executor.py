@@ -0,0 +1,29 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on the number of regions (or other work items) processed at once.
+MAX_REGION_WORKERS = int(os.environ.get('MAX_REGION_WORKERS', 8))
+
+def fan_out(func, items, max_workers=None):
+    """Runs func(item) for every item on a bounded thread pool.
+
+    Results are returned in the same order as items, so callers can merge
+    them exactly as the old serial loops did. An exception raised for any
+    item is re-raised here, as it would have been by the serial loop.
+    """
+    items = list(items)
+    if len(items) == 0:
+        return []
+    workers = min(max_workers or MAX_REGION_WORKERS, len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+    # Each item runs in a copy of the caller's context, so context variables such as the current scan task follow it
+    contexts = [contextvars.copy_context() for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda context, item: context.run(func, item), contexts, items))
+
+def run_regional(func, regions, max_workers=None):
+    """Runs func(region) concurrently and returns (region, result) pairs in region order."""
+    regions = list(regions)
+    return list(zip(regions, fan_out(func, regions, max_workers)))
@@ -0,0 +1,193 @@
+import re
+from functools import lru_cache
+
+# Parser for CloudWatch Logs JSON filter patterns such as
+#   { ($.eventName = ConsoleLogin) && ($.additionalEventData.MFAUsed != "Yes") }
+# The AST is made of ('and', [nodes]), ('or', [nodes]) and
+# ('cmp', selector, operator, value) tuples, value is None for the
+# NOT EXISTS / IS NULL / IS TRUE / IS FALSE checks.
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<logic>&&|\|\|)
+      | (?P<op>!=|<=|>=|==|=|<|>)
+      | (?P<paren>[{}()])
+      | (?P<word>[^\s"{}()=!<>&|]+)
+    )''', re.VERBOSE)
+
+KEYWORD_OPS = {
+    ('NOT', 'EXISTS'): 'NOT EXISTS',
+    ('IS', 'NULL'): 'IS NULL',
+    ('IS', 'TRUE'): 'IS TRUE',
+    ('IS', 'FALSE'): 'IS FALSE',
+}
+
+class FilterPatternError(ValueError):
+    pass
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterPatternError("Unexpected character at " + str(position) + " in " + text)
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        elif kind == 'op' and value == '==':
+            value = '='
+        tokens.append((kind, value))
+    return tokens
+
+class Parser(object):
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind is not None and token[0] != kind) or (value is not None and token[1] != value):
+            raise FilterPatternError("Unexpected token " + str(token[1]))
+        self.position += 1
+        return token
+
+    def parse(self):
+        self.take('paren', '{')
+        node = self.expression()
+        self.take('paren', '}')
+        if self.peek()[0] is not None:
+            raise FilterPatternError("Unexpected trailing token " + str(self.peek()[1]))
+        return node
+
+    def expression(self):
+        nodes = [self.conjunction()]
+        while self.peek() == ('logic', '||'):
+            self.take()
+            nodes.append(self.conjunction())
+        return combine('or', nodes)
+
+    def conjunction(self):
+        nodes = [self.atom()]
+        while self.peek() == ('logic', '&&'):
+            self.take()
+            nodes.append(self.atom())
+        return combine('and', nodes)
+
+    def atom(self):
+        if self.peek() == ('paren', '('):
+            self.take()
+            node = self.expression()
+            self.take('paren', ')')
+            return node
+        return self.comparison()
+
+    def comparison(self):
+        kind, selector = self.take('word')
+        if not selector.startswith('$'):
+            raise FilterPatternError("Expected a selector, got " + selector)
+        kind, value = self.peek()
+        if kind == 'op':
+            operator = self.take()[1]
+            kind, value = self.take()
+            if kind not in ('word', 'string'):
+                raise FilterPatternError("Expected a value after " + selector)
+            return ('cmp', selector, operator, value)
+        if kind == 'word':
+            self.take()
+            keyword = (value.upper(), self.take('word')[1].upper())
+            if keyword in KEYWORD_OPS:
+                return ('cmp', selector, KEYWORD_OPS[keyword], None)
+        raise FilterPatternError("Expected an operator after " + selector)
+
+def combine(kind, nodes):
+    # Nested groups of the same kind are flattened, so (a && (b && c)) equals (a && b && c)
+    if len(nodes) == 1:
+        return nodes[0]
+    flat = []
+    for node in nodes:
+        if node[0] == kind:
+            flat.extend(node[1])
+        else:
+            flat.append(node)
+    return (kind, flat)
+
+@lru_cache(maxsize=4096)
+def parse_filter_pattern(text):
+    """Returns the AST of a JSON filter pattern, raises FilterPatternError for anything else."""
+    return Parser(tokenize(text)).parse()
+
+# Upper bound on the conjunctions of a pattern in disjunctive normal form, larger patterns match nothing
+MAX_DNF_TERMS = 4096
+
+def to_dnf(node):
+    """Returns a node as a set of conjunctions, each a frozenset of (selector, operator, value) comparisons."""
+    if node[0] == 'cmp':
+        return frozenset([frozenset([node[1:]])])
+    children = [to_dnf(child) for child in node[1]]
+    if node[0] == 'or':
+        terms = frozenset().union(*children)
+    else:
+        terms = frozenset([frozenset()])
+        for child in children:
+            terms = frozenset(term | other for term in terms for other in child)
+            if len(terms) > MAX_DNF_TERMS:
+                raise FilterPatternError("Pattern too large to normalize")
+    if len(terms) > MAX_DNF_TERMS:
+        raise FilterPatternError("Pattern too large to normalize")
+    # A conjunction that contains another one adds nothing to the disjunction
+    return frozenset(term for term in terms if not any(other < term for other in terms))
+
+@lru_cache(maxsize=4096)
+def pattern_terms(text):
+    """Returns a filter pattern in disjunctive normal form, a frozenset of conjunctions.
+
+    Quoting, spacing, clause order and parentheses do not change the result.
+    Patterns that are not JSON filter patterns have no terms.
+    """
+    try:
+        return to_dnf(parse_filter_pattern(text))
+    except FilterPatternError:
+        return frozenset()
+
+def implies(terms, other):
+    """True if every event matched by the DNF terms is matched by the DNF other.
+
+    Comparisons are treated as opaque, a conjunction implies another one if it
+    has all of its comparisons.
+    """
+    return all(any(required <= term for required in other) for term in terms)
+
+def covers(term, required):
+    """True if a filter conjunction alerts on every event of a required conjunction.
+
+    The filter has to compare every equality of the required conjunction (the
+    eventName, eventSource, errorCode... the control is about) and may not add
+    any other condition on the selectors the required conjunction uses. Extra
+    clauses on other selectors only narrow out noise and are accepted, as are
+    required inequalities the filter leaves out, which only widen it.
+    """
+    selectors = set(comparison[0] for comparison in required)
+    return (len(term & required) != 0
+            and all(comparison in term for comparison in required if comparison[1] == '=')
+            and all(comparison in required for comparison in term if comparison[0] in selectors))
+
+def matches_pattern(text, required):
+    """True if the filter pattern covers every conjunction of the DNF terms required.
+
+    Extra OR'd branches of the filter (eg. more event names) are accepted. A
+    filter that splits a required conjunction over OR'd branches, or misses a
+    required branch, does not match.
+    """
+    terms = pattern_terms(text)
+    return len(required) != 0 and all(any(covers(term, other) for term in terms) for other in required)
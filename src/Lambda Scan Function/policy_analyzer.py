@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Distinct policy documents whose verdicts are kept by a warm Lambda container, shared by its scans.
+POLICY_CACHE_SIZE = int(os.environ.get('POLICY_CACHE_SIZE', 4096))
+
+# digest -> verdicts, least recently used first
+VERDICTS = OrderedDict()
+VERDICTS_LOCK = threading.Lock()
+CACHE_STATS = {'hits': 0, 'misses': 0}
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+def normalize_statement(statement):
+    """Returns a statement with list valued Action / NotAction / Resource / NotResource.
+
+    Actions are lowercased as IAM compares them case-insensitively. Condition
+    operators keep their name, condition keys are lowercased and their values
+    become lists of lowercased strings.
+    """
+    normalized = {'Effect': str(statement.get('Effect', '')).lower()}
+    for key in ('Action', 'NotAction'):
+        if key in statement:
+            normalized[key] = [str(action).lower() for action in as_list(statement[key])]
+    for key in ('Resource', 'NotResource'):
+        if key in statement:
+            normalized[key] = [str(resource) for resource in as_list(statement[key])]
+    normalized['Condition'] = {}
+    if isinstance(statement.get('Condition'), dict):
+        for operator, values in statement['Condition'].items():
+            if isinstance(values, dict):
+                normalized['Condition'][operator] = dict(
+                    (str(key).lower(), [str(value).lower() for value in as_list(value)]) for key, value in values.items())
+    return normalized
+
+def normalize_statements(document):
+    """Returns the normalized statements of a policy, Statement may be a single statement or a list."""
+    return [normalize_statement(statement) for statement in as_list(document.get('Statement'))
+            if isinstance(statement, dict)]
+
+def grants_full_admin(statements):
+    """True if a statement allows every action ("*") on every resource ("*")."""
+    for statement in statements:
+        if statement['Effect'] == 'allow' and '*' in statement.get('Action', []) and '*' in statement.get('Resource', []):
+            return True
+    return False
+
+def denies_insecure_transport(statements):
+    """True if a statement denies the requests sent without TLS (aws:SecureTransport false)."""
+    for statement in statements:
+        if statement['Effect'] == 'deny' and 'false' in statement['Condition'].get('Bool', {}).get('aws:securetransport', []):
+            return True
+    return False
+
+def policy_digest(document):
+    """Hash of the policy content, JSON documents are canonicalized so key order and whitespace do not matter."""
+    if isinstance(document, str):
+        try:
+            document = json.loads(document)
+        except ValueError:
+            # Not JSON, the text itself is hashed and analyze_policy raises as before
+            return hashlib.sha256(document.encode('utf-8')).hexdigest()
+    document = json.dumps(document, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+def analyze_policy(document):
+    """Returns the verdicts of a policy document, a dict or its JSON text.
+
+    The document is parsed and normalized once per distinct content, later
+    documents with the same digest, in this scan or the following scans of the
+    container, reuse the cached verdicts.
+    """
+    digest = policy_digest(document)
+    with VERDICTS_LOCK:
+        verdicts = VERDICTS.get(digest)
+        if verdicts is not None:
+            VERDICTS.move_to_end(digest)
+            CACHE_STATS['hits'] += 1
+            return verdicts
+        CACHE_STATS['misses'] += 1
+    if isinstance(document, str):
+        document = json.loads(document)
+    statements = normalize_statements(document)
+    verdicts = {
+        'FullAdmin': grants_full_admin(statements),
+        'SecureTransport': denies_insecure_transport(statements),
+    }
+    with VERDICTS_LOCK:
+        VERDICTS[digest] = verdicts
+        while len(VERDICTS) > POLICY_CACHE_SIZE:
+            VERDICTS.popitem(last=False)
+    return verdicts
+
+def policy_cache_stats():
+    with VERDICTS_LOCK:
+        return dict(CACHE_STATS, documents=len(VERDICTS))
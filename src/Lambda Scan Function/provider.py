@@ -0,0 +1,112 @@
+import json
+import threading
+from concurrent.futures import Future
+
+class DataProvider(object):
+    """Scan scoped registry of AWS responses shared by the controls.
+
+    Every fetch is keyed by (service, operation, region, params) and runs at
+    most once per scan. A caller asking for a key that is already being
+    fetched waits for that request instead of issuing its own. Responses are
+    shared between controls and must be treated as read-only. A failed fetch
+    is dropped once its waiters saw the error, the next caller fetches again.
+
+    With a gather backend (the async engine), prefetch() sends a batch of
+    requests as one coroutine each and stores their responses, the controls
+    then read them from the registry. Without one prefetch() does nothing and
+    every request is fetched when it is first asked for.
+    """
+
+    def __init__(self, client_factory, gather=None):
+        self.client_factory = client_factory
+        self.gather = gather
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, service, operation, region, paginated, params):
+        return (service, operation, region, 'pages' if paginated else 'call', json.dumps(params, sort_keys=True, default=str))
+
+    def _get(self, key, load):
+        with self.lock:
+            future = self.entries.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.entries[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                future.set_result(load())
+            except BaseException as e:
+                # Failures are shared too, the waiting callers see the same exception
+                future.set_exception(e)
+        try:
+            return future.result()
+        except BaseException:
+            with self.lock:
+                if self.entries.get(key) is future:
+                    del self.entries[key]
+            raise
+
+    def fetch(self, service, operation, region=None, **params):
+        """Returns the response of a single API call."""
+        key = self._key(service, operation, region, False, params)
+
+        def load():
+            return getattr(self.client_factory(service, region), operation)(**params)
+        return self._get(key, load)
+
+    def fetch_pages(self, service, operation, region=None, **params):
+        """Returns every page of a paginated API call as a list."""
+        key = self._key(service, operation, region, True, params)
+
+        def load():
+            paginator = self.client_factory(service, region).get_paginator(operation)
+            return [page for page in paginator.paginate(**params)]
+        return self._get(key, load)
+
+    def cached(self, service, operation, region=None, **params):
+        """Returns the response of a call that was already fetched, None if it was not or failed."""
+        with self.lock:
+            future = self.entries.get(self._key(service, operation, region, False, params))
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def prefetch(self, requests):
+        """Fetches (service, operation, region, params, paginated) requests at once through the gather backend.
+
+        The requests already fetched or in flight are skipped. A failed request
+        is stored like a failed fetch, the first caller asking for it gets the
+        error and the next one fetches again.
+        """
+        if self.gather is None:
+            return
+        owned = []
+        with self.lock:
+            for request in requests:
+                service, operation, region, params, paginated = request
+                key = self._key(service, operation, region, paginated, params)
+                if key not in self.entries:
+                    self.entries[key] = Future()
+                    self.misses += 1
+                    owned.append((self.entries[key], request))
+        if len(owned) == 0:
+            return
+        try:
+            responses = self.gather([request for future, request in owned])
+        except BaseException as e:
+            responses = [e] * len(owned)
+        for (future, request), response in zip(owned, responses):
+            if isinstance(response, BaseException):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'keys': len(self.entries)}
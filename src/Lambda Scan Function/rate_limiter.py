@@ -0,0 +1,116 @@
+import asyncio
+import os
+import threading
+import time
+
+# Requests per second and burst of each service when USE_RATE_LIMITER is on. The
+# values stay under the documented per account and region limits, the RATE_LIMITS
+# environment variable overrides them, eg. "iam=5,ec2=50:100,default=10". A limit
+# of one operation family of a service is set as "service.Family", eg. "ec2.Describe=40".
+DEFAULT_RATE_LIMITS = {
+    'default': (20.0, 20.0),
+    'iam': (10.0, 10.0),
+    'ec2': (20.0, 40.0),
+    's3': (50.0, 50.0),
+    'cloudtrail': (5.0, 5.0),
+    'logs': (5.0, 5.0),
+    'cloudwatch': (9.0, 9.0),
+    'sns': (20.0, 20.0),
+    'kms': (20.0, 20.0),
+    'config': (10.0, 10.0),
+}
+
+# AWS throttles the read APIs of a service by family, each family gets its own bucket
+OPERATION_FAMILIES = ('Describe', 'List', 'Get')
+
+def operation_family(operation_name):
+    """Returns the family of an API operation name, eg. DescribeInstances -> Describe, anything else -> Other."""
+    for family in OPERATION_FAMILIES:
+        if operation_name.startswith(family):
+            return family
+    return 'Other'
+
+def rate_limiter_enabled():
+    return str(os.environ.get('USE_RATE_LIMITER', 'False')).lower() == 'true'
+
+def parse_rate_limits(text):
+    """Parses "service=rate[:burst],..." into a dict of service -> (rate, burst)."""
+    limits = {}
+    for item in text.split(','):
+        if item.strip() == "":
+            continue
+        service, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        rate = float(rate)
+        if rate <= 0:
+            raise ValueError("Rate limit of " + service.strip() + " must be positive")
+        limits[service.strip()] = (rate, float(burst) if burst else max(rate, 1.0))
+    return limits
+
+class TokenBucket(object):
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token and returns the seconds the caller has to wait before using it.
+
+        The bucket may go negative, so concurrent callers queue up behind each
+        other instead of all waking up at the same time.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class RateLimiter(object):
+    """Token buckets per (service, operation family, region) put in front of every AWS call.
+
+    attach() registers a before-call hook on a client, so each API call and
+    each page of a paginator takes a token of its bucket first. Clients of the
+    async engine get a hook that waits on the event loop instead of blocking it.
+    The hook has to be registered before the concurrency hooks, so a call
+    waiting for a token does not hold a concurrency slot.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def bucket(self, service, region, family='Other'):
+        key = (service, family, region)
+        with self.lock:
+            if key not in self.buckets:
+                rate, burst = self.limits.get(service + '.' + family, self.limits.get(service, self.limits['default']))
+                self.buckets[key] = TokenBucket(rate, burst)
+            return self.buckets[key]
+
+    def wait(self, service, region, family='Other'):
+        delay = self.bucket(service, region, family).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def attach(self, client, service, region):
+
+        # A before-call handler returning a value would replace the response, these return None
+        def throttle(model, **kwargs):
+            self.wait(service, region, operation_family(model.name))
+        client.meta.events.register('before-call', throttle)
+
+    def attach_async(self, client, service, region):
+
+        async def throttle(model, **kwargs):
+            delay = self.bucket(service, region, operation_family(model.name)).reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        client.meta.events.register('before-call', throttle)
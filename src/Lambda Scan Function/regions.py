@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+
+# Seconds the enabled regions of an account are reused by the following scans of a warm Lambda container.
+REGION_CACHE_TTL = int(os.environ.get('REGION_CACHE_TTL', 3600))
+
+# account -> (expiry, enabled regions), shared by the scans of this container
+ENABLED_REGIONS = {}
+ENABLED_REGIONS_LOCK = threading.Lock()
+
+def parse_region_list(value):
+    """Accepts a list or a comma separated string of region names."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [region.strip() for region in value if region.strip() != ""]
+
+class RegionPlanner(object):
+    """Decides which regions the regional controls call.
+
+    The enabled regions of the account come from describe_regions(AllRegions=True)
+    without the regions the account has not opted in to, cached per account for
+    REGION_CACHE_TTL. The scan event can narrow them down with an allow list and
+    a deny list. regions_for() also drops the regions where botocore's endpoint
+    data has no endpoint for a service, regions botocore does not know at all
+    are kept.
+    """
+
+    def __init__(self, boto3_session, account, allow=None, deny=None):
+        self.boto3_session = boto3_session
+        self.account = account
+        self.allow = parse_region_list(allow)
+        self.deny = set(parse_region_list(deny))
+        self.lock = threading.Lock()
+        self.services = {}
+
+    def enabled_regions(self, ec2_client):
+        now = time.time()
+        with ENABLED_REGIONS_LOCK:
+            cached = ENABLED_REGIONS.get(self.account)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        response = ec2_client.describe_regions(AllRegions=True)
+        regions = [region['RegionName'] for region in response['Regions'] if region.get('OptInStatus') != 'not-opted-in']
+        with ENABLED_REGIONS_LOCK:
+            ENABLED_REGIONS[self.account] = (now + REGION_CACHE_TTL, regions)
+        return regions
+
+    def regions(self, ec2_client):
+        regions = self.enabled_regions(ec2_client)
+        if len(self.allow) != 0:
+            regions = [region for region in regions if region in self.allow]
+        return [region for region in regions if region not in self.deny]
+
+    def available_regions(self, service):
+        with self.lock:
+            if service not in self.services:
+                self.services[service] = set(self.boto3_session.get_available_regions(service))
+            return self.services[service]
+
+    def regions_for(self, service, regions):
+        available = self.available_regions(service)
+        # EC2 is in every region botocore knows, so it tells a missing service from an unknown region
+        known = self.available_regions('ec2')
+        if len(available) == 0:
+            return list(regions)
+        return [region for region in regions if region in available or region not in known]
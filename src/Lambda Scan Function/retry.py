@@ -0,0 +1,93 @@
+import os
+import random
+import threading
+from collections import Counter
+
+from scheduler import current_task
+
+# Error codes AWS returns when a request is throttled
+THROTTLING_ERROR_CODES = frozenset([
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'RequestThrottled', 'BandwidthLimitExceeded', 'LimitExceededException', 'SlowDown',
+    'EC2ThrottledException', 'PriorRequestNotComplete', 'TransactionInProgressException',
+])
+
+# Error codes of requests that failed on the AWS side and can be sent again as is
+TRANSIENT_ERROR_CODES = frozenset([
+    'RequestTimeout', 'RequestTimeoutException', 'InternalError', 'InternalFailure',
+    'ServiceUnavailable', 'ServiceUnavailableException', 'IDPCommunicationError',
+])
+
+# Attempts per call (first attempt included), backoff bounds in seconds and retries allowed for the whole scan.
+RETRY_MAX_ATTEMPTS = int(os.environ.get('RETRY_MAX_ATTEMPTS', 6))
+RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 0.2))
+RETRY_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', 20))
+RETRY_BUDGET = int(os.environ.get('RETRY_BUDGET', 500))
+
+def classify_error(response, caught_exception):
+    """Returns 'throttle', 'transient' or None for the outcome of an attempt."""
+    if caught_exception is not None:
+        # Connection resets and timeouts raised before a response was read
+        name = type(caught_exception).__name__
+        if 'Connection' in name or 'Timeout' in name:
+            return 'transient'
+        return None
+    if response is None:
+        return None
+    http_response, parsed = response
+    code = parsed.get('Error', {}).get('Code', '')
+    if code in THROTTLING_ERROR_CODES or http_response.status_code == 429:
+        return 'throttle'
+    if code in TRANSIENT_ERROR_CODES or http_response.status_code in (500, 502, 503, 504):
+        return 'transient'
+    return None
+
+class RetryPolicy(object):
+    """Scan wide retry strategy for throttled and transient AWS errors.
+
+    attach() registers a needs-retry handler on a client. botocore sleeps for
+    the delay the handler returns and sends the request again, which works
+    the same way for single calls, paginator pages and the async engine. The
+    delay is exponential with full jitter, and every retry is taken from one
+    budget shared by the whole scan so a throttling storm cannot stretch the
+    scan indefinitely. Retries are counted per scheduler task.
+    """
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None, budget=None):
+        self.max_attempts = max_attempts or RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay or RETRY_BASE_DELAY
+        self.max_delay = max_delay or RETRY_MAX_DELAY
+        self.budget = RETRY_BUDGET if budget is None else budget
+        self.lock = threading.Lock()
+        self.retries = Counter()
+        self.errors = Counter()
+        self.exhausted = 0
+
+    def delay(self, attempts):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempts - 1))))
+
+    def needs_retry(self, response=None, attempts=None, caught_exception=None, **kwargs):
+        kind = classify_error(response, caught_exception)
+        if kind is None:
+            return None
+        with self.lock:
+            self.errors[kind] += 1
+            if attempts >= self.max_attempts or self.budget <= 0:
+                self.exhausted += 1
+                return None
+            self.budget -= 1
+            self.retries[current_task()] += 1
+        return self.delay(attempts)
+
+    def attach(self, client):
+        client.meta.events.register('needs-retry', self.needs_retry)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'retries': dict(self.retries),
+                'errors': dict(self.errors),
+                'exhausted': self.exhausted,
+                'budget': self.budget,
+            }
@@ -2,15 +2,31 @@
 
 from __future__ import print_function
 import json
-import csv
 import time
-import sys
 import re
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import unquote
 from collections import Counter, OrderedDict
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import and_, eq, gt, le, lt, or_
 import botocore
 import session
+from executor import run_regional, fan_out
+from scheduler import run_plan
+from async_engine import AsyncScanEngine
+from provider import DataProvider
+from client_cache import ClientCache
+from rate_limiter import RateLimiter, rate_limiter_enabled, parse_rate_limits
+from retry import RetryPolicy
+from concurrency import AdaptiveConcurrency, ADAPTIVE_CONCURRENCY
+from regions import RegionPlanner
+from circuit_breaker import CircuitBreaker, is_region_failure
+from security_groups import SecurityGroupIndex
+from policy_analyzer import analyze_policy, policy_cache_stats
+from filter_pattern import pattern_terms, matches_pattern
+from credential_report import CredentialReport
 from mailer import *
 from db import *
 
@@ -25,6 +41,66 @@ AWS_CIS_BENCHMARK_VERSION = "1.3"
 # Control 1.1 - Days allowed since use of root account.
 CONTROL_1_1_DAYS = 0
 
+# Control 1.12 - Days a password or access key may stay unused.
+CONTROL_1_12_DAYS = 90
+
+# Control 1.14 - Days an access key may go without rotation.
+CONTROL_1_14_DAYS = 90
+
+# S3 bucket settings collected once per bucket for controls 1.20, 2.1.1, 2.1.2, 3.3 and 3.6 :: record key -> operation
+S3_BUCKET_OPERATIONS = OrderedDict([
+    ('PublicAccessBlock', 'get_public_access_block'),
+    ('Encryption', 'get_bucket_encryption'),
+    ('Policy', 'get_bucket_policy'),
+    ('Acl', 'get_bucket_acl'),
+    ('Logging', 'get_bucket_logging'),
+])
+
+# Settings left out of the bucket records until a control asks for them, 1.20 only needs the bucket
+# public access blocks when the account level Block Public Access does not cover every bucket
+S3_LAZY_SETTINGS = ('PublicAccessBlock',)
+
+PUBLIC_ACCESS_BLOCK_FLAGS = ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets')
+
+def parse_sensitive_ports(value):
+    """Returns 22, 3389 and the ports of a comma separated list, entries that are not a TCP port are logged and skipped."""
+    ports = set([22, 3389])
+    for entry in value.split(','):
+        if entry.strip() == "":
+            continue
+        try:
+            port = int(entry)
+        except ValueError:
+            port = -1
+        if 0 <= port <= 65535:
+            ports.add(port)
+        else:
+            print("Ignoring SENSITIVE_PORTS entry " + repr(entry.strip()) + ", not a port number")
+    return sorted(ports)
+
+# Ports looked up in the world open rules of the security groups, 22 (5.1) and 3389 (5.2) are always
+# included, SENSITIVE_PORTS adds a comma separated list of ports, eg. "3306,5432,6379"
+SENSITIVE_PORTS = parse_sensitive_ports(os.environ.get('SENSITIVE_PORTS', ''))
+
+# describe_security_groups filters of the groups the security group index needs: groups with an
+# ingress rule open to any IPv4 or IPv6 address (5.1, 5.2) and the default groups (5.4)
+SECURITY_GROUP_FILTERS = [
+    [{'Name': 'ip-permission.cidr', 'Values': ['0.0.0.0/0']}],
+    [{'Name': 'ip-permission.ipv6-cidr', 'Values': ['::/0']}],
+    [{'Name': 'group-name', 'Values': ['default']}],
+]
+
+# KMS keys of a region inspected at once by 3.8.
+MAX_KEY_WORKERS = int(os.environ.get('MAX_KEY_WORKERS', 8))
+
+# Errors of a single KMS key that 3.8 reports without failing the region, eg. the key policy of an ACM key denies access
+KMS_KEY_ERROR_CODES = frozenset([
+    'AccessDeniedException', 'UnsupportedOperationException', 'KMSInvalidStateException', 'NotFoundException',
+])
+
+# Buckets collected at once by the S3 collector.
+MAX_BUCKET_WORKERS = int(os.environ.get('MAX_BUCKET_WORKERS', 16))
+
 
 # --- Global ---
 
@@ -49,13 +125,82 @@ aws_fsbp ={}
 cis_benchmark={}
 aws_cis ={}
 
+# Scan scoped boto3 clients shared by the controls, one per (service, region), created by AWS_CIS
+CLIENT_CACHE = None
+
+# Retry strategy and budget of the scan for throttled and transient AWS errors, created by AWS_CIS
+RETRY_POLICY = None
+
+# AIMD limits of the AWS calls in flight per service and region, created by AWS_CIS unless ADAPTIVE_CONCURRENCY is False
+CONCURRENCY = None
+
+# Regions of the scan and the services available in each of them, created by AWS_CIS
+REGION_PLANNER = None
+
+# Circuit breaker of the scan per (region, service), created by AWS_CIS
+CIRCUIT_BREAKER = None
+
+# Set when the scan event selects the asyncio engine, every client then issues its calls on the engine loop
+SCAN_ENGINE = None
+
+# Scan scoped cache of the AWS responses shared between controls, created by AWS_CIS
+DATA_PROVIDER = None
+
+# AWS serves a generated credential report for four hours, a report inside that window is reused as is
+CREDENTIAL_REPORT_REUSE_WINDOW = 4 * 60 * 60
+# Seconds the scan waits for a new credential report, polled every 0.5s at first and backing off up to 8s
+CREDENTIAL_REPORT_TIMEOUT = int(os.environ.get('CREDENTIAL_REPORT_TIMEOUT', 60))
+CREDENTIAL_REPORT_FIRST_POLL = 0.5
+CREDENTIAL_REPORT_MAX_POLL = 8
+
+def get_client(service, region=None):
+    if SCAN_ENGINE is not None:
+        return SCAN_ENGINE.client(service, region)
+    return CLIENT_CACHE.get(service, region)
+
+def run_planned_regions(func, service, regions, requests=None):
+    """Runs func over the regions planned for service.
+
+    requests(region) lists the DataProvider requests func makes in a region,
+    they are prefetched for all the regions at once when the async engine is
+    used. Returns the (region, result) pairs of the evaluated regions and the
+    list of the regions left out because they could not be reached or their
+    circuit breaker is open. Any other error is raised as before.
+    """
+    unavailable = []
+    planned = REGION_PLANNER.regions_for(service, regions)
+    if requests is not None:
+        DATA_PROVIDER.prefetch([request for region in planned for request in requests(region)])
+
+    def guarded(region):
+        try:
+            return func(region)
+        except Exception as e:
+            if not is_region_failure(e):
+                raise
+            print("Region unavailable :: " + str(region) + " : " + str(e))
+            unavailable.append(region)
+            return None
+
+    results = run_regional(guarded, planned)
+    return [(region, result) for region, result in results if region not in unavailable], sorted(unavailable)
+
+def not_evaluated(unavailable):
+    if len(unavailable) == 0:
+        return ""
+    return "<B><br>Not evaluated: region unavailable</B> :: " + str(unavailable)
+
+def credential_report_failure(credential_findings):
+    # Comment of the credential report controls when no report could be read
+    return "<B><br>Not evaluated</B> :: " + str(credential_findings['Error'])
+
 # CIS Security Controls
 
 # --- 1 Identity and Access Management ---
 # CIS total automated 17 controls for IAM
 
 # CIS 1.4 
-def security_1_4_root_access_key_exists(credential_report):
+def security_1_4_root_access_key_exists(credential_findings):
 
     result = True
     comments = "Removing access keys associated with the root account limits vectors that the account can be compromised."
@@ -64,10 +209,13 @@ def security_1_4_root_access_key_exists(credential_report):
     description = "Ensure no root account access key exists"
     Severity = 'Critical'
     
-    if (credential_report[0]['access_key_1_active'] == "true") or (credential_report[0]['access_key_2_active'] == "true"):
+    if credential_findings['1.4']:
         result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.5
@@ -80,7 +228,7 @@ def security_1_5_mfa_root_enabled():
     description = "Ensure MFA is enabled for the root account"
     Severity = 'Critical'
     
-    response = IAM_CLIENT.get_account_summary()
+    response = DATA_PROVIDER.fetch('iam', 'get_account_summary')
     if response['SummaryMap']['AccountMFAEnabled'] != 1:
         result = False
         comments = "Root account not using MFA"
@@ -99,7 +247,7 @@ def security_1_6_hardware_mfa_root_enabled():
     Severity = 'Critical'
     
     # First check if root uses MFA (to avoid false positives)
-    response = IAM_CLIENT.get_account_summary()
+    response = DATA_PROVIDER.fetch('iam', 'get_account_summary')
     if response['SummaryMap']['AccountMFAEnabled'] == 1:
         pages = IAM_CLIENT.get_paginator('list_virtual_mfa_devices')
         res_iter = pages.paginate(
@@ -118,7 +266,7 @@ def security_1_6_hardware_mfa_root_enabled():
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.7
-def security_1_7_avoid_root_for_admin_tasks(credential_report):
+def security_1_7_avoid_root_for_admin_tasks(credential_findings):
 
     result = True
     comments = "Minimizing the use of root account and adopting the principle of least privilege for access management reduces the risk of accidental changes and unintended disclosure of highly privileged credentials."
@@ -127,42 +275,14 @@ def security_1_7_avoid_root_for_admin_tasks(credential_report):
     description = "Avoid the use of the root account"
     Severity = 'Low'
     
-    if "Fail" in credential_report:  # Report failure in cis_control
-        sys.exit(credential_report)
     # Check if root is used in the last 24h
-    now = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(time.time()))
-    frm = "%Y-%m-%dT%H:%M:%S+00:00"
-
-    try:
-        passwordDelta = (datetime.strptime(now, frm) - datetime.strptime(credential_report[0]['password_last_used'], frm))
-        if (passwordDelta.days == CONTROL_1_1_DAYS) & (passwordDelta.seconds > 0):  # Used within last 24h
-            result = False
-    except:
-        if credential_report[0]['password_last_used'] == "N/A" or "no_information":
-            pass
-        else:
-            print("Something went wrong")
-
-    try:
-        accessKey1 = (datetime.strptime(now, frm) - datetime.strptime(credential_report[0]['access_key_1_last_used_date'], frm))
-        if (accessKey1.days == CONTROL_1_1_DAYS) & (accessKey1.seconds > 0):  # Used within last 24h
-            result = False
-    except:
-        if credential_report[0]['access_key_1_last_used_date'] == "N/A" or "no_information":
-            pass
-        else:
-            print("Something went wrong")
-    try:
-        accessKey2 = datetime.strptime(now, frm) - datetime.strptime(credential_report[0]['access_key_2_last_used_date'], frm)
-        if (accessKey2.days == CONTROL_1_1_DAYS) & (accessKey2.seconds > 0):  # Used within last 24h
-            result = False
-    except:
-        if credential_report[0]['access_key_2_last_used_date'] == "N/A" or "no_information":
-            pass
-        else:
-            print("Something went wrong")
+    if credential_findings['1.7']:
+        result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.8
@@ -209,7 +329,7 @@ def security_1_9_password_policy_reuse(passwdPolicy):
     return {'Result': result, 'comments': comments, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 1.10
-def security_1_10_enable_mfa_on_iam_console_password(credential_report):
+def security_1_10_enable_mfa_on_iam_console_password(credential_findings):
 
     result = True
     comments = " Enabling MFA provides increased security for console access because it requires the authenticating principal to possess a device that emits a time-sensitive key and have knowledge of a credential."
@@ -218,19 +338,19 @@ def security_1_10_enable_mfa_on_iam_console_password(credential_report):
     description = "Ensure multi-factor authentication (MFA) is enabled for all IAM users that have a console password"
     Severity = 'Medium'
     
-    for i in range(len(credential_report)):
-        # Verify if the user have a password configured
-        if credential_report[i]['password_enabled'] == "true":
-            # Verify if password users have MFA assigned
-            if credential_report[i]['mfa_active'] == "false":
-                result = False
-                NonCompliantAccounts.append(str(credential_report[i]['arn']))
+    # Password users without MFA assigned
+    NonCompliantAccounts = credential_findings['1.10']
+    if len(NonCompliantAccounts) != 0:
+        result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.11 
-def security_1_11_no_iam_access_key_passwd_setup(credential_report):
+def security_1_11_no_iam_access_key_passwd_setup(credential_findings):
 
     result = True
     comments = "Requiring the additional steps be taken by the user for programmatic access after their profile has been created will give a stronger indication of intent that access keys are necessary for their work and once the access key is established on an account, the keys may be in use somewhere in the organization."
@@ -238,22 +358,19 @@ def security_1_11_no_iam_access_key_passwd_setup(credential_report):
     cis_control = "1.11"
     description = "Do not setup access keys during initial user setup for all IAM users that have a console password"
     Severity = 'Low'
-    try:
-        for user in credential_report:
-            if user['password_enabled'] == "true":
-                if (user['access_key_1_last_used_date'] == "NA") or (user['access_key_2_last_used_date'] == "NA") :
-                    result = False
-                    NonCompliantAccounts.append(user['user'])
-    except Exception as e:
-        result =False
-        print("Exception in Security control 1.13 : ",str(e))
+    NonCompliantAccounts = credential_findings['1.11']
+    if len(NonCompliantAccounts) != 0:
+        result = False
 
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.12
-def security_1_12_credentials_unused(credential_report):
+def security_1_12_credentials_unused(credential_findings):
 
     result = True
     comments = "Remove or deactivate all credentials that have been unused in 90 days or more."
@@ -262,82 +379,40 @@ def security_1_12_credentials_unused(credential_report):
     description = "Ensure credentials unused for 90 days or greater are disabled"
     Severity = 'Low'
     
-    # Get current time
-    now = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(time.time()))
-    frm = "%Y-%m-%dT%H:%M:%S+00:00"
-
     # check for credentails that are unused
-    for i in range(len(credential_report)):
-        if credential_report[i]['password_enabled'] == "true":
-            try:
-                dayCount = datetime.strptime(now, frm) - datetime.strptime(credential_report[i]['password_last_used'], frm)
-                # Verify password have been used in the last 90 days
-                if dayCount.days > 90:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":password")
-            except:
-                pass  # Never used
-        if credential_report[i]['access_key_1_active'] == "true":
-            try:
-                dayCount = datetime.strptime(now, frm) - datetime.strptime(credential_report[i]['access_key_1_last_used_date'], frm)
-                # Verify password have been used in the last 90 days
-                if dayCount.days > 90:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":key1")
-            except:
-                pass
-        if credential_report[i]['access_key_2_active'] == "true":
-            try:
-                dayCount = datetime.strptime(now, frm) - datetime.strptime(credential_report[i]['access_key_2_last_used_date'], frm)
-                # Verify password have been used in the last 90 days
-                if dayCount.days > 90:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":key2")
-            except:
-                # Never used
-                pass
+    NonCompliantAccounts = credential_findings['1.12']
+    if len(NonCompliantAccounts) != 0:
+        result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.13
-def security_1_13_no_2_active_access_keys_iam_user():
+def security_1_13_no_2_active_access_keys_iam_user(credential_findings):
     
-    NonCompliantAccounts=[]
-    access_key_lst=[]
-    count =0
     result = True
     comments = "One of the best ways to protect your account is to not allow users to have multiple access keys."
     NonCompliantAccounts = []
     cis_control = "1.13"
     description = "Ensure there is only one active access key available for any single IAM user"
     Severity = 'Medium'
-    try:
-        user_paginator = IAM_CLIENT.get_paginator('list_users')
-        access_key_paginator = IAM_CLIENT.get_paginator('list_access_keys')
-        for response in user_paginator.paginate():
-            for user in response['Users']:
-                for response in access_key_paginator.paginate(UserName=user['UserName']):
-                    for access_key in response['AccessKeyMetadata']:
-                        if (access_key['Status'] == "Active"):
-                            count+=1
-                            access_key_lst.append(access_key['AccessKeyId'])    
-                user_access_key ='user : '+access_key['UserName'] +', access_key_ids: '+ ','.join(access_key_lst)
-                access_key_lst=[]
-                if count > 1 :
-                    result=False
-                    NonCompliantAccounts.append(user_access_key)
-                count=0
-    except Exception as e:
+    # Users with both access key slots of the credential report active
+    NonCompliantAccounts = credential_findings['1.13']
+    if len(NonCompliantAccounts) != 0:
         result = False
-        print("Exception in Security control 1.13 : ",str(e))
 
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 1.14 
-def security_1_14_access_keys_rotated(credential_report):
+def security_1_14_access_keys_rotated(credential_findings):
 
     result = True
     comments = "Rotating access keys reduces the chance for an access key that is associated with a compromised or terminated account to be used. Rotate access keys to ensure that data can't be accessed with an old key that might have been lost, cracked, or stolen."
@@ -346,54 +421,19 @@ def security_1_14_access_keys_rotated(credential_report):
     description = "Ensure access keys are rotated every 90 days or less"
     Severity = 'Medium'
     
-    # Get current time
-    now = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(time.time()))
-    frm = "%Y-%m-%dT%H:%M:%S+00:00"
-
-    # Look for unused credentails
-    for i in range(len(credential_report)):
-        if credential_report[i]['access_key_1_active'] == "true":
-            try:
-                dayCount = datetime.strptime(now, frm) - datetime.strptime(credential_report[i]['access_key_1_last_rotated'], frm)
-                # Verify keys have rotated in the last 90 days
-                if dayCount.days > 90:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":unrotated key1")
-            except:
-                pass
-            try:
-                last_used_datetime = datetime.strptime(credential_report[i]['access_key_1_last_used_date'], frm)
-                last_rotated_datetime = datetime.strptime(credential_report[i]['access_key_1_last_rotated'], frm)
-                # Verify keys have been used since rotation.
-                if last_used_datetime < last_rotated_datetime:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":unused key1")
-            except:
-                pass
-        if credential_report[i]['access_key_2_active'] == "true":
-            try:
-                dayCount = datetime.strptime(now, frm) - datetime.strptime(credential_report[i]['access_key_2_last_rotated'], frm)
-                # Verify keys have rotated in the last 90 days
-                if dayCount.days > 90:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":unrotated key2")
-            except:
-                pass
-            try:
-                last_used_datetime = datetime.strptime(credential_report[i]['access_key_2_last_used_date'], frm)
-                last_rotated_datetime = datetime.strptime(credential_report[i]['access_key_2_last_rotated'], frm)
-                # Verify keys have been used since rotation.
-                if last_used_datetime < last_rotated_datetime:
-                    result = False
-                    NonCompliantAccounts.append(str(credential_report[i]['arn']) + ":unused key2")
-            except:
-                pass
+    # Look for unrotated keys and keys unused since their rotation
+    NonCompliantAccounts = credential_findings['1.14']
+    if len(NonCompliantAccounts) != 0:
+        result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: " + str(NonCompliantAccounts)
+    if credential_findings['Error'] is not None:
+        result = False
+        comments = comments + credential_report_failure(credential_findings)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.15 
-def security_1_15_only_group_policies_on_iam_users():
+def security_1_15_only_group_policies_on_iam_users(iam_snapshot):
 
     result = True
     comments = "IAM users must inherit permissions from IAM groups or roles."
@@ -402,19 +442,10 @@ def security_1_15_only_group_policies_on_iam_users():
     description = "IAM users should not have IAM policies attached"
     Severity = "Low"
     
-    paginator = IAM_CLIENT.get_paginator('list_users')
-    response_iterator = paginator.paginate()
-    pagedResult = []
-    for page in response_iterator:
-        for n in page['Users']:
-            pagedResult.append(n)
     NonCompliantAccounts = []
-    for n in pagedResult:
-        policies = IAM_CLIENT.list_user_policies(
-            UserName=n['UserName'],
-            MaxItems=1
-        )
-        if policies['PolicyNames'] != []:
+    for n in iam_snapshot['UserDetailList']:
+        # Inline policies of the user
+        if len(n.get('UserPolicyList', [])) != 0:
             result = False
             NonCompliantAccounts.append(str(n['Arn']))
     if(len(NonCompliantAccounts)!=0):
@@ -422,7 +453,7 @@ def security_1_15_only_group_policies_on_iam_users():
     return {'Result': result, 'comments': comments, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 1.16
-def security_1_16_no_admin_priv_policies():
+def security_1_16_no_admin_priv_policies(iam_snapshot):
 
     result = True
     comments = "Providing full administrative privileges instead of restricting to the minimum set of permissions that the user is required to do exposes the resources to potentially unwanted actions."
@@ -432,41 +463,17 @@ def security_1_16_no_admin_priv_policies():
     Severity = 'Critical'
     
     NonCompliantAccounts = []
-    paginator = IAM_CLIENT.get_paginator('list_policies')
-    response_iterator = paginator.paginate(
-        Scope='Local',
-        OnlyAttached=False,
-    )
-    pagedResult = []
-    for page in response_iterator:
-        for n in page['Policies']:
-            pagedResult.append(n)
-    for m in pagedResult:
-        policy = IAM_CLIENT.get_policy_version(
-            PolicyArn=m['Arn'],
-            VersionId=m['DefaultVersionId']
-        )
-
-        statements = []
-        # a policy may contain a single statement, a single statement in an array, or multiple statements in an array
-        if isinstance(policy['PolicyVersion']['Document']['Statement'], list):
-            for statement in policy['PolicyVersion']['Document']['Statement']:
-                statements.append(statement)
-        else:
-            statements.append(policy['PolicyVersion']['Document']['Statement'])
-
-        for n in statements:
-            # a policy statement has to contain either an Action or a NotAction
-            if 'Action' in n.keys() and n['Effect'] == 'Allow':
-                if ("'*'" in str(n['Action']) or str(n['Action']) == "*") and ("'*'" in str(n['Resource']) or str(n['Resource']) == "*"):
-                    result = False
-                    NonCompliantAccounts.append(str(m['Arn']))
+    for m in iam_snapshot['Policies']:
+        # an Allow statement with "*" in its Action and in its Resource grants full administrative privileges
+        if analyze_policy(get_default_policy_document(m))['FullAdmin']:
+            result = False
+            NonCompliantAccounts.append(str(m['Arn']))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 1.17
-def security_1_17_ensure_support_roles():
+def security_1_17_ensure_support_roles(iam_snapshot):
 
     result = True
     comments = "Assigning privileges at the group or role level reduces the complexity of access management as the number of users grow."
@@ -477,10 +484,13 @@ def security_1_17_ensure_support_roles():
     
     NonCompliantAccounts = []
     try:
-        response = IAM_CLIENT.list_entities_for_policy(
-            PolicyArn='arn:aws:iam::aws:policy/AWSSupportAccess'
-        )
-        if (len(response['PolicyGroups']) + len(response['PolicyUsers']) + len(response['PolicyRoles'])) == 0:
+        supportEntities = []
+        for key in ('UserDetailList', 'GroupDetailList', 'RoleDetailList'):
+            for entity in iam_snapshot[key]:
+                for policy in entity.get('AttachedManagedPolicies', []):
+                    if policy['PolicyArn'] == 'arn:aws:iam::aws:policy/AWSSupportAccess':
+                        supportEntities.append(entity['Arn'])
+        if len(supportEntities) == 0:
             result = False
     except:
         result = False
@@ -516,7 +526,7 @@ def security_1_19_expired_SSL_TLS_certificates():
     return {'Result': result, 'comments': comments, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 1.20
-def security_1_20_Bucket_PublicAccess_check():
+def security_1_20_Bucket_PublicAccess_check(s3_buckets, account_number):
 
     status=False
     response=None
@@ -525,15 +535,21 @@ def security_1_20_Bucket_PublicAccess_check():
     cis_control="1.20"
     description="Ensure that S3 Buckets are configured with 'Block Public Access'."
     Severity= "Medium"
-    s3_response = S3_CLIENT.list_buckets()
+
+    # The account level setting applies to every bucket, when it enforces all four flags no bucket has to be checked
+    accountBlock = get_account_public_access_block(account_number)
+    if accountBlock is not None and all(accountBlock.get(flag) is True for flag in PUBLIC_ACCESS_BLOCK_FLAGS):
+        comments = comments + "<B><br>Block Public Access is enforced at the account level.</B>"
+        return {'Result': True, 'comments': comments, 'NonCompliantAccounts': NonCompliantS3, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+
     try:
-        if len(s3_response['Buckets'])>0:
-            buckets = s3_response['Buckets']
+        if len(s3_buckets)>0:
+            buckets = s3_buckets.values()
+            DATA_PROVIDER.prefetch(bucket_requests(buckets, ['PublicAccessBlock']))
+            fan_out(lambda bucket: fetch_bucket_setting(bucket, 'PublicAccessBlock'), buckets, MAX_BUCKET_WORKERS)
             for bucket in buckets:
                 try:
-                    response = S3_CLIENT.get_public_access_block(
-                        Bucket=bucket['Name']
-                    )
+                    response = bucket_setting(bucket, 'PublicAccessBlock')
                     if( response['PublicAccessBlockConfiguration']):
                         status = response['PublicAccessBlockConfiguration']['BlockPublicAcls'] &response['PublicAccessBlockConfiguration']['IgnorePublicAcls'] & response['PublicAccessBlockConfiguration']['BlockPublicPolicy'] & response['PublicAccessBlockConfiguration']['RestrictPublicBuckets']
                     if(status==False):
@@ -562,7 +578,7 @@ def security_1_21_Access_Analyzer():
     Severity = "Low"
     
     try:
-        client = boto3_session.client('accessanalyzer')
+        client = get_client('accessanalyzer')
         response = client.list_analyzers()
         if len(response['analyzers'])>0:
             for analyzer in response['analyzers']:
@@ -587,7 +603,7 @@ def security_1_21_Access_Analyzer():
 
 
 # CIS 2.1.1
-def security_2_1_1_s3_EncryptionCheck(): 
+def security_2_1_1_s3_EncryptionCheck(s3_buckets): 
     result=False
     response=None
     NonCompliantS3 = []
@@ -595,15 +611,12 @@ def security_2_1_1_s3_EncryptionCheck():
     cis_control="2.1.1"
     description="Ensure all S3 buckets employ encryption-at-rest."
     Severity= "Medium"
-    s3_response = S3_CLIENT.list_buckets()
     try:
-        if len(s3_response['Buckets'])>0:
-            buckets = s3_response['Buckets']
+        if len(s3_buckets)>0:
+            buckets = s3_buckets.values()
             for bucket in buckets:
                 try:
-                    response = S3_CLIENT.get_bucket_encryption(
-                        Bucket=bucket['Name']
-                    )
+                    response = bucket_setting(bucket, 'Encryption')
                     #print(response['ServerSideEncryptionConfiguration'])
                     if 'ServerSideEncryptionConfiguration' in response:
                         result = True
@@ -628,7 +641,7 @@ def security_2_1_1_s3_EncryptionCheck():
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantS3, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 2.1.2  
-def security_2_1_1_SslPolicyCheck():
+def security_2_1_1_SslPolicyCheck(s3_buckets):
     # print(bucket)
     result=False
     sslsocket = False
@@ -638,17 +651,14 @@ def security_2_1_1_SslPolicyCheck():
     cis_control="2.1.2"
     description="Ensure S3 Bucket Policy allows HTTPS requests."
     Severity= "Medium"
-    s3_response = S3_CLIENT.list_buckets()
     i=0
     try:
-        if len(s3_response['Buckets'])>0:
-            buckets = s3_response['Buckets']
+        if len(s3_buckets)>0:
+            buckets = s3_buckets.values()
             for bucket in buckets:
                 sslsocket = False
                 try:
-                    response = S3_CLIENT.get_bucket_policy(
-                            #AccountId= get_aws_account_number(),
-                        Bucket=bucket['Name']    )
+                    response = bucket_setting(bucket, 'Policy')
                 except Exception as e:
                     if 'NoSuchBucket' in str(e):
                         # print (e)
@@ -657,20 +667,10 @@ def security_2_1_1_SslPolicyCheck():
                     else:
                         raise
                 if response is not None:
-                    policy = json.loads(response['Policy'])
-                    # print(type(policy),policy)
-                    for s in policy['Statement']:
-                        try:
-                            # print(s)   
-                            if(s['Effect'].lower()=='deny' and s['Condition']['Bool']['aws:SecureTransport'].lower()=='false'):
-                                # print("here")
-                                result=True
-                                sslsocket = True
-                        except Exception as e:
-                            if 'Bool' in str(e):
-                                result = False
-                                if(bucket['Name'] not in NonCompliantS3):
-                                    NonCompliantS3.append(bucket['Name']) 
+                    # a Deny statement with the condition Bool aws:SecureTransport false
+                    if analyze_policy(response['Policy'])['SecureTransport']:
+                        result=True
+                        sslsocket = True
                     if sslsocket !=True:
                         result = False
                         if(bucket['Name'] not in NonCompliantS3):
@@ -697,25 +697,45 @@ def security_2_2_EBSVolumeEncryptCheck(regions):
     cis_control = "2.2.1"
     description = " Ensure EBS volume encryption is enabled."
     Severity = 'Medium'
-    for r in regions:
-        tmp_lst=[]
-        EC2_CLIENT = boto3_session.client('ec2',region_name=r)
-        response = EC2_CLIENT.describe_volumes()
+
+    def get_region_default_encryption(r):
+        # Informational only, the control is decided on the volumes so a failed lookup is reported as unknown
         try:
-            if len(response['Volumes']) >0 :
-                for m in response['Volumes']:
-                    if( m['Encrypted'] == False):
-                        result = False
-                        tmp_lst.append(m['VolumeId'])
-                tmp_dct= "<b>Region :</b> "+r+" <b>VolumeIds :</b> "+','.join(tmp_lst)+"<br>"
-                NonCompliantEc2.append(tmp_dct)
-            else:
-                comments = comments + "No EBS Volumes Found in the region : "+r
-        except Exception as e:
-            print(str(e))
-            
+            return DATA_PROVIDER.fetch('ec2', 'get_ebs_encryption_by_default', r)['EbsEncryptionByDefault']
+        except botocore.exceptions.ClientError as e:
+            if is_region_failure(e):
+                raise
+            print("Unable to read the EBS encryption by default of region " + str(r) + " : " + str(e))
+            return None
+
+    def describe_region_volumes(r):
+        # Only the unencrypted volumes are requested, the response grows with the violations instead of the inventory
+        encryptedByDefault = get_region_default_encryption(r)
+        volumes = []
+        for page in DATA_PROVIDER.fetch_pages('ec2', 'describe_volumes', r, Filters=[{'Name': 'encrypted', 'Values': ['false']}]):
+            volumes.extend(page['Volumes'])
+        return encryptedByDefault, volumes
+
+    def region_volume_requests(r):
+        return [('ec2', 'get_ebs_encryption_by_default', r, {}, False),
+                ('ec2', 'describe_volumes', r, {'Filters': [{'Name': 'encrypted', 'Values': ['false']}]}, True)]
+
+    defaultDisabled = []
+    evaluated, unavailable = run_planned_regions(describe_region_volumes, 'ec2', regions, region_volume_requests)
+    for r, (encryptedByDefault, volumes) in evaluated:
+        if encryptedByDefault is False:
+            defaultDisabled.append(r)
+        tmp_lst=[m['VolumeId'] for m in volumes]
+        if len(tmp_lst) > 0:
+            result = False
+            tmp_dct= "<b>Region :</b> "+r+" <b>VolumeIds :</b> "+','.join(tmp_lst)+"<br>"
+            NonCompliantEc2.append(tmp_dct)
+
     if(len(NonCompliantEc2)!=0):
         comments = comments + "<B><br>NonCompliant EBS Volumes</B> :: "+str(NonCompliantEc2)
+    if(len(defaultDisabled)!=0):
+        comments = comments + "<B><br>EBS encryption by default disabled</B> :: "+str(defaultDisabled)
+    comments = comments + not_evaluated(unavailable)
     return {'Result': result, 'comments': comments, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 
@@ -732,14 +752,11 @@ def security_3_1_cloud_trail_all_regions(cloudtrails):
     cis_control = "3.1"
     description = "Ensure CloudTrail is enabled in all regions"
     Severity="Critical"
-    if(len(cloudtrails)!=0):
-        for m, n in cloudtrails.items():
+    if(len(cloudtrails['trails'])!=0):
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 if o['IsMultiRegionTrail']:
-                    client = boto3_session.client('cloudtrail', region_name=m)
-                    response = client.get_trail_status(
-                        Name=o['TrailARN']
-                    )
+                    response = trail_setting(o, 'Status')
                     if response['IsLogging'] is True:
                         result = True
                         break
@@ -750,6 +767,7 @@ def security_3_1_cloud_trail_all_regions(cloudtrails):
         result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliant Regions</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.2 
@@ -761,8 +779,8 @@ def security_3_2_cloudtrail_validation(cloudtrails):
     cis_control = "3.2"
     description = "Ensure CloudTrail log file validation is enabled"
     Severity="Low"
-    if len(cloudtrails)>0:
-        for m, n in cloudtrails.items():
+    if len(cloudtrails['trails'])>0:
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 if o['LogFileValidationEnabled'] is False:
                     result = False
@@ -775,10 +793,11 @@ def security_3_2_cloudtrail_validation(cloudtrails):
         result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.3
-def security_3_3_cloudtrail_public_bucket(cloudtrails):
+def security_3_3_cloudtrail_public_bucket(cloudtrails, s3_buckets):
 
     result = True
     comments = "S3 bucket CloudTrail is not publicly accessible"
@@ -786,13 +805,13 @@ def security_3_3_cloudtrail_public_bucket(cloudtrails):
     Severity="Critical"
     cis_control = "3.3"
     description = "Ensure the S3 bucket CloudTrail logs is not publicly accessible"
-    if len(cloudtrails)>0:   
-        for m, n in cloudtrails.items():
+    if len(cloudtrails['trails'])>0:   
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 #  We only want to check cases where there is a bucket
                 if "S3BucketName" in str(o):
                     try:
-                        response = S3_CLIENT.get_bucket_acl(Bucket=o['S3BucketName'])
+                        response = bucket_setting(get_bucket_record(s3_buckets, o['S3BucketName']), 'Acl')
                         for p in response['Grants']:
                             # print("Grantee is " + str(p['Grantee']))
                             if re.search(r'(global/AllUsers|global/AuthenticatedUsers)', str(p['Grantee'])):
@@ -823,6 +842,7 @@ def security_3_3_cloudtrail_public_bucket(cloudtrails):
         result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.4
@@ -834,9 +854,9 @@ def security_3_4_integrate_cloudtrail_cloudwatch_logs(cloudtrails):
     cis_control = "3.4"
     description = "Ensure CloudTrail trails are integrated with CloudWatch Logs"
     Severity = "Low"
-    if len(cloudtrails) > 0:
+    if len(cloudtrails['trails']) > 0:
 
-        for m, n in cloudtrails.items():
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 try:
                     if "arn:aws:logs" in o['CloudWatchLogsLogGroupArn']:
@@ -854,6 +874,7 @@ def security_3_4_integrate_cloudtrail_cloudwatch_logs(cloudtrails):
         result = False
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.5
@@ -869,10 +890,17 @@ def security_3_5_ensure_config_all_regions(regions):
     count = 0
     #regions = [regions]
     globalConfigCapture = False  # Only one region needs to capture global events
-    for n in regions:
+
+    def describe_region_config(n):
+        configClient = get_client('config', n)
+        return (configClient.describe_configuration_recorder_status(),
+                configClient.describe_configuration_recorders(),
+                configClient.describe_delivery_channel_status())
+
+    evaluated, unavailable = run_planned_regions(describe_region_config, 'config', regions)
+    for n, (recorderStatus, recorders, channelStatus) in evaluated:
         count = 0
-        configClient = boto3_session.client('config', region_name=n)
-        response = configClient.describe_configuration_recorder_status()
+        response = recorderStatus
         # Get recording status
         if response['ConfigurationRecordersStatus'] != "":
             try:
@@ -883,7 +911,7 @@ def security_3_5_ensure_config_all_regions(regions):
                 comments = "Unable to Fetch Config details<B>:: "+str(n)+"</B><br>"
 
         # Verify that each region is capturing all events
-        response = configClient.describe_configuration_recorders()
+        response = recorders
         if response['ConfigurationRecorders'] != "":
             try:
                 if not response['ConfigurationRecorders'][0]['recordingGroup']['allSupported'] is True:
@@ -900,7 +928,7 @@ def security_3_5_ensure_config_all_regions(regions):
                 pass
 
         # Verify the delivery channels
-        response = configClient.describe_delivery_channel_status()
+        response = channelStatus
         if response['DeliveryChannelsStatus'] != "":
             try:
                 if response['DeliveryChannelsStatus'][0]['configHistoryDeliveryInfo']['lastStatus'] != "SUCCESS":
@@ -925,10 +953,11 @@ def security_3_5_ensure_config_all_regions(regions):
         result = False
         comments = comments + "Config not enabled in all regions, not capturing all/global events or delivery channel errors"
         NonCompliantAccounts.append("Global:NotRecording, SNS:Recording")
+    comments = comments + not_evaluated(unavailable)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 3.6
-def security_3_6_cloudtrail_bucket_access_log(cloudtrails):
+def security_3_6_cloudtrail_bucket_access_log(cloudtrails, s3_buckets):
 
     result = True
     comments = "S3 bucket access logging is enabled on the CloudTrail S3 bucket"
@@ -937,12 +966,12 @@ def security_3_6_cloudtrail_bucket_access_log(cloudtrails):
     description = "Ensure S3 bucket access logging is enabled on the CloudTrail S3 bucket"
     Severity = 'Low'
     
-    if(len(cloudtrails)!=0): 
-        for m, n in cloudtrails.items():
+    if(len(cloudtrails['trails'])!=0): 
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 # it is possible to have a cloudtrail configured with a nonexistant bucket
                 try:
-                    response = S3_CLIENT.get_bucket_logging(Bucket=o['S3BucketName'])
+                    response = bucket_setting(get_bucket_record(s3_buckets, o['S3BucketName']), 'Logging')
                 except:
                     result = False
                     comments = "Cloudtrail not configured to log to S3. "
@@ -958,6 +987,7 @@ def security_3_6_cloudtrail_bucket_access_log(cloudtrails):
     else:
         comments = "No CloudTrail Logs Found"
         result = False
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.7
@@ -970,8 +1000,8 @@ def security_3_7_cloudtrail_log_kms_encryption(cloudtrails):
     description = "Ensure CloudTrail logs are encrypted at rest using KMS CMKs"
     Severity = "Medium"
     
-    if(len(cloudtrails)!=0): 
-        for m, n in cloudtrails.items():
+    if(len(cloudtrails['trails'])!=0): 
+        for m, n in cloudtrails['trails'].items():
             for o in n:
                 try:
                     if o['KmsKeyId']:
@@ -985,6 +1015,7 @@ def security_3_7_cloudtrail_log_kms_encryption(cloudtrails):
     else:
         comments = "No CloudTrail Logs Found"
         result = False
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
 
 # CIS 3.8
@@ -998,37 +1029,65 @@ def security_3_8_kms_cmk_rotation(regions):
     Severity = "High"
     
     #regions = [regions]
-    for n in regions:
-        kms_client = boto3_session.client('kms', region_name=n)
-        paginator = kms_client.get_paginator('list_keys')
-        response_iterator = paginator.paginate()
-        for page in response_iterator:
-            for n in page['Keys']:
-                # print('Key:id: ',n)
-                try:
-                    rotationStatus = kms_client.get_key_rotation_status(KeyId=n['KeyId'])
-                    keyState=kms_client.describe_key(KeyId=n['KeyId'])
-                    if(keyState['KeyMetadata']['KeyState'] == 'Enabled'):
-                        if rotationStatus['KeyRotationEnabled'] is False:
-                            keyDescription = kms_client.describe_key(KeyId=n['KeyId'])
-                            # print("Key Description : ",keyDescription)
-                            if "Default master key that protects my" not in str(keyDescription['KeyMetadata']['Description']):  # Ignore service keys
-                                result = False
-                                comments = "KMS CMK rotation not enabled"
-                                NonCompliantAccounts.append("Key:" + str(keyDescription['KeyMetadata']['Arn']))
-                    # else:
-                    #     print("Disabled Key Found",n['KeyId'])
-                    #     pass
-                except Exception as e:
-                    # print("except: ",e)
-                    comments = "Unable to access KMS CMK property for the <B>Key/Key-Id: "+str(n)+"</B>"
-                    #pass  # Ignore keys without permission, for example ACM key
+    def rotation_required(keyMetadata):
+        # AWS managed keys are rotated by AWS, disabled keys do not need rotation and automatic
+        # rotation only exists for symmetric encryption keys
+        return (keyMetadata.get('KeyManager') != 'AWS' and keyMetadata['KeyState'] == 'Enabled'
+                and keyMetadata.get('KeySpec', 'SYMMETRIC_DEFAULT') == 'SYMMETRIC_DEFAULT')
+
+    def inspect_region_keys(region):
+        # Returns the non-compliant keys of the region and the last comment raised while inspecting them
+        regionNonCompliant = []
+        regionComment = None
+        keys = []
+        for page in DATA_PROVIDER.fetch_pages('kms', 'list_keys', region):
+            keys.extend(page['Keys'])
+        DATA_PROVIDER.prefetch([('kms', 'describe_key', region, {'KeyId': n['KeyId']}, False) for n in keys])
+        # Only the keys already described are known to need their rotation status
+        described = [DATA_PROVIDER.cached('kms', 'describe_key', region, KeyId=n['KeyId']) for n in keys]
+        DATA_PROVIDER.prefetch([('kms', 'get_key_rotation_status', region, {'KeyId': n['KeyId']}, False)
+                                for n, response in zip(keys, described) if response is not None and rotation_required(response['KeyMetadata'])])
+
+        def inspect_key(n):
+            # Returns the ARN of a customer managed key without rotation, or the comment of a failed lookup
+            try:
+                keyMetadata = DATA_PROVIDER.fetch('kms', 'describe_key', region, KeyId=n['KeyId'])['KeyMetadata']
+                if not rotation_required(keyMetadata):
+                    return None, None
+                if DATA_PROVIDER.fetch('kms', 'get_key_rotation_status', region, KeyId=n['KeyId'])['KeyRotationEnabled'] is False:
+                    return "Key:" + str(keyMetadata['Arn']), None
+            except botocore.exceptions.ClientError as e:
+                # Ignore keys without permission, for example ACM key, any other error is raised for the region
+                if is_region_failure(e) or e.response.get('Error', {}).get('Code', '') not in KMS_KEY_ERROR_CODES:
+                    raise
+                return None, "Unable to access KMS CMK property for the <B>Key/Key-Id: "+str(n)+"</B>"
+            return None, None
+
+        for keyArn, keyComment in fan_out(inspect_key, keys, MAX_KEY_WORKERS):
+            if keyArn is not None:
+                regionComment = "KMS CMK rotation not enabled"
+                regionNonCompliant.append(keyArn)
+            elif keyComment is not None:
+                regionComment = keyComment
+        return regionNonCompliant, regionComment
+
+    def region_key_requests(region):
+        return [('kms', 'list_keys', region, {}, True)]
+
+    evaluated, unavailable = run_planned_regions(inspect_region_keys, 'kms', regions, region_key_requests)
+    for n, (regionNonCompliant, regionComment) in evaluated:
+        if len(regionNonCompliant) != 0:
+            result = False
+            NonCompliantAccounts.extend(regionNonCompliant)
+        if regionComment is not None:
+            comments = regionComment
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(unavailable)
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}   
 
 # CIS 3.9
-def security_3_9_vpc_flow_logs_enabled(regions):
+def security_3_9_vpc_flow_logs_enabled(flow_log_coverage):
 
     result = True
     comments = "VPC flow logging is enabled in all VPCs"
@@ -1037,34 +1096,15 @@ def security_3_9_vpc_flow_logs_enabled(regions):
     description = "Ensure VPC flow logging is enabled in all VPCs"
     Severity = 'High'
     
-    #regions = [regions]
-    for n in regions:
-        
-        client = boto3_session.client('ec2', region_name=n)
-        flowlogs = client.describe_flow_logs(
-            #  No paginator support in boto atm.
-        )
-        activeLogs = []
-        for m in flowlogs['FlowLogs']:
-            if "vpc-" in str(m['ResourceId']):
-                activeLogs.append(m['ResourceId'])
-        vpcs = client.describe_vpcs(
-            Filters=[
-                {
-                    'Name': 'state',
-                    'Values': [
-                        'available',
-                    ]
-                },
-            ]
-        )
-        for m in vpcs['Vpcs']:
-            if not str(m['VpcId']) in str(activeLogs):
+    for n, (vpcIds, coveredVpcs) in flow_log_coverage['regions'].items():
+        for vpcId in vpcIds:
+            if vpcId not in coveredVpcs:
                 result = False
                 comments = "VPC without active VPC Flow Logs found"
-                NonCompliantAccounts.append(str(n) + " : " + str(m['VpcId']))
+                NonCompliantAccounts.append(str(n) + " : " + str(vpcId))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(flow_log_coverage['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 3.10
@@ -1076,12 +1116,11 @@ def security_3_10_write_events_cloudtrail(cloudtrails):
     cis_control = "3.10"
     description = "Ensure that Object-level logging for write events is enabled for S3 bucket."
     Severity = 'Medium'
-    if(len(cloudtrails)!=0):
-        for m,n in cloudtrails.items():
+    if(len(cloudtrails['trails'])!=0):
+        for m,n in cloudtrails['trails'].items():
             for o in n:
                 try:
-                    client = boto3_session.client('cloudtrail',region_name=m)
-                    event_list= client.get_event_selectors(TrailName = o['Name'])
+                    event_list= trail_setting(o, 'EventSelectors')
                     for event in event_list['EventSelectors']:
                         if event['ReadWriteType'] == 'WriteOnly' or event['ReadWriteType'] == 'All':
                             if len(event['DataResources']) == 0:
@@ -1095,6 +1134,7 @@ def security_3_10_write_events_cloudtrail(cloudtrails):
     else:
         comments = "No CloudTrail Logs Found"
         result = False
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 
@@ -1108,12 +1148,11 @@ def security_3_11_read_events_cloudtrail(cloudtrails):
     description = "Ensure that Object-level logging for read events is enabled for S3 bucket."
     Severity = 'Medium'
 
-    if(len(cloudtrails)!=0):     
-        for m,n in cloudtrails.items():
+    if(len(cloudtrails['trails'])!=0):     
+        for m,n in cloudtrails['trails'].items():
             for o in n:
                 try:
-                    client = boto3_session.client('cloudtrail',region_name=m)
-                    event_list= client.get_event_selectors(TrailName = o['Name'])
+                    event_list= trail_setting(o, 'EventSelectors')
                     for event in event_list['EventSelectors']:
                         if event['ReadWriteType'] == 'ReadOnly' or event['ReadWriteType'] == 'All':
                             if len(event['DataResources']) == 0:
@@ -1127,842 +1166,334 @@ def security_3_11_read_events_cloudtrail(cloudtrails):
     else:
         comments = "No CloudTrail Logs Found"
         result = False
+    comments = comments + not_evaluated(cloudtrails['unavailable'])
     return {'Result': result, 'comments': comments, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # 4 Monitoring 
 # CIS total automated 15 controls for Monitoring
 
 
-# CIS 4.1 
-def security_4_1_unauthorized_api_calls_metric_filter(cloudtrails):
+# CIS 4.x metric filter patterns, a metric filter has to alert on every event of the control's pattern
+MONITORING_PATTERNS = OrderedDict([
+    ('4.1', '{ ($.errorCode = "*UnauthorizedOperation") || ($.errorCode = "AccessDenied*") }'),
+    ('4.2', '{ ($.eventName = "ConsoleLogin") && ($.additionalEventData.MFAUsed != "Yes") }'),
+    ('4.3', '{ $.userIdentity.type = "Root" && $.userIdentity.invokedBy NOT EXISTS && $.eventType != "AwsServiceEvent" }'),
+    ('4.4', '{ ($.eventName = DeleteGroupPolicy) || ($.eventName = DeleteRolePolicy) || ($.eventName = DeleteUserPolicy) || '
+            '($.eventName = PutGroupPolicy) || ($.eventName = PutRolePolicy) || ($.eventName = PutUserPolicy) || '
+            '($.eventName = CreatePolicy) || ($.eventName = DeletePolicy) || ($.eventName = CreatePolicyVersion) || '
+            '($.eventName = DeletePolicyVersion) || ($.eventName = AttachRolePolicy) || ($.eventName = DetachRolePolicy) || '
+            '($.eventName = AttachUserPolicy) || ($.eventName = DetachUserPolicy) || ($.eventName = AttachGroupPolicy) || '
+            '($.eventName = DetachGroupPolicy) }'),
+    ('4.5', '{ ($.eventName = CreateTrail) || ($.eventName = UpdateTrail) || ($.eventName = DeleteTrail) || '
+            '($.eventName = StartLogging) || ($.eventName = StopLogging) }'),
+    ('4.6', '{ ($.eventName = ConsoleLogin) && ($.errorMessage = "Failed authentication") }'),
+    ('4.7', '{ ($.eventSource = kms.amazonaws.com) && (($.eventName = DisableKey) || ($.eventName = ScheduleKeyDeletion)) }'),
+    ('4.8', '{ ($.eventSource = s3.amazonaws.com) && (($.eventName = PutBucketAcl) || ($.eventName = PutBucketPolicy) || '
+            '($.eventName = PutBucketCors) || ($.eventName = PutBucketLifecycle) || ($.eventName = PutBucketReplication) || '
+            '($.eventName = DeleteBucketPolicy) || ($.eventName = DeleteBucketCors) || ($.eventName = DeleteBucketLifecycle) || '
+            '($.eventName = DeleteBucketReplication)) }'),
+    ('4.9', '{ ($.eventSource = config.amazonaws.com) && (($.eventName = StopConfigurationRecorder) || '
+            '($.eventName = DeleteDeliveryChannel) || ($.eventName = PutDeliveryChannel) || ($.eventName = PutConfigurationRecorder)) }'),
+    ('4.10', '{ ($.eventName = AuthorizeSecurityGroupIngress) || ($.eventName = AuthorizeSecurityGroupEgress) || '
+             '($.eventName = RevokeSecurityGroupIngress) || ($.eventName = RevokeSecurityGroupEgress) || '
+             '($.eventName = CreateSecurityGroup) || ($.eventName = DeleteSecurityGroup) }'),
+    ('4.11', '{ ($.eventName = CreateNetworkAcl) || ($.eventName = CreateNetworkAclEntry) || ($.eventName = DeleteNetworkAcl) || '
+             '($.eventName = DeleteNetworkAclEntry) || ($.eventName = ReplaceNetworkAclEntry) || ($.eventName = ReplaceNetworkAclAssociation) }'),
+    ('4.12', '{ ($.eventName = CreateCustomerGateway) || ($.eventName = DeleteCustomerGateway) || ($.eventName = AttachInternetGateway) || '
+             '($.eventName = CreateInternetGateway) || ($.eventName = DeleteInternetGateway) || ($.eventName = DetachInternetGateway) }'),
+    ('4.13', '{ ($.eventName = CreateRoute) || ($.eventName = CreateRouteTable) || ($.eventName = ReplaceRoute) || '
+             '($.eventName = ReplaceRouteTableAssociation) || ($.eventName = DeleteRouteTable) || ($.eventName = DeleteRoute) || '
+             '($.eventName = DisassociateRouteTable) }'),
+    ('4.14', '{ ($.eventName = CreateVpc) || ($.eventName = DeleteVpc) || ($.eventName = ModifyVpcAttribute) || '
+             '($.eventName = AcceptVpcPeeringConnection) || ($.eventName = CreateVpcPeeringConnection) || '
+             '($.eventName = DeleteVpcPeeringConnection) || ($.eventName = RejectVpcPeeringConnection) || '
+             '($.eventName = AttachClassicLinkVpc) || ($.eventName = DetachClassicLinkVpc) || '
+             '($.eventName = DisableVpcClassicLink) || ($.eventName = EnableVpcClassicLink) }'),
+    ('4.15', '{ ($.eventSource = organizations.amazonaws.com) && (($.eventName = AcceptHandshake) || ($.eventName = AttachPolicy) || '
+             '($.eventName = CreateAccount) || ($.eventName = CreateOrganizationalUnit) || ($.eventName = CreatePolicy) || '
+             '($.eventName = DeclineHandshake) || ($.eventName = DeleteOrganization) || ($.eventName = DeleteOrganizationalUnit) || '
+             '($.eventName = DeletePolicy) || ($.eventName = DetachPolicy) || ($.eventName = DisablePolicyType) || '
+             '($.eventName = EnablePolicyType) || ($.eventName = InviteAccountToOrganization) || ($.eventName = LeaveOrganization) || '
+             '($.eventName = MoveAccount) || ($.eventName = RemoveAccountFromOrganization) || ($.eventName = UpdatePolicy) || '
+             '($.eventName = UpdateOrganizationalUnit)) }'),
+])
+
+# Pattern of each control in disjunctive normal form, parsed once
+MONITORING_TERMS = OrderedDict([(cis_control, pattern_terms(pattern)) for cis_control, pattern in MONITORING_PATTERNS.items()])
+
+@lru_cache(maxsize=4096)
+def get_matching_monitoring_controls(filterPattern):
+    """Returns the 4.x controls whose pattern the filter pattern covers, cached per pattern."""
+    return frozenset(cis_control for cis_control, terms in MONITORING_TERMS.items() if matches_pattern(filterPattern, terms))
+
+def get_alarm_index(region):
+    """Returns the metric alarms of a region keyed by (namespace, metric name) and its SNS subscriptions keyed by topic ARN.
+
+    Both are built from the paginated describe_alarms and list_subscriptions
+    calls, so resolving the alarm and subscribers of a metric filter mostly needs
+    no further API call. list_subscriptions only returns the subscriptions owned
+    by the scanned account, the topics missing from the index are looked up with
+    list_subscriptions_by_topic by the sweep. Returns None if the region could not
+    be indexed.
+    """
+    try:
+        alarms = {}
+        for page in DATA_PROVIDER.fetch_pages('cloudwatch', 'describe_alarms', region):
+            for alarm in page['MetricAlarms']:
+                # Metric math alarms have no single metric to match a filter against
+                if 'MetricName' in alarm:
+                    alarms.setdefault((alarm['Namespace'], alarm['MetricName']), []).append(alarm)
+        subscriptions = {}
+        for page in DATA_PROVIDER.fetch_pages('sns', 'list_subscriptions', region):
+            for subscription in page['Subscriptions']:
+                subscriptions.setdefault(subscription['TopicArn'], []).append(subscription)
+        return {'Alarms': alarms, 'Subscriptions': subscriptions}
+    except Exception as e:
+        print("Unable to index the alarms of region " + str(region) + " : ", str(e))
+        return None
 
-    result = False
-    NonCompliantAccounts = []
-    cis_control = "4.1"
-    description = "Ensure log metric filter unauthorized api calls"
-    Severity = 'Medium'
-    comments = "Incorrect log metric alerts for unauthorized_api_calls."
-    group = ""
-    if len(cloudtrails) > 0:
+def sweep_metric_filters(cloudtrails):
+    """Evaluates the metric filters of every trail for all the 4.x controls in a single pass.
 
-        for m, n in cloudtrails.items():
-            # print(cloudtrails.items())
-            for o in n:
+    The metric filters of each trail log group come from the trail inventory
+    and are shared by the fifteen controls, alarms and subscribers are
+    resolved from the region alarm index. Returns {'controls': control id -> {'Result',
+    'NoAlarmGroups', 'NonCompliantAccounts'}, 'unavailable': regions of the trail
+    inventory}, the controls are empty when no trails were found.
+    """
+    sweep = OrderedDict()
+    if len(cloudtrails['trails']) == 0:
+        return {'controls': sweep, 'unavailable': cloudtrails['unavailable']}
+    for cis_control in MONITORING_PATTERNS:
+        sweep[cis_control] = {'Result': False, 'NoAlarmGroups': [], 'NonCompliantAccounts': []}
+
+    trails = [(m, o) for m, n in cloudtrails['trails'].items() for o in n]
+    DATA_PROVIDER.prefetch([request for region in cloudtrails['trails'] for request in
+                            (('cloudwatch', 'describe_alarms', region, {}, True), ('sns', 'list_subscriptions', region, {}, True))])
+    alarmIndexes = dict(run_regional(get_alarm_index, list(cloudtrails['trails'])))
+
+    def get_region_index(region):
+        # Alarm actions may point to a topic of another region, its index is built on first use
+        if region not in alarmIndexes:
+            alarmIndexes[region] = get_alarm_index(region)
+        if alarmIndexes[region] is None:
+            raise LookupError("No alarm index for region " + str(region))
+        return alarmIndexes[region]
+
+    def get_topic_subscribers(topicArn):
+        # Subscriptions of other accounts are only listed by the topic owner, once per topic
+        subscriptions = get_region_index(topicArn.split(':')[3])['Subscriptions']
+        if topicArn not in subscriptions:
+            subscriptions[topicArn] = [subscription for page in DATA_PROVIDER.fetch_pages('sns', 'list_subscriptions_by_topic', topicArn.split(':')[3], TopicArn=topicArn)
+                                       for subscription in page['Subscriptions']]
+        return subscriptions[topicArn]
+
+    def describe_trail_filters(o):
+        # The metric filters were prefetched with the trail inventory
+        try:
+            if o['LogGroupName'] is not None:
+                return o['LogGroupName'], trail_setting(o, 'MetricFilters')['metricFilters']
+        except Exception as e:
+            pass
+        return None, []
+
+    for m, o in trails:
+        group, metricFilters = describe_trail_filters(o)
+        # A failing lookup ends the evaluation of the trail for that control only
+        stopped = set()
+        for p in metricFilters:
+            for cis_control in MONITORING_PATTERNS:
+                if cis_control in stopped:
+                    continue
+                state = sweep[cis_control]
                 try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        
-                        for p in filters['metricFilters']:
-                            # print(p['metricTransformations'])
-                            
-                            patterns = ["\$\.errorCode\s*=\s*\"?\*UnauthorizedOperation(\"|\)|\s)", "\$\.errorCode\s*=\s*\"?AccessDenied\*(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                
-                                # print(response)
-                                # print(response['MetricAlarms'])
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
+                    if cis_control in get_matching_monitoring_controls(str(p['filterPattern'])):
+                        metric = (p['metricTransformations'][0]['metricNamespace'], p['metricTransformations'][0]['metricName'])
+                        metricAlarms = get_region_index(m)['Alarms'].get(metric, [])
+                        if (len(metricAlarms)!=0):
+                            topicArn = metricAlarms[0]['AlarmActions'][0]
+                            subscribers = get_topic_subscribers(topicArn)
+                            if not len(subscribers) == 0:
+                                state['Result'] = True
+                            else:
+                                state['NonCompliantAccounts'].append(group)
+                        else:
+                            state['NoAlarmGroups'].append(group)
+                            state['NonCompliantAccounts'].append(group)
                 except Exception as e:
-                    pass
-            
+                    stopped.add(cis_control)
+    return {'controls': sweep, 'unavailable': cloudtrails['unavailable']}
+
+def monitoring_result(monitoring_sweep, cis_control, description, Severity, comments):
+
+    sweep = monitoring_sweep['controls']
+    if len(sweep) > 0:
+        result = sweep[cis_control]['Result']
+        NonCompliantAccounts = list(sweep[cis_control]['NonCompliantAccounts'])
+        for group in sweep[cis_control]['NoAlarmGroups']:
+            comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
     else:
         comments = "No CloudTrail Logs Found"
         result = False
+        NonCompliantAccounts = []
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
+    comments = comments + not_evaluated(monitoring_sweep['unavailable'])
+    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+
+# CIS 4.1 
+def security_4_1_unauthorized_api_calls_metric_filter(monitoring_sweep):
+
+    cis_control = "4.1"
+    description = "Ensure log metric filter unauthorized api calls"
+    Severity = 'Medium'
+    comments = "Incorrect log metric alerts for unauthorized_api_calls."
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.2 
-def security_4_2_console_signin_no_mfa_metric_filter(cloudtrails):
+def security_4_2_console_signin_no_mfa_metric_filter(monitoring_sweep):
 
-    result = False
-    NonCompliantAccounts = []
     cis_control = "4.2"
     description = "Ensure a log metric filter and alarm exist for Management Console sign-in without MFA"
     Severity = 'Medium'
     comments = "Incorrect log metric alerts for management console signin without MFA"
-    group = ""
-    if len(cloudtrails) > 0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        # print("going")
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?ConsoleLogin(\"|\)|\s)", "\$\.additionalEventData\.MFAUsed\s*\!=\s*\"?Yes"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except Exception as e:
-                    pass
-        
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.3 
-def security_4_3_root_account_usage_metric_filter(cloudtrails):
+def security_4_3_root_account_usage_metric_filter(monitoring_sweep):
 
-    result = False
-    NonCompliantAccounts = []
     cis_control = "4.3"
     description = "Ensure a log metric filter and alarm exist for root usage"
     Severity = 'Medium'
     comments = "Incorrect log metric alerts for root usage"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.userIdentity\.type\s*=\s*\"?Root", "\$\.userIdentity\.invokedBy\s*NOT\s*EXISTS", "\$\.eventType\s*\!=\s*\"?AwsServiceEvent(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-        
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # IS 4.4
-def security_4_4_iam_policy_change_metric_filter(cloudtrails):
+def security_4_4_iam_policy_change_metric_filter(monitoring_sweep):
 
-    result = False
-    NonCompliantAccounts = []
     cis_control = "4.4"
     description = "Ensure a log metric filter and alarm exist for IAM changes"
     Severity = "Medium"
     comments = "Incorrect log metric alerts for IAM policy changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?DeleteGroupPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteRolePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteUserPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutGroupPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutRolePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutUserPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreatePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeletePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreatePolicyVersion(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeletePolicyVersion(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AttachRolePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DetachRolePolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AttachUserPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DetachUserPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AttachGroupPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DetachGroupPolicy(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Description': description, 'ControlId': cis_control, 'Severity': Severity}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.5
-def security_4_5_cloudtrail_configuration_changes_metric_filter(cloudtrails):
+def security_4_5_cloudtrail_configuration_changes_metric_filter(monitoring_sweep):
 
-    result = False
-    NonCompliantAccounts = []
     cis_control = "4.5"
     description = "Ensure a log metric filter and alarm exist for CloudTrail configuration changes"
     Severity = 'Medium'
     comments = "Incorrect log metric alerts for CloudTrail configuration changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?CreateTrail(\"|\)|\s)", "\$\.eventName\s*=\s*\"?UpdateTrail(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteTrail(\"|\)|\s)", "\$\.eventName\s*=\s*\"?StartLogging(\"|\)|\s)", "\$\.eventName\s*=\s*\"?StopLogging(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.6
-def security_4_6_console_auth_failures_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_6_console_auth_failures_metric_filter(monitoring_sweep):
+
     cis_control = "4.6"
     description = "Ensure a log metric filter and alarm exist for console auth failures"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for console auth failures"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?ConsoleLogin(\"|\)|\s)", "\$\.errorMessage\s*=\s*\"?Failed authentication(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.7
-def security_4_7_disabling_or_scheduled_deletion_of_customers_cmk_metric_filter(cloudtrails):
+def security_4_7_disabling_or_scheduled_deletion_of_customers_cmk_metric_filter(monitoring_sweep):
 
-    result = False
-    NonCompliantAccounts = []
     cis_control = "4.7"
     description = "Ensure a log metric filter and alarm exist for disabling or scheduling deletion of KMS CMK"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for disabling or scheduling deletion of KMS CMK"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventSource\s*=\s*\"?kms\.amazonaws\.com(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DisableKey(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ScheduleKeyDeletion(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.8
-def security_4_8_s3_bucket_policy_changes_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_8_s3_bucket_policy_changes_metric_filter(monitoring_sweep):
+
     cis_control = "4.8"
     description = "Ensure a log metric filter and alarm exist for S3 bucket policy changes"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for S3 bucket policy changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventSource\s*=\s*\"?s3\.amazonaws\.com(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutBucketAcl(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutBucketPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutBucketCors(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutBucketLifecycle(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutBucketReplication(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteBucketPolicy(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteBucketCors(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteBucketLifecycle(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteBucketReplication(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.9
-def security_4_9_aws_config_configuration_changes_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_9_aws_config_configuration_changes_metric_filter(monitoring_sweep):
+
     cis_control = "4.9"
     description = "Ensure a log metric filter and alarm exist for for AWS Config configuration changes"
     Severity = "Medium"
     comments = "Ensure a log metric filter and alarm exist for for AWS Config configuration changes"
-    group = ""
-    if len(cloudtrails)>0:
-        
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventSource\s*=\s*\"?config\.amazonaws\.com(\"|\)|\s)", "\$\.eventName\s*=\s*\"?StopConfigurationRecorder(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteDeliveryChannel(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutDeliveryChannel(\"|\)|\s)", "\$\.eventName\s*=\s*\"?PutConfigurationRecorder(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.10
-def security_4_10_security_group_changes_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_10_security_group_changes_metric_filter(monitoring_sweep):
+
     cis_control = "4.10"
     description = "Ensure a log metric filter and alarm exist for security group changes"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for security group changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?AuthorizeSecurityGroupIngress(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AuthorizeSecurityGroupEgress(\"|\)|\s)", "\$\.eventName\s*=\s*\"?RevokeSecurityGroupIngress(\"|\)|\s)", "\$\.eventName\s*=\s*\"?RevokeSecurityGroupEgress(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreateSecurityGroup(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteSecurityGroup(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.11
-def security_4_11_nacl_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_11_nacl_metric_filter(monitoring_sweep):
+
     cis_control = "4.11"
     description = "Ensure a log metric filter and alarm exist for changes to Network Access Control Lists (NACL)"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for changes to Network Access Control Lists (NACL)"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?CreateNetworkAcl(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreateNetworkAclEntry(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteNetworkAcl(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteNetworkAclEntry(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ReplaceNetworkAclEntry(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ReplaceNetworkAclAssociation(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.12
-def security_4_12_changes_to_network_gateways_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_12_changes_to_network_gateways_metric_filter(monitoring_sweep):
+
     cis_control = "4.12"
     description = "Ensure a log metric filter and alarm exist for changes to network gateways"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for changes to network gateways"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?CreateCustomerGateway(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteCustomerGateway(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AttachInternetGateway(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreateInternetGateway(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteInternetGateway(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DetachInternetGateway(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                                
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.13
-def security_4_13_changes_to_route_tables_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_13_changes_to_route_tables_metric_filter(monitoring_sweep):
+
     cis_control = "4.13"
     description = "Ensure a log metric filter and alarm exist for route table changes"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for route table changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?CreateRoute(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreateRouteTable(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ReplaceRoute(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ReplaceRouteTableAssociation(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteRouteTable(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteRoute(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DisassociateRouteTable(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.14
-def security_4_14_changes_to_vpc_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_14_changes_to_vpc_metric_filter(monitoring_sweep):
+
     cis_control = "4.14"
     description = "Ensure a log metric filter and alarm exist for VPC changes"
     Severity = 'Medium'
     comments = "Ensure a log metric filter and alarm exist for VPC changes"
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventName\s*=\s*\"?CreateVpc(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteVpc(\"|\)|\s)", "\$\.eventName\s*=\s*\"?ModifyVpcAttribute(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AcceptVpcPeeringConnection(\"|\)|\s)", "\$\.eventName\s*=\s*\"?CreateVpcPeeringConnection(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DeleteVpcPeeringConnection(\"|\)|\s)", "\$\.eventName\s*=\s*\"?RejectVpcPeeringConnection(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AttachClassicLinkVpc(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DetachClassicLinkVpc(\"|\)|\s)", "\$\.eventName\s*=\s*\"?DisableVpcClassicLink(\"|\)|\s)", "\$\.eventName\s*=\s*\"?EnableVpcClassicLink(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 # CIS 4.15
-def security_4_15_aws_org_changes_metric_filter(cloudtrails):
-    
-    result = False
-    NonCompliantAccounts = []
+def security_4_15_aws_org_changes_metric_filter(monitoring_sweep):
+
     cis_control = "4.15"
     description = " Ensure a log metric filter and alarm exists for AWS Organizations changes."
     Severity = 'Medium'
     comments = "Monitoring AWS Organizations changes can help you prevent any unwanted, accidental or intentional modifications that may lead to unauthorized access or other security breaches."
-    group = ""
-    if len(cloudtrails)>0:
-
-        for m, n in cloudtrails.items():
-            for o in n:
-                try:
-                    if o['CloudWatchLogsLogGroupArn']:
-                        group = re.search('log-group:(.+?):', o['CloudWatchLogsLogGroupArn']).group(1)
-                        client = boto3_session.client('logs', region_name=m)
-                        filters = client.describe_metric_filters(
-                            logGroupName=group
-                        )
-                        for p in filters['metricFilters']:
-                            patterns = ["\$\.eventSource\s*=\s*\"?organizations\.amazonaws\.com(\"|\)|\s)", "\$\.eventName\s*=\s*\"?AcceptHandshake(\"|\)|\s)","\$\.eventName\s*\"=\s*\"?AttachPolicy(\"|\)|\s)","\$\.eventName\s*=\s*\"?CreateAccount(\"|\)|\s)","\$\.eventName\s*=\s*\"?CreateOrganizationalUnit(\"|\)|\s)","\$\.eventName\s*=\s*\"?CreatePolicy(\"|\)|\s)","\$\.eventName\s*=\s*\"?DeclineHandshake(\"|\)|\s)","\$\.eventName\s*=\s*\"?DeleteOrganization(\"|\)|\s)","\$\.eventName\s*=\s*\"?DeleteOrganizationalUnit(\"|\)|\s)","\$\.eventName\s*=\s*\"?DeletePolicy(\"|\)|\s)","\$\.eventName\s*=\s*\"?DetachPolicy(\"|\)|\s)","\$\.eventName\s*=\s*\"?DisablePolicyType(\"|\)|\s)","\$\.eventName\s*=\s*\"?EnablePolicyType(\"|\)|\s)","\$\.eventName\s*=\s*\"?InviteAccountToOrganization(\"|\)|\s)","\$\.eventName\s*=\s*\"?LeaveOrganization(\"|\)|\s)","\$\.eventName\s*=\s*\"?MoveAccount(\"|\)|\s)","\$\.eventName\s*=\s*\"?RemoveAccountFromOrganization(\"|\)|\s)","\$\.eventName\s*=\s*\"?UpdatePolicy(\"|\)|\s)","\$\.eventName\s*=\s*\"?UpdateOrganizationalUnit(\"|\)|\s)"]
-                            if find_pattern(patterns, str(p['filterPattern'])):
-                                cwclient = boto3_session.client('cloudwatch', region_name=m)
-                                response = cwclient.describe_alarms_for_metric(
-                                    MetricName=p['metricTransformations'][0]['metricName'],
-                                    Namespace=p['metricTransformations'][0]['metricNamespace']
-                                )
-                                if (len(response['MetricAlarms'])!=0):
-                                    snsClient = boto3_session.client('sns', region_name=m)
-                                    subscribers = snsClient.list_subscriptions_by_topic(
-                                        TopicArn=response['MetricAlarms'][0]['AlarmActions'][0]
-                                        #  Pagination not used since only 1 subscriber required
-                                    )
-                                    
-
-                                    if not len(subscribers['Subscriptions']) == 0:
-                                        result = True
-                                    else:
-                                        NonCompliantAccounts.append(group) 
-                                    
-                                else:
-                                    comments = comments + "<br> :: No Alarm Exists for:: "+str(group)
-                                    NonCompliantAccounts.append(group)
-                except:
-                    pass
-    else:
-        comments = "No CloudTrail Logs Found"
-        result = False    
-    if(len(NonCompliantAccounts)!=0):
-        comments = comments + "<B><br>NonCompliantLists</B> :: "+ str(NonCompliantAccounts)
-    return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
+    return monitoring_result(monitoring_sweep, cis_control, description, Severity, comments)
 
 
 # 5 Networking
 # CIS total automated 4 controls for Networking
 
+def other_sensitive_ports(sg_inventory):
+    """Comment listing the groups open to the world on the SENSITIVE_PORTS beyond 22 and 3389, empty if none."""
+    exposedGroups = []
+    for n, exposed in sg_inventory['exposed'].items():
+        for port, groupIds in exposed.items():
+            if port not in (22, 3389):
+                for groupId in groupIds:
+                    exposedGroups.append("<br><b>Region : </b>"+str(n) + " <b>Port : </b>" + str(port) + " <b>Groups :</b> " + str(groupId))
+    if(len(exposedGroups)==0):
+        return ""
+    return "<B><br>Security Groups open to the world on other sensitive ports</B> :: " + str(exposedGroups)
+
 # CIS 5.1
-def security_5_1_ssh_not_public(regions):
+def security_5_1_ssh_not_public(sg_inventory):
 
     result = True
     comments = "No security groups allowing Ingress found"
@@ -1971,29 +1502,18 @@ def security_5_1_ssh_not_public(regions):
     description = "Ensure no security groups allow ingress from 0.0.0.0/0 to port 22"
     Severity = 'High'
     
-    #regions = [regions]
-    for n in regions:
-        client = boto3_session.client('ec2', region_name=n)
-        response = client.describe_security_groups()
-        for m in response['SecurityGroups']:
-            if "0.0.0.0/0" in str(m['IpPermissions']):
-                for o in m['IpPermissions']:
-                    try:
-                        if int(o['FromPort']) <= 22 <= int(o['ToPort']) and '0.0.0.0/0' in str(o['IpRanges']):
-                            result = False
-                            comments = "Found Security Group with port 22 open to the world (0.0.0.0/0)"
-                            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['GroupId']))
-                    except:
-                        if str(o['IpProtocol']) == "-1" and '0.0.0.0/0' in str(o['IpRanges']):
-                            result = False
-                            comments = "Found Security Group with port 22 open to the world (0.0.0.0/0)"
-                            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['GroupId']))
+    for n, exposed in sg_inventory['exposed'].items():
+        for groupId in exposed[22]:
+            result = False
+            comments = "Found Security Group with port 22 open to the world (0.0.0.0/0 or ::/0)"
+            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(groupId))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliant Security Groups</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + other_sensitive_ports(sg_inventory) + not_evaluated(sg_inventory['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 5.2
-def security_5_2_rdp_not_public(regions):
+def security_5_2_rdp_not_public(sg_inventory):
 
     result = True
     comments = "No security groups allow ingress from 0.0.0.0/0 to port 3389"
@@ -2002,29 +1522,18 @@ def security_5_2_rdp_not_public(regions):
     description = "Ensure no security groups allow ingress from 0.0.0.0/0 to port 3389"
     Severity = 'High'
     
-    #regions = [regions]
-    for n in regions:
-        client = boto3_session.client('ec2', region_name=n)
-        response = client.describe_security_groups()
-        for m in response['SecurityGroups']:
-            if "0.0.0.0/0" in str(m['IpPermissions']):
-                for o in m['IpPermissions']:
-                    try:
-                        if int(o['FromPort']) <= 3389 <= int(o['ToPort']) and '0.0.0.0/0' in str(o['IpRanges']):
-                            result = False
-                            comments = "Found Security Group with port 3389 open to the world (0.0.0.0/0)"
-                            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['GroupId']))
-                    except:
-                        if str(o['IpProtocol']) == "-1" and '0.0.0.0/0' in str(o['IpRanges']):
-                            result = False
-                            comments = "Found Security Group with port 3389 open to the world (0.0.0.0/0)"
-                            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['GroupId']))
+    for n, exposed in sg_inventory['exposed'].items():
+        for groupId in exposed[3389]:
+            result = False
+            comments = "Found Security Group with port 3389 open to the world (0.0.0.0/0 or ::/0)"
+            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(groupId))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliant Security Groups</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + other_sensitive_ports(sg_inventory) + not_evaluated(sg_inventory['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 5.3
-def security_5_3_flow_logs_enabled_on_all_vpc(regions):
+def security_5_3_flow_logs_enabled_on_all_vpc(flow_log_coverage):
     
     result = True
     comments = "VPC flow logging is enabled in all VPCs"
@@ -2033,37 +1542,19 @@ def security_5_3_flow_logs_enabled_on_all_vpc(regions):
     description = "Ensure VPC flow logging is enabled in all VPCs"
     Severity = 'High'
     
-    #regions = [regions]
-    for n in regions:
-        client = boto3_session.client('ec2', region_name=n)
-        flowlogs = client.describe_flow_logs(
-            #  No paginator support in boto atm.
-        )
-        activeLogs = []
-        for m in flowlogs['FlowLogs']:
-            if "vpc-" in str(m['ResourceId']):
-                activeLogs.append(m['ResourceId'])
-        vpcs = client.describe_vpcs(
-            Filters=[
-                {
-                    'Name': 'state',
-                    'Values': [
-                        'available',
-                    ]
-                },
-            ]
-        )
-        for m in vpcs['Vpcs']:
-            if not str(m['VpcId']) in str(activeLogs):
+    for n, (vpcIds, coveredVpcs) in flow_log_coverage['regions'].items():
+        for vpcId in vpcIds:
+            if vpcId not in coveredVpcs:
                 result = False
                 comments = "VPC without active VPC Flow Logs found"
-                NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['VpcId']))
+                NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(vpcId))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliant VPCs</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(flow_log_coverage['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # CIS 5.4 Ensure the default security group of every VPC restricts all traffic (Scored)
-def security_5_4_default_security_groups_restricts_traffic(regions):
+def security_5_4_default_security_groups_restricts_traffic(sg_inventory):
     
     result = True
     comments = "The default security group of every VPC restricts all traffic."
@@ -2071,69 +1562,279 @@ def security_5_4_default_security_groups_restricts_traffic(regions):
     cis_control = "5.4"
     description = "Ensure the default security group of every VPC restricts all traffic"
     Severity = 'Medium'
-    #regions = [regions]
-    
-    for n in regions:
-        client = boto3_session.client('ec2', region_name=n)
-        response = client.describe_security_groups(
-            Filters=[
-                {
-                    'Name': 'group-name',
-                    'Values': [
-                        'default',
-                    ]
-                },
-            ]
-        )
-        for m in response['SecurityGroups']:
-            if not (len(m['IpPermissions']) + len(m['IpPermissionsEgress'])) == 0:
-                result = False
-                comments = "Default security groups with ingress or egress rules discovered"
-                NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(m['GroupId']))
+    for n, index in sg_inventory['indexes'].items():
+        for groupId in index.default_groups_with_rules():
+            result = False
+            comments = "Default security groups with ingress or egress rules discovered"
+            NonCompliantAccounts.append("<br><b>Region : </b>"+str(n) + " <b>Groups :</b> " + str(groupId))
     if(len(NonCompliantAccounts)!=0):
         comments = comments + "<B><br>NonCompliant Groups</B> :: "+ str(NonCompliantAccounts)
+    comments = comments + not_evaluated(sg_inventory['unavailable'])
     return {'Result': result, 'comments': comments, 'NonCompliantAccounts': NonCompliantAccounts, 'Severity': Severity, 'Description': description, 'ControlId': cis_control}
 
 # --- Main functions ---
 
+def get_recent_credential_report():
+    """Returns the get_credential_report response if a report inside the reuse window exists, otherwise None."""
+    try:
+        response = IAM_CLIENT.get_credential_report()
+    except botocore.exceptions.ClientError as e:
+        # No report yet, an expired one or one still being generated, all of them have to go through generation
+        if e.response['Error']['Code'] in ('ReportNotPresent', 'ReportExpired', 'ReportInProgress'):
+            return None
+        raise
+    age = (datetime.now(timezone.utc) - response['GeneratedTime']).total_seconds()
+    if age > CREDENTIAL_REPORT_REUSE_WINDOW:
+        return None
+    return response
+
+def generate_credential_report():
+    """Starts the report generation and polls it with exponential backoff, False if it is not ready in time."""
+    delay = CREDENTIAL_REPORT_FIRST_POLL
+    deadline = time.time() + CREDENTIAL_REPORT_TIMEOUT
+    while True:
+        try:
+            if IAM_CLIENT.generate_credential_report()['State'] == "COMPLETE":
+                return True
+        except botocore.exceptions.ClientError as e:
+            # A throttled poll is retried like a report that is still in progress
+            if e.response['Error']['Code'] != 'Throttling':
+                raise
+        if time.time() + delay > deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, CREDENTIAL_REPORT_MAX_POLL)
+
 def get_credential_report():
 
-    x = 0
-    status = ""
-    while IAM_CLIENT.generate_credential_report()['State'] != "COMPLETE":
-        time.sleep(2)
-        x += 1
+    response = get_recent_credential_report()
+    if response is None:
         # If no credentail report is delivered within this time fail the check.
-        if x > 10:
-            status = "Fail: rootUse - no CredentialReport available."
-            break
-    if "Fail" in status:
-        return status
-    response = IAM_CLIENT.get_credential_report()
-    report = []
-    reader = csv.DictReader(response['Content'].decode('utf-8').splitlines(), delimiter=',')
-    #reader = csv.DictReader(response['Content'].splitlines(), delimiter=',')
-    for row in reader:
-        report.append(row)
-
-    # Verify if root key's never been used, if so add N/A
+        if not generate_credential_report():
+            return "Fail: rootUse - no CredentialReport available."
+        response = IAM_CLIENT.get_credential_report()
+    return CredentialReport(response['Content'].decode('utf-8'))
+
+def evaluate_credential_report(credential_report):
+    """Evaluates the credential report controls 1.4, 1.7 and 1.10 to 1.14 in one pass over the report columns."""
+    findings = {'Error': None, '1.4': False, '1.7': False, '1.10': [], '1.11': [], '1.12': [], '1.13': [], '1.14': []}
+    if not isinstance(credential_report, CredentialReport):  # Report failure in cis_control
+        findings['Error'] = str(credential_report)
+        return findings
+    if len(credential_report) == 0:
+        return findings
+
+    now = float(int(time.time()))
+    day = 24 * 60 * 60
+    unused = (CONTROL_1_12_DAYS + 1) * day
+    unrotated = (CONTROL_1_14_DAYS + 1) * day
+    users = credential_report.text('user')
+    arns = credential_report.text('arn')
+    password_enabled = credential_report.flag('password_enabled')
+    mfa_active = credential_report.flag('mfa_active')
+    password_last_used = credential_report.time('password_last_used')
+    key1_active = credential_report.flag('access_key_1_active')
+    key2_active = credential_report.flag('access_key_2_active')
+    key1_rotated = credential_report.time('access_key_1_last_rotated')
+    key2_rotated = credential_report.time('access_key_2_last_rotated')
+    key1_used = credential_report.time('access_key_1_last_used_date')
+    key2_used = credential_report.time('access_key_2_last_used_date')
+    key1_used_text = credential_report.text('access_key_1_last_used_date')
+    key2_used_text = credential_report.text('access_key_2_last_used_date')
+
+    # Row 0 is the root account :: 1.4 no active key, 1.7 no password or key used in the last 24h
+    findings['1.4'] = bool(key1_active[0] or key2_active[0])
+    for last_used in (password_last_used[0], key1_used[0], key2_used[0]):
+        # NaN (never used) fails both comparisons
+        if CONTROL_1_1_DAYS * day < now - last_used < (CONTROL_1_1_DAYS + 1) * day:
+            findings['1.7'] = True
+
+    # Every check is a map over whole columns, missing timestamps are NaN so "older than" and "before" are False for them
+    unusedBefore = now - unused
+    unrotatedBefore = now - unrotated
+    # 1.10 password users without MFA, 1.11 password users with a key never used
+    findings['1.10'] = list(compress(arns, map(gt, password_enabled, mfa_active)))
+    neverUsed = map(or_, map(eq, key1_used_text, repeat("NA")), map(eq, key2_used_text, repeat("NA")))
+    findings['1.11'] = list(compress(users, map(and_, password_enabled, neverUsed)))
+    # Root keys are covered by 1.4
+    findings['1.13'] = ['user : ' + user + ', active access keys: access_key_1,access_key_2'
+                        for user in compress(users[1:], map(and_, key1_active[1:], key2_active[1:]))]
+
+    # 1.12 and 1.14 list the password and the two keys of a user together, only the flagged rows are merged
+    unusedColumns = (
+        (":password", list(map(and_, password_enabled, map(le, password_last_used, repeat(unusedBefore))))),
+        (":key1", list(map(and_, key1_active, map(le, key1_used, repeat(unusedBefore))))),
+        (":key2", list(map(and_, key2_active, map(le, key2_used, repeat(unusedBefore))))),
+    )
+    rotationColumns = (
+        (":unrotated key1", list(map(and_, key1_active, map(le, key1_rotated, repeat(unrotatedBefore))))),
+        (":unused key1", list(map(and_, key1_active, map(lt, key1_used, key1_rotated)))),
+        (":unrotated key2", list(map(and_, key2_active, map(le, key2_rotated, repeat(unrotatedBefore))))),
+        (":unused key2", list(map(and_, key2_active, map(lt, key2_used, key2_rotated)))),
+    )
+    for cis_control, columns in (('1.12', unusedColumns), ('1.14', rotationColumns)):
+        flagged = [flags for suffix, flags in columns]
+        rows = compress(range(len(credential_report)), map(any, zip(*flagged)))
+        findings[cis_control] = [arns[i] + suffix for i in rows for suffix, flags in columns if flags[i]]
+    return findings
+
+def get_s3_buckets():
+
     try:
-        if report[0]['access_key_1_last_used_date']:
-            pass
-    except:
-        report[0]['access_key_1_last_used_date'] = "N/A"
+        # ListBuckets only paginates, and only returns BucketRegion, when MaxBuckets is sent
+        pages = DATA_PROVIDER.fetch_pages('s3', 'list_buckets', PaginationConfig={'PageSize': 1000})
+    except botocore.exceptions.OperationNotPageableError:
+        # botocore releases without ListBuckets pagination return every bucket in a single response
+        pages = [DATA_PROVIDER.fetch('s3', 'list_buckets')]
+    buckets = []
+    for page in pages:
+        buckets.extend(page['Buckets'])
+    return buckets
+
+def get_account_public_access_block(account_number):
+    """Returns the account level S3 Block Public Access configuration, None when it is not set or cannot be read."""
     try:
-        if report[0]['access_key_2_last_used_date']:
-            pass
-    except:
-        report[0]['access_key_2_last_used_date'] = "N/A"
-    return report
-
-def get_account_password_policy(boto3_session):
+        return DATA_PROVIDER.fetch('s3control', 'get_public_access_block', AccountId=account_number)['PublicAccessBlockConfiguration']
+    except botocore.exceptions.ClientError as e:
+        if 'NoSuchPublicAccessBlockConfiguration' not in str(e):
+            print("Unable to read the account level Block Public Access : " + str(e))
+        return None
+
+def get_bucket_region(name):
+    """Returns the home region of a bucket, None when it cannot be resolved (eg. a bucket of another account)."""
+    try:
+        location = DATA_PROVIDER.fetch('s3', 'get_bucket_location', Bucket=name)['LocationConstraint']
+    except botocore.exceptions.ClientError as e:
+        print("Unable to resolve the region of bucket " + str(name) + " : " + str(e))
+        return None
+    # Buckets of us-east-1 have no location constraint, EU is the legacy name of eu-west-1
+    if not location:
+        return 'us-east-1'
+    if location == 'EU':
+        return 'eu-west-1'
+    return location
+
+def collect_s3_bucket(name, region=None):
+    """Fetches every bucket level setting read by the S3 controls, a failed call keeps its error in place of the response.
+
+    The calls go to the client of the bucket region so S3 does not have to redirect them.
+    """
+    record = {'Name': name, 'Region': region or get_bucket_region(name)}
+    for key in S3_BUCKET_OPERATIONS:
+        if key not in S3_LAZY_SETTINGS:
+            fetch_bucket_setting(record, key)
+    return record
+
+def fetch_bucket_setting(record, key):
+    # Adds a setting to a bucket record unless the record already has it
+    if key not in record:
+        try:
+            record[key] = DATA_PROVIDER.fetch('s3', S3_BUCKET_OPERATIONS[key], record['Region'], Bucket=record['Name'])
+        except Exception as e:
+            record[key] = e
+    return record
+
+def bucket_requests(records, keys):
+    # DataProvider requests of the bucket settings the records do not have yet
+    return [('s3', S3_BUCKET_OPERATIONS[key], record['Region'], {'Bucket': record['Name']}, False)
+            for record in records for key in keys if key not in record]
+
+def collect_s3_buckets():
+    """Returns the record of every bucket of the account by name, collected by concurrent workers."""
+    buckets = get_s3_buckets()
+    names = [bucket['Name'] for bucket in buckets]
+    # Paginated ListBuckets responses carry the region of each bucket, saving its GetBucketLocation call
+    DATA_PROVIDER.prefetch(bucket_requests([{'Name': bucket['Name'], 'Region': bucket['BucketRegion']} for bucket in buckets if bucket.get('BucketRegion')],
+                                           [key for key in S3_BUCKET_OPERATIONS if key not in S3_LAZY_SETTINGS]))
+    records = fan_out(lambda bucket: collect_s3_bucket(bucket['Name'], bucket.get('BucketRegion')), buckets, MAX_BUCKET_WORKERS)
+    return OrderedDict(zip(names, records))
+
+def get_bucket_record(s3_buckets, name):
+    # Trail buckets may belong to another account and be missing from the collected buckets
+    if name in s3_buckets:
+        return s3_buckets[name]
+    return collect_s3_bucket(name)
+
+def bucket_setting(record, key):
+    """Returns a setting of a bucket record, or raises the error of its call as the call itself did."""
+    value = fetch_bucket_setting(record, key)[key]
+    if isinstance(value, Exception):
+        raise value
+    return value
+
+def get_security_group_inventory(regions):
+    """Indexes the security groups of every region and the groups open to the world on the sensitive ports."""
+
+    def index_region_security_groups(n):
+        # Only the groups with a rule open to the world and the default groups are requested
+        groups = OrderedDict()
+        for filters in SECURITY_GROUP_FILTERS:
+            for page in DATA_PROVIDER.fetch_pages('ec2', 'describe_security_groups', n, Filters=filters):
+                for group in page['SecurityGroups']:
+                    groups.setdefault(group['GroupId'], group)
+        return SecurityGroupIndex(list(groups.values()))
+
+    def region_security_group_requests(n):
+        return [('ec2', 'describe_security_groups', n, {'Filters': filters}, True) for filters in SECURITY_GROUP_FILTERS]
+
+    evaluated, unavailable = run_planned_regions(index_region_security_groups, 'ec2', regions, region_security_group_requests)
+    inventory = {'indexes': OrderedDict(evaluated), 'exposed': OrderedDict(), 'unavailable': unavailable}
+    for n, index in evaluated:
+        # 22 and 3389 fail 5.1 and 5.2, the other sensitive ports are listed in their comments
+        inventory['exposed'][n] = index.exposed_groups(SENSITIVE_PORTS)
+    return inventory
+
+def get_flow_log_coverage(regions):
+    """Returns per region the available VPC ids and the set of VPC ids with an active flow log."""
+
+    def describe_region_flow_logs(n):
+        coveredVpcs = set()
+        for page in DATA_PROVIDER.fetch_pages('ec2', 'describe_flow_logs', n):
+            for m in page['FlowLogs']:
+                if str(m['ResourceId']).startswith("vpc-") and m.get('FlowLogStatus', 'ACTIVE') == 'ACTIVE':
+                    coveredVpcs.add(m['ResourceId'])
+        vpcIds = []
+        for page in DATA_PROVIDER.fetch_pages('ec2', 'describe_vpcs', n, Filters=[{'Name': 'state', 'Values': ['available']}]):
+            vpcIds.extend(m['VpcId'] for m in page['Vpcs'])
+        return vpcIds, coveredVpcs
+
+    def region_flow_log_requests(n):
+        return [('ec2', 'describe_flow_logs', n, {}, True),
+                ('ec2', 'describe_vpcs', n, {'Filters': [{'Name': 'state', 'Values': ['available']}]}, True)]
+
+    evaluated, unavailable = run_planned_regions(describe_region_flow_logs, 'ec2', regions, region_flow_log_requests)
+    return {'regions': OrderedDict(evaluated), 'unavailable': unavailable}
+
+def get_iam_authorization_snapshot():
+    """Returns the users, groups, roles and customer managed policies of the account.
+
+    A single paginated get_account_authorization_details sweep replaces the
+    per user and per policy calls of controls 1.15, 1.16 and 1.17.
+    """
+    snapshot = {'UserDetailList': [], 'GroupDetailList': [], 'RoleDetailList': [], 'Policies': []}
+    pages = DATA_PROVIDER.fetch_pages('iam', 'get_account_authorization_details',
+        Filter=['User', 'Group', 'Role', 'LocalManagedPolicy']
+    )
+    for page in pages:
+        for key in snapshot:
+            snapshot[key].extend(page.get(key, []))
+    return snapshot
+
+def get_default_policy_document(policy):
+    """Returns the document of the default version of a policy from the authorization details."""
+    for version in policy['PolicyVersionList']:
+        if version['IsDefaultVersion']:
+            document = version['Document']
+            # botocore decodes policy documents, fall back to decoding the raw URL encoded JSON
+            if isinstance(document, str):
+                document = json.loads(unquote(document))
+            return document
+    raise KeyError("No default version for policy " + str(policy['Arn']))
+
+def get_account_password_policy():
     
-    IAM_CLIENT = boto3_session.client('iam')
     try:
-        response = IAM_CLIENT.get_account_password_policy()
+        response = get_client('iam').get_account_password_policy()
         return response['PasswordPolicy']
     except Exception as e:
         if "cannot be found" in str(e):
@@ -2141,58 +1842,75 @@ def get_account_password_policy(boto3_session):
 
 def get_aws_regions():
     
-    client = EC2_CLIENT
-    regions=[]
-    region_response = client.describe_regions()
-    # region_response = {
-    #     'Regions' : [
-    #         {'RegionName': 'ap-south-1'
-    #         }
-    #     ]
-    #     }
-    for region in region_response['Regions']:
-        #s = region['RegionName']
-        # bad_chars = ['[', ']' ]
-        # for i in bad_chars :
-        #     s = s.replace(i, '')
-        regions.append(region['RegionName'])
-        
-    return regions
+    # Enabled regions of the account, narrowed by the allow / deny lists of the scan event
+    return REGION_PLANNER.regions(EC2_CLIENT)
 
 #------ Change the regions field--------- #
 
 def get_aws_cloudTrails(regions):
-
+    """Returns the trails logging the scanned regions, as {'trails': home region -> trail records, 'unavailable': regions}.
+
+    list_trails names every trail of the account once, organization trails
+    included, along with its home region, so the shadow copies of multi-region
+    trails never show up. The trails are described in their home region, scanned
+    or not, since a multi-region trail homed elsewhere still logs the scanned
+    regions, single region trails of the other regions are left out. Then
+    the status, event selectors and log group metric filters of all of them
+    are fetched concurrently into their records, see trail_setting().
+    """
     trails = dict()
-    for n in regions:
-        client = boto3_session.client('cloudtrail', region_name=n)
-        response = client.describe_trails()
-        temp = []
-        for m in response['trailList']:
-            if m['IsMultiRegionTrail'] is True:
-                if m['HomeRegion'] == n:
-                    temp.append(m)
-            else:
-                temp.append(m)
-        if len(temp) > 0:
-            trails[n] = temp
-    return trails
-    
 
-def find_pattern(pattern, target):
-    """Summary
-    Returns:
-        TYPE: Description
-    """
-    result = True
-    for n in pattern:
-        if not re.search(n, target):
-            result = False
-            break
-    return result
+    homeTrails = OrderedDict()
+    for page in DATA_PROVIDER.fetch_pages('cloudtrail', 'list_trails'):
+        for m in page['Trails']:
+            homeTrails.setdefault(m['HomeRegion'], []).append(m['TrailARN'])
+
+    def describe_region_trails(n):
+        return DATA_PROVIDER.fetch('cloudtrail', 'describe_trails', n, trailNameList=homeTrails[n])
+
+    def region_trail_requests(n):
+        return [('cloudtrail', 'describe_trails', n, {'trailNameList': homeTrails[n]}, False)]
+
+    homeRegions = [n for n in regions if n in homeTrails] + [n for n in homeTrails if n not in regions]
+    evaluated, unavailable = run_planned_regions(describe_region_trails, 'cloudtrail', homeRegions, region_trail_requests)
+    for n, response in evaluated:
+        records = [dict(m) for m in response['trailList'] if n in regions or m.get('IsMultiRegionTrail')]
+        if len(records) > 0:
+            trails[n] = records
+
+    calls = []
+    for n, records in trails.items():
+        for record in records:
+            calls.append((n, record, 'Status', 'cloudtrail', 'get_trail_status', {'Name': record['TrailARN']}))
+            calls.append((n, record, 'EventSelectors', 'cloudtrail', 'get_event_selectors', {'TrailName': record['TrailARN']}))
+            record['LogGroupName'] = None
+            if record.get('CloudWatchLogsLogGroupArn'):
+                group = re.search('log-group:(.+?):', record['CloudWatchLogsLogGroupArn'])
+                if group is not None:
+                    record['LogGroupName'] = group.group(1)
+                    calls.append((n, record, 'MetricFilters', 'logs', 'describe_metric_filters', {'logGroupName': record['LogGroupName']}))
+    DATA_PROVIDER.prefetch([(service, operation, n, params, False) for n, record, key, service, operation, params in calls])
+    fan_out(prefetch_trail_setting, calls)
+    return {'trails': trails, 'unavailable': unavailable}
+
+def prefetch_trail_setting(call):
+    # Stores a response in a trail record, a failed call is stored in place of its response
+    n, record, key, service, operation, params = call
+    try:
+        record[key] = DATA_PROVIDER.fetch(service, operation, n, **params)
+    except Exception as e:
+        record[key] = e
+
+def trail_setting(record, key):
+    """Returns a prefetched response of a trail record, or raises the error of its call as the call itself did."""
+    value = record[key]
+    if isinstance(value, Exception):
+        raise value
+    return value
+    
 
-def get_aws_account_number(boto3_session):
-    client = boto3_session.client("sts")
+def get_aws_account_number():
+    client = get_client("sts")
     account_number = client.get_caller_identity()["Account"]
     return account_number
 
@@ -2630,7 +2348,7 @@ def gen_html(controlResult, account, FailPolicyCount, PassPolicyCount, TotalPoli
                                             <span class="report-info-head">AWS Account</span>
                                             <div class="hi-sub-sec dns-sec">
                                                 <span class="report-sub-head">Number</span>
-                                                <span class="report-sub-text">"""+get_aws_account_number(boto3_session)+"""</span>
+                                                <span class="report-sub-text">"""+get_aws_account_number()+"""</span>
                                             </div>
                                         </div>
                                 </div>
@@ -2864,9 +2582,109 @@ def get_Severity_Count(controlResult,severity):
                     Count += 1
     return Count
 
+# --- Scan plan ---
+
+def load_credential_report():
+    # Returns the report, or the reason it is missing for the controls to report, the scan goes on either way
+    try:
+        return get_credential_report()
+    except Exception as e:
+        print("Unable to load the credential report : " + str(e))
+        return "Fail: no CredentialReport available - " + str(e)
+
+# Shared inputs of the controls :: name -> (function, names of the inputs it needs)
+# The credential report comes first so its generation is started as soon as the scan starts,
+# only the controls reading it wait for it
+SCAN_INPUTS = OrderedDict([
+    ('credential_report', (load_credential_report, ())),
+    ('credential_findings', (evaluate_credential_report, ('credential_report',))),
+    ('region_list', (get_aws_regions, ())),
+    ('passwdPolicy', (get_account_password_policy, ())),
+    ('iam_snapshot', (get_iam_authorization_snapshot, ())),
+    ('s3_buckets', (collect_s3_buckets, ())),
+    ('cloudtrails', (get_aws_cloudTrails, ('region_list',))),
+    ('sg_inventory', (get_security_group_inventory, ('region_list',))),
+    ('flow_log_coverage', (get_flow_log_coverage, ('region_list',))),
+    ('monitoring_sweep', (sweep_metric_filters, ('cloudtrails',))),
+    ('account_number', (get_aws_account_number, ())),
+])
+
+# Controls of each category in report order :: control id -> (function, names of the inputs it needs)
+IAM_CONTROLS = OrderedDict([
+    ('1.4', (security_1_4_root_access_key_exists, ('credential_findings',))),
+    ('1.5', (security_1_5_mfa_root_enabled, ())),
+    ('1.6', (security_1_6_hardware_mfa_root_enabled, ())),
+    ('1.7', (security_1_7_avoid_root_for_admin_tasks, ('credential_findings',))),
+    ('1.8', (security_1_8_minimum_password_policy_length, ('passwdPolicy',))),
+    ('1.9', (security_1_9_password_policy_reuse, ('passwdPolicy',))),
+    ('1.10', (security_1_10_enable_mfa_on_iam_console_password, ('credential_findings',))),
+    ('1.11', (security_1_11_no_iam_access_key_passwd_setup, ('credential_findings',))),
+    ('1.12', (security_1_12_credentials_unused, ('credential_findings',))),
+    ('1.13', (security_1_13_no_2_active_access_keys_iam_user, ('credential_findings',))),
+    ('1.14', (security_1_14_access_keys_rotated, ('credential_findings',))),
+    ('1.15', (security_1_15_only_group_policies_on_iam_users, ('iam_snapshot',))),
+    ('1.16', (security_1_16_no_admin_priv_policies, ('iam_snapshot',))),
+    ('1.17', (security_1_17_ensure_support_roles, ('iam_snapshot',))),
+    ('1.19', (security_1_19_expired_SSL_TLS_certificates, ())),
+    ('1.20', (security_1_20_Bucket_PublicAccess_check, ('s3_buckets', 'account_number'))),
+    ('1.21', (security_1_21_Access_Analyzer, ())),
+])
+
+STORAGE_CONTROLS = OrderedDict([
+    ('2.1.1', (security_2_1_1_s3_EncryptionCheck, ('s3_buckets',))),
+    ('2.1.2', (security_2_1_1_SslPolicyCheck, ('s3_buckets',))),
+    ('2.2.1', (security_2_2_EBSVolumeEncryptCheck, ('region_list',))),
+])
+
+LOGGING_CONTROLS = OrderedDict([
+    ('3.1', (security_3_1_cloud_trail_all_regions, ('cloudtrails',))),
+    ('3.2', (security_3_2_cloudtrail_validation, ('cloudtrails',))),
+    ('3.3', (security_3_3_cloudtrail_public_bucket, ('cloudtrails', 's3_buckets'))),
+    ('3.4', (security_3_4_integrate_cloudtrail_cloudwatch_logs, ('cloudtrails',))),
+    ('3.5', (security_3_5_ensure_config_all_regions, ('region_list',))),
+    ('3.6', (security_3_6_cloudtrail_bucket_access_log, ('cloudtrails', 's3_buckets'))),
+    ('3.7', (security_3_7_cloudtrail_log_kms_encryption, ('cloudtrails',))),
+    ('3.8', (security_3_8_kms_cmk_rotation, ('region_list',))),
+    ('3.9', (security_3_9_vpc_flow_logs_enabled, ('flow_log_coverage',))),
+    ('3.10', (security_3_10_write_events_cloudtrail, ('cloudtrails',))),
+    ('3.11', (security_3_11_read_events_cloudtrail, ('cloudtrails',))),
+])
+
+MONITORING_CONTROLS = OrderedDict([
+    ('4.1', (security_4_1_unauthorized_api_calls_metric_filter, ('monitoring_sweep',))),
+    ('4.2', (security_4_2_console_signin_no_mfa_metric_filter, ('monitoring_sweep',))),
+    ('4.3', (security_4_3_root_account_usage_metric_filter, ('monitoring_sweep',))),
+    ('4.4', (security_4_4_iam_policy_change_metric_filter, ('monitoring_sweep',))),
+    ('4.5', (security_4_5_cloudtrail_configuration_changes_metric_filter, ('monitoring_sweep',))),
+    ('4.6', (security_4_6_console_auth_failures_metric_filter, ('monitoring_sweep',))),
+    ('4.7', (security_4_7_disabling_or_scheduled_deletion_of_customers_cmk_metric_filter, ('monitoring_sweep',))),
+    ('4.8', (security_4_8_s3_bucket_policy_changes_metric_filter, ('monitoring_sweep',))),
+    ('4.9', (security_4_9_aws_config_configuration_changes_metric_filter, ('monitoring_sweep',))),
+    ('4.10', (security_4_10_security_group_changes_metric_filter, ('monitoring_sweep',))),
+    ('4.11', (security_4_11_nacl_metric_filter, ('monitoring_sweep',))),
+    ('4.12', (security_4_12_changes_to_network_gateways_metric_filter, ('monitoring_sweep',))),
+    ('4.13', (security_4_13_changes_to_route_tables_metric_filter, ('monitoring_sweep',))),
+    ('4.14', (security_4_14_changes_to_vpc_metric_filter, ('monitoring_sweep',))),
+    ('4.15', (security_4_15_aws_org_changes_metric_filter, ('monitoring_sweep',))),
+])
+
+NETWORKING_CONTROLS = OrderedDict([
+    ('5.1', (security_5_1_ssh_not_public, ('sg_inventory',))),
+    ('5.2', (security_5_2_rdp_not_public, ('sg_inventory',))),
+    ('5.3', (security_5_3_flow_logs_enabled_on_all_vpc, ('flow_log_coverage',))),
+    ('5.4', (security_5_4_default_security_groups_restricts_traffic, ('sg_inventory',))),
+])
+
+def get_scan_plan():
+    """Returns the dependency graph of the scan, shared inputs first so they are submitted before the controls."""
+    plan = OrderedDict(SCAN_INPUTS)
+    for controls in (IAM_CONTROLS, STORAGE_CONTROLS, LOGGING_CONTROLS, MONITORING_CONTROLS, NETWORKING_CONTROLS):
+        plan.update(controls)
+    return plan
+
 def AWS_CIS(event,context):
 
-    global boto3_session,IAM_CLIENT,S3_CLIENT,EC2_CLIENT,RDS_CLIENT
+    global boto3_session,IAM_CLIENT,S3_CLIENT,EC2_CLIENT,RDS_CLIENT,SCAN_ENGINE,DATA_PROVIDER,CLIENT_CACHE,RETRY_POLICY,CONCURRENCY,REGION_PLANNER,CIRCUIT_BREAKER
 
     requestId = event['requestId']
     # cognitoId = event['cognitoId']
@@ -2874,105 +2692,67 @@ def AWS_CIS(event,context):
     access_input = event['access_input']
     email= event['email']
     boto3_session = session.get_boto3_session(requestId,access_type,access_input)
-
-    session_client = boto3_session.client('sts')
-    print(session_client.get_caller_identity())
-
-    IAM_CLIENT = boto3_session.client('iam')
-    S3_CLIENT = boto3_session.client('s3')
-    EC2_CLIENT = boto3_session.client('ec2')
-    RDS_CLIENT = boto3_session.client('rds')
-
-    # Globally used resources
-    region_list = get_aws_regions()
+    # USE_RATE_LIMITER puts token buckets per service and region in front of every AWS call of the scan
+    rate_limiter = None
+    if rate_limiter_enabled():
+        rate_limiter = RateLimiter(parse_rate_limits(os.environ.get('RATE_LIMITS', '')))
+    RETRY_POLICY = RetryPolicy()
+    CONCURRENCY = AdaptiveConcurrency() if ADAPTIVE_CONCURRENCY else None
+    CIRCUIT_BREAKER = CircuitBreaker()
+    CLIENT_CACHE = ClientCache(boto3_session, rate_limiter=rate_limiter, retry_policy=RETRY_POLICY, concurrency=CONCURRENCY, circuit_breaker=CIRCUIT_BREAKER)
+
+    session_client = get_client('sts')
+    identity = session_client.get_caller_identity()
+    print(identity)
+    # "regions" / "exclude_regions" in the scan event restrict the regions scanned
+    REGION_PLANNER = RegionPlanner(boto3_session, identity['Account'], event.get('regions'), event.get('exclude_regions'))
+
+    # The blocking boto3 engine is the default, "engine": "async" runs the same controls on an asyncio loop
+    if str(event.get('engine', 'sync')).lower() == 'async':
+        SCAN_ENGINE = AsyncScanEngine(boto3_session, rate_limiter=rate_limiter, retry_policy=RETRY_POLICY, concurrency=CONCURRENCY, circuit_breaker=CIRCUIT_BREAKER, redirects=CLIENT_CACHE.redirects)
+
+    IAM_CLIENT = get_client('iam')
+    S3_CLIENT = get_client('s3')
+    EC2_CLIENT = get_client('ec2')
+    RDS_CLIENT = get_client('rds')
+    # With the async engine the inventories fetch their regional and per-resource requests as coroutines on its loop
+    DATA_PROVIDER = DataProvider(get_client, gather=SCAN_ENGINE.fetch_all if SCAN_ENGINE is not None else None)
+
+    # Shared inputs and controls are run as a dependency graph, each control starts as soon as its inputs are ready
     try:
-        credential_report = get_credential_report()
-    except Exception as e:
-        if 'Throttling' in str(e):
-            print("Run The Script once again")
-            exit(0)
-        print(str(e))
-
-    passwdPolicy = get_account_password_policy(boto3_session)
-    cloudtrails = get_aws_cloudTrails(region_list)
-    account_number = get_aws_account_number(boto3_session)
-
-    iam_security=[]
-
-    iam_security.append(security_1_4_root_access_key_exists(credential_report))
-    iam_security.append(security_1_5_mfa_root_enabled())
-    iam_security.append(security_1_6_hardware_mfa_root_enabled())
-    iam_security.append(security_1_7_avoid_root_for_admin_tasks(credential_report))
-    iam_security.append(security_1_8_minimum_password_policy_length(passwdPolicy))
-    iam_security.append(security_1_9_password_policy_reuse(passwdPolicy))
-    iam_security.append(security_1_10_enable_mfa_on_iam_console_password(credential_report))
-    iam_security.append(security_1_11_no_iam_access_key_passwd_setup(credential_report))
-    iam_security.append(security_1_12_credentials_unused(credential_report))
-    iam_security.append(security_1_13_no_2_active_access_keys_iam_user())
-    iam_security.append(security_1_14_access_keys_rotated(credential_report))
-    iam_security.append(security_1_15_only_group_policies_on_iam_users())
-    iam_security.append(security_1_16_no_admin_priv_policies())
-    iam_security.append(security_1_17_ensure_support_roles())
-    iam_security.append(security_1_19_expired_SSL_TLS_certificates())
-    iam_security.append(security_1_20_Bucket_PublicAccess_check())
-    iam_security.append(security_1_21_Access_Analyzer())
-
+        results = run_plan(get_scan_plan())
+    finally:
+        if SCAN_ENGINE is not None:
+            SCAN_ENGINE.close()
+            SCAN_ENGINE = None
+    account_number = results['account_number']
+
+    iam_security = [results[name] for name in IAM_CONTROLS]
     print("IAM Done")
 
-    storage = []
-    
-    storage.append(security_2_1_1_s3_EncryptionCheck())
-    storage.append(security_2_1_1_SslPolicyCheck()) 
-    storage.append(security_2_2_EBSVolumeEncryptCheck(region_list))
-
+    storage = [results[name] for name in STORAGE_CONTROLS]
     print("Storage Done")
 
-    logging= []
-
-    logging.append(security_3_1_cloud_trail_all_regions(cloudtrails))
-    logging.append(security_3_2_cloudtrail_validation(cloudtrails))
-    logging.append(security_3_3_cloudtrail_public_bucket(cloudtrails))
-    logging.append(security_3_4_integrate_cloudtrail_cloudwatch_logs(cloudtrails))
-    logging.append(security_3_5_ensure_config_all_regions(region_list))
-    logging.append(security_3_6_cloudtrail_bucket_access_log(cloudtrails))
-    logging.append(security_3_7_cloudtrail_log_kms_encryption(cloudtrails))
-    logging.append(security_3_8_kms_cmk_rotation(region_list))
-    logging.append(security_3_9_vpc_flow_logs_enabled(region_list))
-    logging.append(security_3_10_write_events_cloudtrail(cloudtrails))
-    logging.append(security_3_11_read_events_cloudtrail(cloudtrails))
-
+    logging = [results[name] for name in LOGGING_CONTROLS]
     print("Logging Done")
 
-    
-    monitoring = []
-
-    monitoring.append(security_4_1_unauthorized_api_calls_metric_filter(cloudtrails))
-    monitoring.append(security_4_2_console_signin_no_mfa_metric_filter(cloudtrails))
-    monitoring.append(security_4_3_root_account_usage_metric_filter(cloudtrails))
-    monitoring.append(security_4_4_iam_policy_change_metric_filter(cloudtrails))
-    monitoring.append(security_4_5_cloudtrail_configuration_changes_metric_filter(cloudtrails))
-    monitoring.append(security_4_6_console_auth_failures_metric_filter(cloudtrails))
-    monitoring.append(security_4_7_disabling_or_scheduled_deletion_of_customers_cmk_metric_filter(cloudtrails))
-    monitoring.append(security_4_8_s3_bucket_policy_changes_metric_filter(cloudtrails))
-    monitoring.append(security_4_9_aws_config_configuration_changes_metric_filter(cloudtrails))
-    monitoring.append(security_4_10_security_group_changes_metric_filter(cloudtrails))
-    monitoring.append(security_4_11_nacl_metric_filter(cloudtrails))
-    monitoring.append(security_4_12_changes_to_network_gateways_metric_filter(cloudtrails))
-    monitoring.append(security_4_13_changes_to_route_tables_metric_filter(cloudtrails))
-    monitoring.append(security_4_14_changes_to_vpc_metric_filter(cloudtrails))
-    monitoring.append(security_4_15_aws_org_changes_metric_filter(cloudtrails))
-
+    monitoring = [results[name] for name in MONITORING_CONTROLS]
     print("Monitoring Done")
 
-    
-    networking = []
-    networking.append(security_5_1_ssh_not_public(region_list))
-    networking.append(security_5_2_rdp_not_public(region_list))
-    networking.append(security_5_3_flow_logs_enabled_on_all_vpc(region_list))
-    networking.append(security_5_4_default_security_groups_restricts_traffic(region_list))
-
+    networking = [results[name] for name in NETWORKING_CONTROLS]
     print("Networking Done")
 
+    providerStats = DATA_PROVIDER.stats()
+    print("Data provider :: hits: " + str(providerStats['hits']) + ", misses: " + str(providerStats['misses']))
+    print("S3 redirects :: " + str(CLIENT_CACHE.redirects.count))
+    policyStats = policy_cache_stats()
+    print("Policy verdicts :: hits: " + str(policyStats['hits']) + ", misses: " + str(policyStats['misses']) + ", cached documents: " + str(policyStats['documents']))
+    retryStats = RETRY_POLICY.stats()
+    print("Retries :: per task: " + str(retryStats['retries']) + ", errors: " + str(retryStats['errors']) + ", given up: " + str(retryStats['exhausted']) + ", budget left: " + str(retryStats['budget']))
+    if CONCURRENCY is not None:
+        for key, limitStats in sorted(CONCURRENCY.stats().items()):
+            print("Concurrency :: " + key + " limit: " + str(limitStats['limit']) + ", calls: " + str(limitStats['calls']) + ", throttle rate: " + str(limitStats['throttle_rate']))
+
     
     # Join results
     cis_control = []
@@ -0,0 +1,78 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Upper bound on the number of controls / shared inputs evaluated at once.
+MAX_CONTROL_WORKERS = int(os.environ.get('MAX_CONTROL_WORKERS', 4))
+
+# Name of the task being run, visible to the AWS calls the task makes (eg. to attribute retries)
+CURRENT_TASK = contextvars.ContextVar('current_task', default=None)
+
+def current_task():
+    return CURRENT_TASK.get()
+
+def run_task(name, func, args):
+    CURRENT_TASK.set(name)
+    return func(*args)
+
+def check_plan(tasks):
+    """Raises ValueError if a task depends on an unknown task or if the dependencies form a cycle."""
+    for name, (func, deps) in tasks.items():
+        for dep in deps:
+            if dep not in tasks:
+                raise ValueError("Task " + str(name) + " depends on unknown task " + str(dep))
+    visiting = set()
+    done = set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError("Dependency cycle detected at task " + str(name))
+        visiting.add(name)
+        for dep in tasks[name][1]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in tasks:
+        visit(name)
+
+def run_plan(tasks, max_workers=None):
+    """Runs a dependency graph of tasks and returns a dict of task name -> result.
+
+    tasks maps a task name to a (func, deps) tuple. func is called with the
+    results of its deps as positional arguments, in the order they are
+    declared, as soon as all of them are available. Independent tasks run
+    concurrently on a bounded thread pool. The first exception raised by a
+    task stops the scheduling of new tasks and is re-raised once the running
+    tasks have finished.
+    """
+    check_plan(tasks)
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_CONTROL_WORKERS) as pool:
+        while pending or running:
+            if error is None:
+                # Submit in declaration order so the plan order doubles as a priority
+                for name in list(pending):
+                    func, deps = pending[name]
+                    if all(dep in results for dep in deps):
+                        args = [results[dep] for dep in deps]
+                        running[pool.submit(contextvars.Context().run, run_task, name, func, args)] = name
+                        del pending[name]
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException as e:
+                    if error is None:
+                        error = e
+    if error is not None:
+        raise error
+    return results
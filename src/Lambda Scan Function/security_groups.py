@@ -0,0 +1,55 @@
+from bisect import bisect_left, bisect_right
+
+# IpProtocol values whose FromPort / ToPort are port numbers, "-1" stands for every protocol and port
+PORT_PROTOCOLS = frozenset(['tcp', 'udp', '6', '17'])
+
+def world_open(permission):
+    """True if an ingress permission is open to any IPv4 or IPv6 address."""
+    for ipRange in permission.get('IpRanges', []):
+        if ipRange.get('CidrIp') == '0.0.0.0/0':
+            return True
+    for ipRange in permission.get('Ipv6Ranges', []):
+        if ipRange.get('CidrIpv6') == '::/0':
+            return True
+    return False
+
+def port_interval(permission):
+    """Returns the (from, to) ports of an ingress permission, None for protocols without ports such as ICMP."""
+    protocol = str(permission.get('IpProtocol'))
+    if protocol == '-1':
+        return (0, 65535)
+    if protocol in PORT_PROTOCOLS:
+        return (int(permission.get('FromPort', 0)), int(permission.get('ToPort', 65535)))
+    return None
+
+class SecurityGroupIndex(object):
+    """Security groups of one region with their world open ingress rules compiled to port intervals.
+
+    The rules are read once when the index is built, any set of ports is then
+    answered in a single pass over the open rules.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.open_rules = []
+        for group in groups:
+            for permission in group.get('IpPermissions', []):
+                interval = port_interval(permission)
+                if interval is not None and world_open(permission):
+                    self.open_rules.append((interval[0], interval[1], group['GroupId']))
+
+    def exposed_groups(self, ports):
+        """Returns port -> ids of the groups open to the world on that port, in group order."""
+        ports = sorted(set(ports))
+        exposed = dict((port, []) for port in ports)
+        for low, high, groupId in self.open_rules:
+            for port in ports[bisect_left(ports, low):bisect_right(ports, high)]:
+                # The rules of a group are consecutive, a group is listed once per port
+                if len(exposed[port]) == 0 or exposed[port][-1] != groupId:
+                    exposed[port].append(groupId)
+        return exposed
+
+    def default_groups_with_rules(self):
+        """Returns the ids of the default groups that have any ingress or egress rule."""
+        return [group['GroupId'] for group in self.groups
+                if group['GroupName'] == 'default' and len(group['IpPermissions']) + len(group['IpPermissionsEgress']) != 0]
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# The Lambda modules are flat files in a directory with spaces, they import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "Lambda Scan Function"))
+
+import pytest
+
+ACCOUNT = '123456789012'
+
+
+@pytest.fixture
+def scan(monkeypatch):
+    """scan.py wired to moto, with the scan scoped globals AWS_CIS would set up.
+
+    Skipped when boto3 or moto are not installed.
+    """
+    pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    for name, value in (('AWS_DEFAULT_REGION', 'us-east-1'), ('AWS_ACCESS_KEY_ID', 'testing'),
+                        ('AWS_SECRET_ACCESS_KEY', 'testing'), ('AWS_SESSION_TOKEN', 'testing'), ('DB_TABLE_NAME', 'scans')):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        import boto3
+        import scan
+        from client_cache import ClientCache
+        from provider import DataProvider
+        from regions import RegionPlanner
+
+        session = boto3.Session(region_name='us-east-1')
+        monkeypatch.setattr(scan, 'boto3_session', session, raising=False)
+        monkeypatch.setattr(scan, 'SCAN_ENGINE', None)
+        monkeypatch.setattr(scan, 'CIRCUIT_BREAKER', None)
+        monkeypatch.setattr(scan, 'CLIENT_CACHE', ClientCache(session))
+        monkeypatch.setattr(scan, 'DATA_PROVIDER', DataProvider(scan.get_client))
+        monkeypatch.setattr(scan, 'REGION_PLANNER', RegionPlanner(session, ACCOUNT))
+        monkeypatch.setattr(scan, 'EC2_CLIENT', scan.get_client('ec2'), raising=False)
+        yield scan
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+import async_engine
+from provider import DataProvider
+from scheduler import CURRENT_TASK, current_task
+
+
+class FakeCredentials(object):
+    access_key = secret_key = token = None
+
+    def get_frozen_credentials(self):
+        return self
+
+
+class FakeSession(object):
+    region_name = 'us-east-1'
+
+    def get_credentials(self):
+        return FakeCredentials()
+
+
+class FakeConfig(object):
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def merge(self, other):
+        return FakeConfig(**dict(self.kwargs, **other.kwargs))
+
+
+class FakePaginator(object):
+
+    def __init__(self, client, operation):
+        self.client = client
+        self.operation = operation
+
+    async def paginate(self, **params):
+        for page in range(2):
+            yield await self.client.respond(self.operation, dict(params, Page=page))
+
+
+class FakeAsyncClient(object):
+    """aiobotocore client stub, every call waits until `expected` calls are in flight on the loop."""
+
+    def __init__(self, service, region, stub):
+        self.service = service
+        self.region = region
+        self.stub = stub
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.stub.closed += 1
+
+    async def respond(self, operation, params):
+        self.stub.in_flight += 1
+        self.stub.peak = max(self.stub.peak, self.stub.in_flight)
+        if self.stub.in_flight >= self.stub.expected:
+            self.stub.ready.set()
+        await asyncio.wait_for(self.stub.ready.wait(), 5)
+        self.stub.in_flight -= 1
+        if params.get('Fail'):
+            raise RuntimeError(self.region)
+        return {'Region': self.region, 'Operation': operation, 'Params': params}
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation)
+
+    def __getattr__(self, operation):
+        async def api_call(**params):
+            return await self.respond(operation, params)
+        return api_call
+
+
+class FakeAsyncSession(object):
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.in_flight = 0
+        self.peak = 0
+        self.closed = 0
+        self.ready = None
+
+    def create_client(self, service, region_name=None, **kwargs):
+        if self.ready is None:
+            self.ready = asyncio.Event()
+        return FakeAsyncClient(service, region_name, self)
+
+
+REGIONS = ['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'eu-west-1', 'eu-central-1', 'ap-south-1', 'sa-east-1']
+
+
+@pytest.fixture
+def stubbed_engine(monkeypatch):
+    stub = FakeAsyncSession(len(REGIONS))
+    monkeypatch.setattr(async_engine, 'get_async_session', lambda: stub)
+    monkeypatch.setattr(async_engine, 'AioConfig', FakeConfig)
+    engine = async_engine.AsyncScanEngine(FakeSession(), max_concurrency=len(REGIONS))
+    yield engine, stub
+    engine.close()
+    assert stub.closed == len(REGIONS)
+
+
+def test_fetch_all_runs_one_coroutine_per_region(stubbed_engine):
+    engine, stub = stubbed_engine
+    # Each stubbed call only returns once every region is in flight, a sequential fan-out would time out
+    responses = engine.fetch_all([('ec2', 'describe_vpcs', region, {}, False) for region in REGIONS])
+    assert [response['Region'] for response in responses] == REGIONS
+    assert stub.peak == len(REGIONS)
+
+
+def test_fetch_all_returns_pages_and_errors_in_order(stubbed_engine):
+    engine, stub = stubbed_engine
+    requests = [('ec2', 'describe_flow_logs', region, {'Fail': region == 'eu-west-1'}, True) for region in REGIONS]
+    responses = engine.fetch_all(requests)
+    failed = REGIONS.index('eu-west-1')
+    assert isinstance(responses[failed], RuntimeError)
+    assert [page['Params']['Page'] for page in responses[0]] == [0, 1]
+
+
+def test_data_provider_prefetch_through_the_engine(stubbed_engine):
+    engine, stub = stubbed_engine
+    calls = []
+
+    def client_factory(service, region):
+        calls.append((service, region))
+        return engine.client(service, region)
+
+    provider = DataProvider(client_factory, gather=engine.fetch_all)
+    provider.prefetch([('ec2', 'describe_security_groups', region, {'Fail': region == 'eu-west-1'}, True) for region in REGIONS])
+    pages = provider.fetch_pages('ec2', 'describe_security_groups', 'us-east-1', Fail=False)
+    assert pages[0]['Region'] == 'us-east-1'
+    assert calls == []
+    # The prefetched failure is raised once, the next caller fetches again through the client
+    with pytest.raises(RuntimeError):
+        provider.fetch_pages('ec2', 'describe_security_groups', 'eu-west-1', Fail=True)
+    stub.expected = 1
+    assert provider.fetch('ec2', 'describe_vpcs', 'eu-west-1')['Region'] == 'eu-west-1'
+    assert calls == [('ec2', 'eu-west-1')]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # The loop handling does not need aiobotocore, no client is opened by these tests
+    monkeypatch.setattr(async_engine, 'get_async_session', lambda: None)
+    engine = async_engine.AsyncScanEngine(FakeSession(), max_concurrency=4)
+    yield engine
+    engine.close()
+
+
+def test_run_returns_the_result_of_the_coroutine(engine):
+    async def add(a, b):
+        await asyncio.sleep(0)
+        return a + b
+    assert engine.run(add(1, 2)) == 3
+
+
+def test_run_raises_the_error_of_the_coroutine(engine):
+    async def fail():
+        raise KeyError('boom')
+    with pytest.raises(KeyError):
+        engine.run(fail())
+
+
+def test_run_propagates_the_callers_context(engine):
+    async def task_name():
+        return current_task()
+    token = CURRENT_TASK.set('1.4')
+    try:
+        assert engine.run(task_name()) == '1.4'
+    finally:
+        CURRENT_TASK.reset(token)
+    assert engine.run(task_name()) != '1.4'
@@ -0,0 +1,67 @@
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, RegionUnavailableError, is_region_failure
+
+
+class FakeClientError(Exception):
+
+    def __init__(self, code, status=400):
+        super(FakeClientError, self).__init__(code)
+        self.response = {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status}}
+
+
+def test_is_region_failure():
+    assert is_region_failure(RegionUnavailableError('eu-west-1', 'ec2'))
+    assert is_region_failure(FakeClientError('AuthFailure'))
+    assert is_region_failure(FakeClientError('OptInRequired', 403))
+    assert not is_region_failure(FakeClientError('AccessDenied', 403))
+    # Transient errors are left to the retries and the circuit breaker
+    assert not is_region_failure(FakeClientError('InternalError', 500))
+    assert not is_region_failure(ConnectionError('reset'))
+
+
+def test_circuit_opens_after_the_threshold():
+    breaker = CircuitBreaker(threshold=3, reset=300)
+    key = ('eu-west-1', 'ec2')
+    breaker.record(key, True)
+    breaker.record(key, True)
+    assert breaker.allow(key)
+    breaker.record(key, True)
+    assert not breaker.allow(key)
+    assert breaker.open_circuits() == [key]
+    assert breaker.allow(('us-east-1', 'ec2'))
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=2, reset=300)
+    key = ('eu-west-1', 'ec2')
+    breaker.record(key, True)
+    breaker.record(key, False)
+    breaker.record(key, True)
+    assert breaker.allow(key)
+
+
+def test_half_open_circuit(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(threshold=2, reset=300)
+    key = ('eu-west-1', 'ec2')
+    breaker.record(key, True)
+    breaker.record(key, True)
+    assert not breaker.allow(key)
+
+    # After the reset one probe goes through, the calls behind it stay blocked
+    clock[0] += 300
+    assert breaker.allow(key)
+    assert not breaker.allow(key)
+
+    # A failed probe keeps the circuit open for another reset period
+    breaker.record(key, True)
+    clock[0] += 299
+    assert not breaker.allow(key)
+
+    # A successful probe closes it
+    clock[0] += 1
+    assert breaker.allow(key)
+    breaker.record(key, False)
+    assert breaker.allow(key)
+    assert breaker.open_circuits() == []
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import concurrency
+from concurrency import AdaptiveLimit
+
+
+def test_increase_only_when_saturated():
+    limit = AdaptiveLimit(4, 64)
+    for _ in range(100):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 4.0
+    assert limit.stats()['calls'] == 100
+
+
+def test_saturated_calls_grow_the_limit_up_to_the_maximum():
+    limit = AdaptiveLimit(2, 3)
+    limit.acquire()
+    limit.acquire()
+    limit.release()
+    assert limit.limit == 2.5
+    limit.acquire()
+    limit.release()
+    limit.release()
+    assert limit.limit == 2.9
+    for _ in range(20):
+        limit.acquire()
+        limit.acquire()
+        limit.release()
+        limit.release()
+    assert limit.limit == 3.0
+
+
+def test_throttle_halves_the_limit_once_per_cooldown(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(concurrency.time, 'monotonic', lambda: clock[0])
+    limit = AdaptiveLimit(16, 64)
+    limit.throttled()
+    limit.throttled()
+    assert limit.limit == 8.0
+    clock[0] += concurrency.AIMD_DECREASE_COOLDOWN
+    limit.throttled()
+    assert limit.limit == 4.0
+    for _ in range(10):
+        clock[0] += concurrency.AIMD_DECREASE_COOLDOWN
+        limit.throttled()
+    assert limit.limit == 1.0
+    assert limit.stats()['throttles'] == 13
+
+
+def test_waiters_get_slots_in_arrival_order():
+    limit = AdaptiveLimit(1, 1)
+    limit.acquire()
+    order = []
+    threads = []
+    for name in ('first', 'second'):
+        thread = threading.Thread(target=lambda name=name: (limit.acquire(), order.append(name), limit.release()))
+        thread.start()
+        threads.append(thread)
+        while len(limit.waiters) != len(threads):
+            pass
+    limit.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['first', 'second']
+    assert limit.in_flight == 0
+
+
+def test_async_waiter_is_woken_by_a_release():
+    limit = AdaptiveLimit(1, 1)
+    limit.acquire()
+
+    async def wait():
+        task = asyncio.ensure_future(limit.acquire_async())
+        await asyncio.sleep(0)
+        assert not task.done()
+        limit.release()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(wait())
+    assert limit.in_flight == 1
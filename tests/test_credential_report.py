@@ -0,0 +1,57 @@
+import math
+from datetime import datetime
+
+from credential_report import CredentialReport, parse_time_column, parse_timestamp
+
+HEADER = ('user,arn,password_enabled,password_last_used,mfa_active,'
+          'access_key_1_active,access_key_1_last_rotated,access_key_1_last_used_date,'
+          'access_key_2_active,access_key_2_last_rotated,access_key_2_last_used_date')
+
+REPORT = "\n".join([
+    HEADER,
+    '<root_account>,arn:aws:iam::1:root,not_supported,2024-01-02T03:04:05+00:00,true,false,N/A,N/A,false,N/A,N/A',
+    'alice,arn:aws:iam::1:user/alice,true,no_information,false,true,2024-01-01T00:00:00+00:00,N/A,false,N/A,N/A',
+    'bob,arn:aws:iam::1:user/bob,false,N/A,false,true,2023-06-01T12:00:00+00:00,2023-07-01T12:00:00+00:00,true,N/A,N/A',
+])
+
+
+def epoch(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('2024-01-02T03:04:05+00:00') == epoch('2024-01-02T03:04:05+00:00')
+    for value in ('N/A', 'no_information', 'not_supported', '', '2024-13-45T00:00:00+00:00'):
+        assert math.isnan(parse_timestamp(value))
+
+
+def test_parse_time_column_falls_back_on_malformed_values():
+    column = parse_time_column(['2024-01-01T00:00:00+00:00', '2024-99-99', 'N/A'])
+    assert column[0] == epoch('2024-01-01T00:00:00+00:00')
+    assert math.isnan(column[1])
+    assert math.isnan(column[2])
+
+
+def test_columns():
+    report = CredentialReport(REPORT)
+    assert len(report) == 3
+    assert report.text('user') == ('<root_account>', 'alice', 'bob')
+    assert list(report.flag('password_enabled')) == [0, 1, 0]
+    assert list(report.flag('access_key_2_active')) == [0, 0, 1]
+    assert report.time('password_last_used')[0] == epoch('2024-01-02T03:04:05+00:00')
+    assert math.isnan(report.time('password_last_used')[1])
+    assert report.time('access_key_1_last_used_date')[2] == epoch('2023-07-01T12:00:00+00:00')
+
+
+def test_short_rows_and_missing_columns_read_as_empty():
+    report = CredentialReport("user,arn,password_enabled,password_last_used\n<root_account>,arn:aws:iam::1:root")
+    assert report.text('password_enabled') == ('',)
+    assert list(report.flag('mfa_active')) == [0]
+    assert math.isnan(report.time('access_key_1_last_rotated')[0])
+    assert report.text('cert_1_active') == ('',)
+
+
+def test_empty_report():
+    report = CredentialReport("")
+    assert len(report) == 0
+    assert list(report.flag('mfa_active')) == []
@@ -0,0 +1,58 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from executor import fan_out, run_regional
+
+TASK = contextvars.ContextVar('TASK', default=None)
+
+
+def test_results_keep_the_order_of_the_items():
+    def slow_square(n):
+        # Later items finish first
+        time.sleep((5 - n) * 0.01)
+        return n * n
+    assert fan_out(slow_square, range(5), 5) == [0, 1, 4, 9, 16]
+
+
+def test_empty_and_serial_fan_out():
+    assert fan_out(lambda n: n, []) == []
+    threads = set()
+    fan_out(lambda n: threads.add(threading.current_thread()), range(3), 1)
+    assert threads == {threading.current_thread()}
+
+
+def test_workers_are_bounded():
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def work(n):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+
+    fan_out(work, range(12), 3)
+    assert running[1] <= 3
+
+
+def test_items_run_in_the_caller_context():
+    TASK.set('1.4')
+    assert fan_out(lambda n: TASK.get(), range(4), 4) == ['1.4'] * 4
+
+
+def test_errors_are_raised_to_the_caller():
+    def fail_on_two(n):
+        if n == 2:
+            raise ValueError(n)
+        return n
+    with pytest.raises(ValueError):
+        fan_out(fail_on_two, range(4), 4)
+
+
+def test_run_regional_pairs_regions_with_results():
+    assert run_regional(len, ['eu-west-1', 'us-east-1'], 2) == [('eu-west-1', 9), ('us-east-1', 9)]
@@ -0,0 +1,111 @@
+import pytest
+
+from filter_pattern import (FilterPatternError, implies, matches_pattern, parse_filter_pattern,
+                            pattern_terms)
+
+CIS_4_2 = '{ ($.eventName = "ConsoleLogin") && ($.additionalEventData.MFAUsed != "Yes") }'
+CIS_4_7 = '{ ($.eventSource = kms.amazonaws.com) && (($.eventName = DisableKey) || ($.eventName = ScheduleKeyDeletion)) }'
+CIS_4_1 = '{ ($.errorCode = "*UnauthorizedOperation") || ($.errorCode = "AccessDenied*") }'
+CIS_4_5 = ('{ ($.eventName = CreateTrail) || ($.eventName = UpdateTrail) || ($.eventName = DeleteTrail) || '
+           '($.eventName = StartLogging) || ($.eventName = StopLogging) }')
+CIS_4_6 = '{ ($.eventName = ConsoleLogin) && ($.errorMessage = "Failed authentication") }'
+CIS_4_3 = '{ $.userIdentity.type = "Root" && $.userIdentity.invokedBy NOT EXISTS && $.eventType != "AwsServiceEvent" }'
+
+
+def test_parse_flattens_nested_groups_of_the_same_kind():
+    assert parse_filter_pattern('{ ($.a = 1) && (($.b = 2) && ($.c = 3)) }') == \
+        ('and', [('cmp', '$.a', '=', '1'), ('cmp', '$.b', '=', '2'), ('cmp', '$.c', '=', '3')])
+
+
+def test_parse_keyword_operators():
+    assert parse_filter_pattern('{ $.a NOT EXISTS }') == ('cmp', '$.a', 'NOT EXISTS', None)
+    assert parse_filter_pattern('{ $.a is null }') == ('cmp', '$.a', 'IS NULL', None)
+
+
+@pytest.mark.parametrize('text', ['', '{ }', '{ $.a = }', '{ ($.a = 1) ', '{ a = 1 }', '{ $.a = 1 } x', '?ERROR'])
+def test_parse_rejects_malformed_patterns(text):
+    with pytest.raises(FilterPatternError):
+        parse_filter_pattern(text)
+
+
+def test_terms_ignore_quoting_spacing_order_and_grouping():
+    assert pattern_terms(CIS_4_2) == pattern_terms('{($.additionalEventData.MFAUsed!="Yes")&&($.eventName==ConsoleLogin)}')
+
+
+def test_terms_distribute_and_over_or():
+    assert pattern_terms(CIS_4_7) == frozenset([
+        frozenset([('$.eventSource', '=', 'kms.amazonaws.com'), ('$.eventName', '=', 'DisableKey')]),
+        frozenset([('$.eventSource', '=', 'kms.amazonaws.com'), ('$.eventName', '=', 'ScheduleKeyDeletion')]),
+    ])
+
+
+def test_terms_of_text_patterns_are_empty():
+    assert pattern_terms('ERROR') == frozenset()
+
+
+def test_implies_compares_conjunctions():
+    narrow = pattern_terms('{ ($.a = 1) && ($.b = 2) }')
+    wide = pattern_terms('{ ($.a = 1) }')
+    assert implies(narrow, wide)
+    assert not implies(wide, narrow)
+
+
+def test_matches_the_cis_pattern_written_differently():
+    assert matches_pattern(CIS_4_2, pattern_terms(CIS_4_2))
+    assert matches_pattern('{ $.eventType != AwsServiceEvent && ($.userIdentity.invokedBy NOT EXISTS) && $.userIdentity.type = Root }',
+                           pattern_terms(CIS_4_3))
+    assert matches_pattern('{ (($.eventSource = kms.amazonaws.com) && ($.eventName = DisableKey)) || '
+                           '(($.eventSource = kms.amazonaws.com) && ($.eventName = ScheduleKeyDeletion)) }', pattern_terms(CIS_4_7))
+
+
+def test_or_instead_of_and_still_covers_the_events():
+    # Alerts on every console login, the logins without MFA included
+    assert matches_pattern('{ ($.eventName = "ConsoleLogin") || ($.additionalEventData.MFAUsed != "Yes") }', pattern_terms(CIS_4_2))
+
+
+def test_ored_event_source_does_not_match():
+    assert not matches_pattern('{ ($.eventSource = kms.amazonaws.com) || ($.eventName = DisableKey) || ($.eventName = ScheduleKeyDeletion) }',
+                               pattern_terms(CIS_4_7))
+
+
+def test_missing_branch_does_not_match():
+    assert not matches_pattern('{ ($.eventSource = kms.amazonaws.com) && ($.eventName = DisableKey) }', pattern_terms(CIS_4_7))
+
+
+def test_extra_branch_matches():
+    assert matches_pattern('{ (' + CIS_4_2[2:-2] + ') || ($.eventName = CreateUser) }', pattern_terms(CIS_4_2))
+
+
+def test_cis_1_4_unauthorized_calls_pattern_with_exclusions_matches():
+    text = ('{ ($.errorCode = "*UnauthorizedOperation") || ($.errorCode = "AccessDenied*") && '
+            '($.sourceIPAddress != "delivery.logs.amazonaws.com") && ($.eventName != "HeadBucket") }')
+    assert matches_pattern(text, pattern_terms(CIS_4_1))
+    grouped = ('{ (($.errorCode = "*UnauthorizedOperation") || ($.errorCode = "AccessDenied*")) && '
+               '($.sourceIPAddress != "delivery.logs.amazonaws.com") && ($.eventName != "HeadBucket") }')
+    assert matches_pattern(grouped, pattern_terms(CIS_4_1))
+
+
+def test_console_signin_pattern_with_extra_clauses_matches():
+    text = ('{ ($.eventName = "ConsoleLogin") && ($.additionalEventData.MFAUsed != "Yes") && '
+            '($.userIdentity.type = "IAMUser") && ($.responseElements.ConsoleLogin = "Success") }')
+    assert matches_pattern(text, pattern_terms(CIS_4_2))
+
+
+def test_trail_changes_pattern_with_more_events_matches():
+    text = CIS_4_5[:-2] + ' || ($.eventName = PutEventSelectors) }'
+    assert matches_pattern(text, pattern_terms(CIS_4_5))
+
+
+def test_changed_condition_on_a_required_selector_does_not_match():
+    assert not matches_pattern('{ $.userIdentity.type = "Root" && $.userIdentity.invokedBy NOT EXISTS && $.eventType = "AwsServiceEvent" }',
+                               pattern_terms(CIS_4_3))
+    assert not matches_pattern('{ ($.eventName = "ConsoleLogin") && ($.additionalEventData.MFAUsed = "Yes") }', pattern_terms(CIS_4_2))
+
+
+def test_unrelated_filter_does_not_match():
+    assert not matches_pattern('{ ($.sourceIPAddress = "10.0.0.1") }', pattern_terms(CIS_4_1))
+    assert not matches_pattern('{ ($.eventName = "ConsoleLogin") }', pattern_terms(CIS_4_6))
+
+
+def test_malformed_filter_does_not_match():
+    assert not matches_pattern('{ ($.eventName = "ConsoleLogin") && ', pattern_terms(CIS_4_2))
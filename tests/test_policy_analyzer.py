@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import policy_analyzer
+from policy_analyzer import analyze_policy, normalize_statements, policy_cache_stats, policy_digest
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(policy_analyzer, 'VERDICTS', policy_analyzer.OrderedDict())
+    monkeypatch.setattr(policy_analyzer, 'CACHE_STATS', {'hits': 0, 'misses': 0})
+
+
+def test_normalize_single_statement():
+    statements = normalize_statements({'Statement': {
+        'Effect': 'Allow', 'Action': 'S3:GetObject', 'Resource': 'arn:aws:s3:::Bucket/*',
+        'Condition': {'Bool': {'aws:SecureTransport': False}}}})
+    assert statements == [{
+        'Effect': 'allow', 'Action': ['s3:getobject'], 'Resource': ['arn:aws:s3:::Bucket/*'],
+        'Condition': {'Bool': {'aws:securetransport': ['false']}}}]
+    assert normalize_statements({}) == []
+
+
+@pytest.mark.parametrize('statement, admin', [
+    ({'Effect': 'Allow', 'Action': '*', 'Resource': '*'}, True),
+    ({'Effect': 'Allow', 'Action': ['s3:*', '*'], 'Resource': ['*']}, True),
+    ({'Effect': 'Deny', 'Action': '*', 'Resource': '*'}, False),
+    ({'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}, False),
+    ({'Effect': 'Allow', 'Action': '*', 'Resource': 'arn:aws:s3:::bucket'}, False),
+    ({'Effect': 'Allow', 'NotAction': 'iam:*', 'Resource': '*'}, False),
+])
+def test_full_admin(statement, admin):
+    assert analyze_policy({'Statement': [statement]})['FullAdmin'] is admin
+
+
+@pytest.mark.parametrize('condition, secure', [
+    ({'Bool': {'aws:SecureTransport': 'false'}}, True),
+    ({'Bool': {'AWS:SECURETRANSPORT': ['False']}}, True),
+    ({'Bool': {'aws:SecureTransport': 'true'}}, False),
+    ({'StringEquals': {'aws:SecureTransport': 'false'}}, False),
+    ({}, False),
+])
+def test_secure_transport(condition, secure):
+    statement = {'Effect': 'Deny', 'Principal': '*', 'Action': 's3:*', 'Resource': '*', 'Condition': condition}
+    assert analyze_policy({'Statement': [statement]})['SecureTransport'] is secure
+
+
+def test_digest_ignores_key_order():
+    assert policy_digest({'a': 1, 'b': [1, 2]}) == policy_digest({'b': [1, 2], 'a': 1})
+    assert policy_digest({'a': 1}) != policy_digest({'a': 2})
+
+
+def test_digest_canonicalizes_json_text():
+    document = {'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+    assert policy_digest(json.dumps(document, indent=4)) == policy_digest(document)
+    assert policy_digest('{"b": 1, "a": 2}') == policy_digest('{"a":2,"b":1}')
+    # Text that is not JSON is hashed as it is
+    assert policy_digest('not json') != policy_digest('not  json')
+
+
+def test_verdicts_are_cached_per_document():
+    document = {'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+    assert analyze_policy(document)['FullAdmin'] is True
+    assert analyze_policy(json.loads(json.dumps(document)))['FullAdmin'] is True
+    assert policy_cache_stats() == {'hits': 1, 'misses': 1, 'documents': 1}
+
+
+def test_cache_evicts_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(policy_analyzer, 'POLICY_CACHE_SIZE', 2)
+    first, second, third = ({'Statement': [], 'Id': str(n)} for n in range(3))
+    analyze_policy(first)
+    analyze_policy(second)
+    analyze_policy(first)
+    analyze_policy(third)
+    assert policy_digest(first) in policy_analyzer.VERDICTS
+    assert policy_digest(second) not in policy_analyzer.VERDICTS
+    assert policy_cache_stats()['documents'] == 2
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from provider import DataProvider
+
+
+class FakeClient(object):
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    def describe_things(self, **params):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_responses_are_fetched_once_per_key():
+    client = FakeClient([{'Things': [1]}, {'Things': [2]}])
+    provider = DataProvider(lambda service, region: client)
+    assert provider.fetch('svc', 'describe_things', 'eu-west-1') == {'Things': [1]}
+    assert provider.fetch('svc', 'describe_things', 'eu-west-1') == {'Things': [1]}
+    assert provider.fetch('svc', 'describe_things', 'us-east-1') == {'Things': [2]}
+    assert client.calls == 2
+    assert provider.stats() == {'hits': 1, 'misses': 2, 'keys': 2}
+
+
+def test_failed_fetch_is_retried_by_the_next_caller():
+    client = FakeClient([RuntimeError('throttled'), {'Things': [1]}])
+    provider = DataProvider(lambda service, region: client)
+    with pytest.raises(RuntimeError):
+        provider.fetch('svc', 'describe_things', 'eu-west-1')
+    assert provider.fetch('svc', 'describe_things', 'eu-west-1') == {'Things': [1]}
+    assert client.calls == 2
+
+
+def test_waiters_share_the_failure_of_the_fetch_in_flight():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    class SlowClient(object):
+
+        def describe_things(self):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            raise RuntimeError('throttled')
+
+    provider = DataProvider(lambda service, region: SlowClient())
+    errors = []
+
+    def fetch():
+        try:
+            provider.fetch('svc', 'describe_things')
+        except RuntimeError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=fetch)
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=fetch)
+    waiter.start()
+    while provider.stats()['hits'] == 0:
+        pass
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert len(calls) == 1
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert provider.stats()['keys'] == 0
@@ -0,0 +1,85 @@
+import pytest
+
+from rate_limiter import RateLimiter, TokenBucket, operation_family, parse_rate_limits
+
+
+class FakeEvents(object):
+
+    def __init__(self):
+        self.handlers = []
+
+    def register(self, event, handler):
+        self.handlers.append((event, handler))
+
+
+class FakeClient(object):
+
+    def __init__(self):
+        self.meta = type('Meta', (), {})()
+        self.meta.events = FakeEvents()
+
+
+class FakeModel(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("iam=5, ec2=50:100,ec2.Describe=40,,") == {
+        'iam': (5.0, 5.0), 'ec2': (50.0, 100.0), 'ec2.Describe': (40.0, 40.0)}
+    assert parse_rate_limits("sns=0.5") == {'sns': (0.5, 1.0)}
+    assert parse_rate_limits("") == {}
+
+
+@pytest.mark.parametrize('text', ["iam=0", "iam=-1", "iam=fast"])
+def test_parse_rate_limits_rejects_invalid_rates(text):
+    with pytest.raises(ValueError):
+        parse_rate_limits(text)
+
+
+@pytest.mark.parametrize('name, family', [
+    ('DescribeInstances', 'Describe'), ('ListBuckets', 'List'), ('GetTrailStatus', 'Get'),
+    ('GenerateCredentialReport', 'Other'), ('LookupEvents', 'Other'),
+])
+def test_operation_family(name, family):
+    assert operation_family(name) == family
+
+
+def test_token_bucket_serves_the_burst_then_queues_callers():
+    bucket = TokenBucket(10, 2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    first = bucket.reserve()
+    second = bucket.reserve()
+    assert first == pytest.approx(0.1, abs=0.01)
+    assert second == pytest.approx(0.2, abs=0.01)
+
+
+def test_buckets_are_kept_per_service_family_and_region():
+    limiter = RateLimiter({'ec2.Describe': (40.0, 80.0)})
+    describe = limiter.bucket('ec2', 'us-east-1', 'Describe')
+    assert describe is limiter.bucket('ec2', 'us-east-1', 'Describe')
+    assert describe is not limiter.bucket('ec2', 'us-east-1', 'Get')
+    assert describe is not limiter.bucket('ec2', 'eu-west-1', 'Describe')
+    assert (describe.rate, describe.capacity) == (40.0, 80.0)
+    # Families without a limit of their own use the limit of their service, then the default
+    get = limiter.bucket('ec2', 'us-east-1', 'Get')
+    assert (get.rate, get.capacity) == (20.0, 40.0)
+    other = limiter.bucket('unknown', 'us-east-1', 'List')
+    assert (other.rate, other.capacity) == (20.0, 20.0)
+
+
+def test_attach_takes_a_token_of_the_operation_family(monkeypatch):
+    limiter = RateLimiter({'ec2': (1.0, 1.0)})
+    client = FakeClient()
+    limiter.attach(client, 'ec2', 'us-east-1')
+    sleeps = []
+    monkeypatch.setattr('rate_limiter.time.sleep', sleeps.append)
+    event, throttle = client.meta.events.handlers[0]
+    assert event == 'before-call'
+    throttle(model=FakeModel('DescribeVpcs'), params={})
+    throttle(model=FakeModel('GetEbsEncryptionByDefault'), params={})
+    assert sleeps == []
+    throttle(model=FakeModel('DescribeVolumes'), params={})
+    assert len(sleeps) == 1 and sleeps[0] > 0.9
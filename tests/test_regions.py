@@ -0,0 +1,61 @@
+import pytest
+
+import regions
+from regions import RegionPlanner, parse_region_list
+
+
+class FakeEC2(object):
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = 0
+
+    def describe_regions(self, AllRegions):
+        self.calls += 1
+        return {'Regions': [{'RegionName': name, 'OptInStatus': status} for name, status in self.statuses]}
+
+
+class FakeSession(object):
+
+    def __init__(self, services):
+        self.services = services
+
+    def get_available_regions(self, service):
+        return self.services.get(service, [])
+
+
+STATUSES = [('us-east-1', 'opt-in-not-required'), ('eu-west-1', 'opt-in-not-required'),
+            ('af-south-1', 'not-opted-in'), ('me-south-1', 'opted-in')]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(regions, 'ENABLED_REGIONS', {})
+
+
+def test_parse_region_list():
+    assert parse_region_list(None) == []
+    assert parse_region_list(' us-east-1, ,eu-west-1') == ['us-east-1', 'eu-west-1']
+    assert parse_region_list(['us-east-1', ' ']) == ['us-east-1']
+
+
+def test_opted_out_regions_are_skipped_and_cached_per_account():
+    ec2 = FakeEC2(STATUSES)
+    assert RegionPlanner(FakeSession({}), '111111111111').regions(ec2) == ['us-east-1', 'eu-west-1', 'me-south-1']
+    RegionPlanner(FakeSession({}), '111111111111').regions(ec2)
+    assert ec2.calls == 1
+    RegionPlanner(FakeSession({}), '222222222222').regions(ec2)
+    assert ec2.calls == 2
+
+
+def test_allow_and_deny_lists():
+    planner = RegionPlanner(FakeSession({}), '111111111111', allow='eu-west-1,me-south-1,af-south-1', deny=['me-south-1'])
+    assert planner.regions(FakeEC2(STATUSES)) == ['eu-west-1']
+
+
+def test_regions_without_the_service_are_dropped():
+    planner = RegionPlanner(FakeSession({'ec2': ['us-east-1', 'eu-west-1', 'me-south-1'], 'access-analyzer': ['us-east-1']}), '111111111111')
+    # Regions botocore does not know are kept, they may be newer than its endpoint data
+    assert planner.regions_for('access-analyzer', ['us-east-1', 'me-south-1', 'xx-new-1']) == ['us-east-1', 'xx-new-1']
+    # Services without endpoint data are called everywhere
+    assert planner.regions_for('unknown', ['us-east-1', 'me-south-1']) == ['us-east-1', 'me-south-1']
@@ -0,0 +1,72 @@
+import pytest
+
+import retry
+from retry import RetryPolicy, classify_error
+
+
+class FakeHTTPResponse(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def response(status_code, code=''):
+    return FakeHTTPResponse(status_code), {'Error': {'Code': code}} if code else {}
+
+
+class EndpointConnectionError(Exception):
+    pass
+
+
+class ReadTimeoutError(Exception):
+    pass
+
+
+@pytest.mark.parametrize('outcome, kind', [
+    (response(400, 'ThrottlingException'), 'throttle'),
+    (response(503, 'SlowDown'), 'throttle'),
+    (response(429), 'throttle'),
+    (response(500, 'InternalError'), 'transient'),
+    (response(502), 'transient'),
+    (response(403, 'AccessDenied'), None),
+    (response(200), None),
+    (None, None),
+])
+def test_classify_response(outcome, kind):
+    assert classify_error(outcome, None) == kind
+
+
+def test_classify_exception():
+    assert classify_error(None, EndpointConnectionError()) == 'transient'
+    assert classify_error(None, ReadTimeoutError()) == 'transient'
+    assert classify_error(None, ValueError()) is None
+
+
+def test_delay_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: high)
+    policy = RetryPolicy(base_delay=0.5, max_delay=3)
+    assert [policy.delay(attempts) for attempts in (1, 2, 3, 4, 5)] == [0.5, 1.0, 2.0, 3, 3]
+
+
+def test_retries_stop_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3, budget=10)
+    throttled = response(400, 'Throttling')
+    assert policy.needs_retry(response=throttled, attempts=1) is not None
+    assert policy.needs_retry(response=throttled, attempts=2) is not None
+    assert policy.needs_retry(response=throttled, attempts=3) is None
+    assert policy.needs_retry(response=response(200), attempts=1) is None
+    stats = policy.stats()
+    assert stats['errors'] == {'throttle': 3}
+    assert stats['exhausted'] == 1
+    assert stats['budget'] == 8
+    assert stats['retries'] == {None: 2}
+
+
+def test_budget_is_shared_by_the_scan():
+    policy = RetryPolicy(max_attempts=10, budget=2)
+    failed = response(500, 'InternalError')
+    assert policy.needs_retry(response=failed, attempts=1) is not None
+    assert policy.needs_retry(response=failed, attempts=1) is not None
+    assert policy.needs_retry(response=failed, attempts=1) is None
+    assert policy.stats()['budget'] == 0
+    assert policy.stats()['exhausted'] == 1
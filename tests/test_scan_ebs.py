@@ -0,0 +1,30 @@
+def test_only_unencrypted_volumes_are_requested(scan, monkeypatch):
+    ec2 = scan.get_client('ec2', 'eu-west-1')
+    unencrypted = ec2.create_volume(AvailabilityZone='eu-west-1a', Size=1)['VolumeId']
+    ec2.create_volume(AvailabilityZone='eu-west-1a', Size=1, Encrypted=True)
+    ec2.enable_ebs_encryption_by_default()
+    requests = []
+    fetch_pages = scan.DATA_PROVIDER.fetch_pages
+
+    def recording_fetch_pages(service, operation, region=None, **params):
+        pages = list(fetch_pages(service, operation, region, **params))
+        requests.append((operation, region, params, pages))
+        return pages
+
+    monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch_pages', recording_fetch_pages)
+    result = scan.security_2_2_EBSVolumeEncryptCheck(['us-east-1', 'eu-west-1'])
+    # The regions are described concurrently
+    assert sorted(region for operation, region, params, pages in requests) == ['eu-west-1', 'us-east-1']
+    for operation, region, params, pages in requests:
+        assert (operation, params) == ('describe_volumes', {'Filters': [{'Name': 'encrypted', 'Values': ['false']}]})
+        # The filter is applied by EC2, the response only carries the violation
+        assert [m['VolumeId'] for page in pages for m in page['Volumes']] == ([unencrypted] if region == 'eu-west-1' else [])
+    assert result['Result'] is False
+    assert unencrypted in result['comments']
+    assert 'EBS encryption by default disabled</B> :: [\'us-east-1\']' in result['comments']
+
+
+def test_encrypted_volumes_pass(scan):
+    scan.get_client('ec2', 'eu-west-1').create_volume(AvailabilityZone='eu-west-1a', Size=1, Encrypted=True)
+    result = scan.security_2_2_EBSVolumeEncryptCheck(['eu-west-1'])
+    assert result['Result'] is True
@@ -0,0 +1,45 @@
+import botocore.exceptions
+
+
+def create_flow_log(ec2, vpcId):
+    return ec2.create_flow_logs(ResourceIds=[vpcId], ResourceType='VPC', TrafficType='ALL', LogDestinationType='s3',
+                                LogDestination='arn:aws:s3:::flow-logs')
+
+
+def test_coverage_is_shared_by_3_9_and_5_3(scan):
+    scan.get_client('s3').create_bucket(Bucket='flow-logs')
+    ec2 = scan.get_client('ec2', 'eu-west-1')
+    covered = ec2.create_vpc(CidrBlock='10.0.0.0/16')['Vpc']['VpcId']
+    uncovered = ec2.create_vpc(CidrBlock='10.1.0.0/16')['Vpc']['VpcId']
+    create_flow_log(ec2, covered)
+    # Flow logs of subnets do not cover their VPC
+    subnet = ec2.create_subnet(VpcId=uncovered, CidrBlock='10.1.0.0/24')['Subnet']['SubnetId']
+    ec2.create_flow_logs(ResourceIds=[subnet], ResourceType='Subnet', TrafficType='ALL', LogDestinationType='s3',
+                         LogDestination='arn:aws:s3:::flow-logs')
+
+    coverage = scan.get_flow_log_coverage(['eu-west-1'])
+    vpcIds, coveredVpcs = coverage['regions']['eu-west-1']
+    assert covered in vpcIds and uncovered in vpcIds
+    assert coveredVpcs == {covered}
+    assert scan.DATA_PROVIDER.stats()['misses'] == 2
+
+    for control in (scan.security_3_9_vpc_flow_logs_enabled, scan.security_5_3_flow_logs_enabled_on_all_vpc):
+        result = control(coverage)
+        assert result['Result'] is False
+        assert uncovered in str(result['NonCompliantAccounts'])
+        assert covered not in str(result['NonCompliantAccounts'])
+
+
+def test_unreachable_regions_are_reported_as_not_evaluated(scan, monkeypatch):
+    fetch_pages = scan.DATA_PROVIDER.fetch_pages
+
+    def failing_fetch_pages(service, operation, region=None, **params):
+        if region == 'ap-south-1':
+            raise botocore.exceptions.ClientError({'Error': {'Code': 'AuthFailure', 'Message': 'not enabled'}}, operation)
+        return fetch_pages(service, operation, region, **params)
+
+    monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch_pages', failing_fetch_pages)
+    coverage = scan.get_flow_log_coverage(['us-east-1', 'ap-south-1'])
+    assert list(coverage['regions']) == ['us-east-1']
+    assert coverage['unavailable'] == ['ap-south-1']
+    assert 'Not evaluated: region unavailable' in scan.security_5_3_flow_logs_enabled_on_all_vpc(coverage)['comments']
@@ -0,0 +1,49 @@
+import json
+
+ADMIN = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]}
+READ_ONLY = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': '*'}]}
+TRUST = {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Principal': {'AWS': 'arn:aws:iam::123456789012:root'}, 'Action': 'sts:AssumeRole'}]}
+
+
+def test_snapshot_feeds_1_15_to_1_17(scan):
+    iam = scan.get_client('iam')
+    iam.create_user(UserName='inline')
+    iam.put_user_policy(UserName='inline', PolicyName='read', PolicyDocument=json.dumps(READ_ONLY))
+    iam.create_user(UserName='grouped')
+    iam.create_group(GroupName='readers')
+    iam.add_user_to_group(GroupName='readers', UserName='grouped')
+    admin = iam.create_policy(PolicyName='admin', PolicyDocument=json.dumps(ADMIN))['Policy']
+    iam.create_policy(PolicyName='read', PolicyDocument=json.dumps(READ_ONLY))
+    iam.create_role(RoleName='support', AssumeRolePolicyDocument=json.dumps(TRUST))
+
+    snapshot = scan.get_iam_authorization_snapshot()
+    assert sorted(m['UserName'] for m in snapshot['UserDetailList']) == ['grouped', 'inline']
+    assert [m['GroupName'] for m in snapshot['GroupDetailList']] == ['readers']
+    assert sorted(m['Arn'].split('/')[-1] for m in snapshot['Policies']) == ['admin', 'read']
+
+    result = scan.security_1_15_only_group_policies_on_iam_users(snapshot)
+    assert result['Result'] is False
+    assert 'user/inline' in result['comments'] and 'user/grouped' not in result['comments']
+    result = scan.security_1_16_no_admin_priv_policies(snapshot)
+    assert result['NonCompliantAccounts'] == [admin['Arn']]
+    assert scan.security_1_17_ensure_support_roles(snapshot)['Result'] is False
+
+    # moto does not load the AWS managed policies, the attachment is added to the snapshot
+    role = [m for m in snapshot['RoleDetailList'] if m['RoleName'] == 'support'][0]
+    role['AttachedManagedPolicies'] = [{'PolicyName': 'AWSSupportAccess', 'PolicyArn': 'arn:aws:iam::aws:policy/AWSSupportAccess'}]
+    assert scan.security_1_17_ensure_support_roles(snapshot)['Result'] is True
+
+
+def test_snapshot_is_read_in_one_paginated_sweep(scan):
+    iam = scan.get_client('iam')
+    for n in range(3):
+        iam.create_user(UserName='user' + str(n))
+    scan.get_iam_authorization_snapshot()
+    assert scan.DATA_PROVIDER.stats()['misses'] == 1
+
+
+def test_default_policy_document(scan):
+    policy = {'Arn': 'arn:aws:iam::123456789012:policy/p', 'PolicyVersionList': [
+        {'IsDefaultVersion': False, 'Document': READ_ONLY},
+        {'IsDefaultVersion': True, 'Document': '%7B%22Statement%22%3A%20%5B%5D%7D'}]}
+    assert scan.get_default_policy_document(policy) == {'Statement': []}
@@ -0,0 +1,47 @@
+import botocore.exceptions
+
+
+def test_customer_keys_without_rotation_fail(scan):
+    kms = scan.get_client('kms', 'eu-west-1')
+    rotated, unrotated, disabled = (kms.create_key()['KeyMetadata'] for _ in range(3))
+    kms.enable_key_rotation(KeyId=rotated['KeyId'])
+    kms.disable_key(KeyId=disabled['KeyId'])
+    result = scan.security_3_8_kms_cmk_rotation(['us-east-1', 'eu-west-1'])
+    assert result['Result'] is False
+    assert result['NonCompliantAccounts'] == ['Key:' + unrotated['Arn']]
+
+
+def test_asymmetric_keys_are_not_asked_for_rotation(scan, monkeypatch):
+    kms = scan.get_client('kms', 'eu-west-1')
+    signing = kms.create_key(KeySpec='RSA_2048', KeyUsage='SIGN_VERIFY')['KeyMetadata']
+    kms.enable_key_rotation(KeyId=kms.create_key()['KeyMetadata']['KeyId'])
+    asked = []
+    fetch = scan.DATA_PROVIDER.fetch
+
+    def recording_fetch(service, operation, region=None, **params):
+        if operation == 'get_key_rotation_status':
+            asked.append(params['KeyId'])
+        return fetch(service, operation, region, **params)
+
+    monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch', recording_fetch)
+    result = scan.security_3_8_kms_cmk_rotation(['eu-west-1'])
+    assert result['Result'] is True
+    assert signing['KeyId'] not in asked
+    assert len(asked) == 1
+
+
+def test_keys_without_permission_are_commented(scan, monkeypatch):
+    kms = scan.get_client('kms', 'eu-west-1')
+    keyId = kms.create_key()['KeyMetadata']['KeyId']
+    fetch = scan.DATA_PROVIDER.fetch
+
+    def denied_fetch(service, operation, region=None, **params):
+        if operation == 'describe_key':
+            raise botocore.exceptions.ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}}, operation)
+        return fetch(service, operation, region, **params)
+
+    monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch', denied_fetch)
+    result = scan.security_3_8_kms_cmk_rotation(['eu-west-1'])
+    assert result['Result'] is True
+    assert keyId in result['comments']
+    assert result['comments'].startswith("Unable to access KMS CMK property")
@@ -0,0 +1,104 @@
+TOPIC = 'arn:aws:sns:eu-west-1:123456789012:alerts'
+
+
+class FakeProvider(object):
+    """Answers fetch_pages from canned pages keyed by (operation, region), recording the calls."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def prefetch(self, requests):
+        pass
+
+    def fetch_pages(self, service, operation, region=None, **params):
+        self.calls.append((operation, region, params))
+        return self.pages.get((operation, region), [])
+
+
+def trail_inventory(scan, pattern, group='cloudtrail-logs'):
+    metricFilter = {'filterPattern': pattern, 'metricTransformations': [{'metricNamespace': 'CIS', 'metricName': 'Unauthorized'}]}
+    record = {'TrailARN': 'arn:aws:cloudtrail:us-east-1:123456789012:trail/main', 'LogGroupName': group,
+              'MetricFilters': {'metricFilters': [metricFilter]}}
+    return {'trails': {'us-east-1': [record]}, 'unavailable': []}
+
+
+def alarm_pages():
+    return [{'MetricAlarms': [{'AlarmName': 'unauthorized', 'Namespace': 'CIS', 'MetricName': 'Unauthorized', 'AlarmActions': [TOPIC]},
+                              # Metric math alarms are left out of the index
+                              {'AlarmName': 'math', 'Metrics': [], 'AlarmActions': [TOPIC]}]}]
+
+
+def test_alarm_index(scan, monkeypatch):
+    provider = FakeProvider({
+        ('describe_alarms', 'us-east-1'): alarm_pages(),
+        ('list_subscriptions', 'us-east-1'): [{'Subscriptions': [{'TopicArn': TOPIC, 'Protocol': 'email'}]},
+                                              {'Subscriptions': [{'TopicArn': TOPIC, 'Protocol': 'sqs'}]}],
+    })
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    index = scan.get_alarm_index('us-east-1')
+    assert list(index['Alarms']) == [('CIS', 'Unauthorized')]
+    assert [m['Protocol'] for m in index['Subscriptions'][TOPIC]] == ['email', 'sqs']
+
+
+def test_sweep_resolves_alarms_and_subscribers_from_the_index(scan, monkeypatch):
+    provider = FakeProvider({
+        ('describe_alarms', 'us-east-1'): alarm_pages(),
+        ('list_subscriptions', 'eu-west-1'): [{'Subscriptions': [{'TopicArn': TOPIC, 'Protocol': 'email'}]}],
+    })
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    sweep = scan.sweep_metric_filters(trail_inventory(scan, scan.MONITORING_PATTERNS['4.1']))
+    assert sweep['controls']['4.1'] == {'Result': True, 'NoAlarmGroups': [], 'NonCompliantAccounts': []}
+    assert sweep['controls']['4.2']['Result'] is False
+    assert 'list_subscriptions_by_topic' not in [operation for operation, region, params in provider.calls]
+
+
+def test_sweep_lists_the_subscribers_of_topics_missing_from_the_index(scan, monkeypatch):
+    # list_subscriptions leaves out the subscriptions owned by other accounts
+    provider = FakeProvider({
+        ('describe_alarms', 'us-east-1'): alarm_pages(),
+        ('list_subscriptions_by_topic', 'eu-west-1'): [{'Subscriptions': [{'TopicArn': TOPIC, 'Protocol': 'https', 'Owner': '210987654321'}]}],
+    })
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    sweep = scan.sweep_metric_filters(trail_inventory(scan, scan.MONITORING_PATTERNS['4.1']))
+    assert sweep['controls']['4.1']['Result'] is True
+    assert ('list_subscriptions_by_topic', 'eu-west-1', {'TopicArn': TOPIC}) in provider.calls
+
+
+def test_sweep_reports_filters_without_alarm_or_subscriber(scan, monkeypatch):
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', FakeProvider({}))
+    sweep = scan.sweep_metric_filters(trail_inventory(scan, scan.MONITORING_PATTERNS['4.1']))
+    assert sweep['controls']['4.1'] == {'Result': False, 'NoAlarmGroups': ['cloudtrail-logs'], 'NonCompliantAccounts': ['cloudtrail-logs']}
+
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', FakeProvider({('describe_alarms', 'us-east-1'): alarm_pages()}))
+    sweep = scan.sweep_metric_filters(trail_inventory(scan, scan.MONITORING_PATTERNS['4.1']))
+    assert sweep['controls']['4.1'] == {'Result': False, 'NoAlarmGroups': [], 'NonCompliantAccounts': ['cloudtrail-logs']}
+
+
+def test_sweep_without_trails(scan):
+    assert scan.sweep_metric_filters({'trails': {}, 'unavailable': ['ap-south-1']}) == {'controls': {}, 'unavailable': ['ap-south-1']}
+    result = scan.monitoring_result({'controls': {}, 'unavailable': []}, '4.1', 'description', 'Low', '')
+    assert result['Result'] is False
+    assert result['comments'] == "No CloudTrail Logs Found"
+
+
+def test_one_sweep_evaluates_every_control(scan, monkeypatch):
+    alarms = [{'AlarmName': metric, 'Namespace': 'CIS', 'MetricName': metric, 'AlarmActions': [TOPIC]} for metric in ('Unauthorized', 'Root')]
+    provider = FakeProvider({
+        ('describe_alarms', 'us-east-1'): [{'MetricAlarms': alarms}],
+        ('list_subscriptions', 'eu-west-1'): [{'Subscriptions': [{'TopicArn': TOPIC, 'Protocol': 'email'}]}],
+    })
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    cloudtrails = trail_inventory(scan, scan.MONITORING_PATTERNS['4.1'])
+    cloudtrails['trails']['us-east-1'][0]['MetricFilters']['metricFilters'].append(
+        {'filterPattern': scan.MONITORING_PATTERNS['4.3'], 'metricTransformations': [{'metricNamespace': 'CIS', 'metricName': 'Root'}]})
+    sweep = scan.sweep_metric_filters(cloudtrails)
+    assert list(sweep['controls']) == list(scan.MONITORING_PATTERNS)
+    assert [cis_control for cis_control, state in sweep['controls'].items() if state['Result']] == ['4.1', '4.3']
+    # The alarms and subscriptions of each region are listed once for the fifteen controls
+    assert [(operation, region) for operation, region, params in provider.calls] == [
+        ('describe_alarms', 'us-east-1'), ('list_subscriptions', 'us-east-1'),
+        ('describe_alarms', 'eu-west-1'), ('list_subscriptions', 'eu-west-1')]
+    result = scan.security_4_3_root_account_usage_metric_filter(sweep)
+    assert result['Result'] is True
+    assert result['ControlId'] == '4.3'
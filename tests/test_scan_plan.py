@@ -0,0 +1,20 @@
+from scheduler import check_plan
+
+
+def test_scan_plan_is_a_valid_graph(scan):
+    plan = scan.get_scan_plan()
+    check_plan(plan)
+    # The shared inputs are submitted before the controls
+    assert list(plan)[:len(scan.SCAN_INPUTS)] == list(scan.SCAN_INPUTS)
+    controls = [control for category in (scan.IAM_CONTROLS, scan.STORAGE_CONTROLS, scan.LOGGING_CONTROLS,
+                                         scan.MONITORING_CONTROLS, scan.NETWORKING_CONTROLS) for control in category]
+    assert list(plan)[len(scan.SCAN_INPUTS):] == controls
+    # Controls only depend on shared inputs, never on each other
+    for control in controls:
+        assert set(plan[control][1]) <= set(scan.SCAN_INPUTS)
+
+
+def test_every_shared_input_is_used(scan):
+    plan = scan.get_scan_plan()
+    used = set(name for function, dependencies in plan.values() for name in dependencies)
+    assert set(scan.SCAN_INPUTS) - used == set()
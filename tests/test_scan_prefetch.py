@@ -0,0 +1,63 @@
+from provider import DataProvider
+
+REGIONS = ['us-east-1', 'eu-west-1', 'ap-south-1']
+
+
+def gather_through_clients(scan, gathered):
+    # Gather backend with the engine's contract, the requests are answered by moto through boto3 clients
+    def gather(requests):
+        gathered.append(list(requests))
+        responses = []
+        for service, operation, region, params, paginated in requests:
+            client = scan.get_client(service, region)
+            try:
+                if paginated:
+                    responses.append([page for page in client.get_paginator(operation).paginate(**params)])
+                else:
+                    responses.append(getattr(client, operation)(**params))
+            except Exception as e:
+                responses.append(e)
+        return responses
+    return gather
+
+
+def test_regional_inventories_are_gathered_once_for_all_regions(scan, monkeypatch):
+    gathered = []
+    provider = DataProvider(scan.get_client, gather=gather_through_clients(scan, gathered))
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    scan.get_client('ec2', 'eu-west-1').create_volume(AvailabilityZone='eu-west-1a', Size=1)
+
+    coverage = scan.get_flow_log_coverage(REGIONS)
+    volumes = scan.security_2_2_EBSVolumeEncryptCheck(REGIONS)
+
+    assert [[(operation, region) for service, operation, region, params, paginated in batch] for batch in gathered] == [
+        [(operation, region) for region in REGIONS for operation in ('describe_flow_logs', 'describe_vpcs')],
+        [(operation, region) for region in REGIONS for operation in ('get_ebs_encryption_by_default', 'describe_volumes')],
+    ]
+    # Every response the controls read came from the batches
+    assert provider.stats()['misses'] == 12
+    assert list(coverage['regions']) == REGIONS
+    assert volumes['Result'] is False
+
+
+def test_kms_keys_are_described_in_one_batch_per_region(scan, monkeypatch):
+    gathered = []
+    provider = DataProvider(scan.get_client, gather=gather_through_clients(scan, gathered))
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    kms = scan.get_client('kms', 'eu-west-1')
+    keys = [kms.create_key()['KeyMetadata']['KeyId'] for _ in range(3)]
+    kms.enable_key_rotation(KeyId=keys[0])
+
+    result = scan.security_3_8_kms_cmk_rotation(['eu-west-1'])
+
+    operations = [sorted(set(operation for service, operation, region, params, paginated in batch)) for batch in gathered]
+    assert operations == [['list_keys'], ['describe_key'], ['get_key_rotation_status']]
+    assert sorted(params['KeyId'] for service, operation, region, params, paginated in gathered[1]) == sorted(keys)
+    assert result['Result'] is False
+    assert len(result['NonCompliantAccounts']) == 2
+
+
+def test_sync_mode_does_not_prefetch(scan):
+    assert scan.DATA_PROVIDER.gather is None
+    scan.get_flow_log_coverage(REGIONS)
+    assert scan.DATA_PROVIDER.stats()['misses'] == 6
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+SECURE_TRANSPORT = {'Version': '2012-10-17', 'Statement': [{
+    'Effect': 'Deny', 'Principal': '*', 'Action': 's3:*', 'Resource': ['arn:aws:s3:::bucket-one', 'arn:aws:s3:::bucket-one/*'],
+    'Condition': {'Bool': {'aws:SecureTransport': 'false'}}}]}
+
+
+def create_bucket(scan, name, region='us-east-1'):
+    s3 = scan.get_client('s3', region)
+    if region == 'us-east-1':
+        s3.create_bucket(Bucket=name)
+    else:
+        s3.create_bucket(Bucket=name, CreateBucketConfiguration={'LocationConstraint': region})
+    return s3
+
+
+def test_collector_fetches_each_bucket_setting_once(scan):
+    s3 = create_bucket(scan, 'bucket-one')
+    s3.put_bucket_encryption(Bucket='bucket-one', ServerSideEncryptionConfiguration={
+        'Rules': [{'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}]})
+    s3.put_bucket_policy(Bucket='bucket-one', Policy=json.dumps(SECURE_TRANSPORT))
+    create_bucket(scan, 'bucket-two')
+
+    s3_buckets = scan.collect_s3_buckets()
+    assert list(s3_buckets) == ['bucket-one', 'bucket-two']
+    record = s3_buckets['bucket-two']
+    # The public access block is left for 1.20, the other settings are collected, failed calls included
+    assert set(record) == {'Name', 'Region', 'Encryption', 'Policy', 'Acl', 'Logging'}
+    misses = scan.DATA_PROVIDER.stats()['misses']
+
+    assert scan.security_2_1_1_s3_EncryptionCheck(s3_buckets)['NonCompliantAccounts'] == ['bucket-two']
+    assert scan.security_2_1_1_SslPolicyCheck(s3_buckets)['NonCompliantAccounts'] == ['bucket-two']
+    # The controls read the records without calling S3 again
+    assert scan.DATA_PROVIDER.stats()['misses'] == misses
+
+
+def test_bucket_setting_raises_the_error_of_its_call(scan):
+    create_bucket(scan, 'bucket-one')
+    record = scan.collect_s3_bucket('bucket-one')
+    assert isinstance(record['Policy'], Exception)
+    with pytest.raises(Exception, match='NoSuchBucketPolicy'):
+        scan.bucket_setting(record, 'Policy')
+
+
+def test_trail_buckets_of_other_accounts_are_collected_on_demand(scan):
+    create_bucket(scan, 'bucket-one')
+    s3_buckets = scan.collect_s3_buckets()
+    create_bucket(scan, 'trail-bucket')
+    assert scan.get_bucket_record(s3_buckets, 'bucket-one') is s3_buckets['bucket-one']
+    assert scan.get_bucket_record(s3_buckets, 'trail-bucket')['Name'] == 'trail-bucket'
+
+
+def record_fetches(scan, monkeypatch):
+    fetches = []
+    fetch = scan.DATA_PROVIDER.fetch
+
+    def recording_fetch(service, operation, region=None, **params):
+        fetches.append((operation, region))
+        return fetch(service, operation, region, **params)
+
+    monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch', recording_fetch)
+    return fetches
+
+
+def test_bucket_settings_are_read_in_the_bucket_region(scan, monkeypatch):
+    create_bucket(scan, 'bucket-eu', 'eu-west-1')
+    fetches = record_fetches(scan, monkeypatch)
+    record = scan.collect_s3_bucket('bucket-eu')
+    assert record['Region'] == 'eu-west-1'
+    assert ('get_bucket_location', None) in fetches
+    assert set(region for operation, region in fetches if operation != 'get_bucket_location') == {'eu-west-1'}
+
+
+def test_listed_bucket_regions_save_the_location_call(scan, monkeypatch):
+    create_bucket(scan, 'bucket-eu', 'eu-west-1')
+    monkeypatch.setattr(scan, 'get_s3_buckets', lambda: [{'Name': 'bucket-eu', 'BucketRegion': 'eu-west-1'}])
+    fetches = record_fetches(scan, monkeypatch)
+    assert scan.collect_s3_buckets()['bucket-eu']['Region'] == 'eu-west-1'
+    assert 'get_bucket_location' not in [operation for operation, region in fetches]
+
+
+def test_legacy_location_constraints(scan, monkeypatch):
+    for location, region in ((None, 'us-east-1'), ('', 'us-east-1'), ('EU', 'eu-west-1'), ('ap-south-1', 'ap-south-1')):
+        monkeypatch.setattr(scan.DATA_PROVIDER, 'fetch', lambda service, operation, region=None, **params: {'LocationConstraint': location})
+        assert scan.get_bucket_region('bucket-one') == region
+
+
+BLOCK_ALL = dict((flag, True) for flag in ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets'))
+
+
+def test_account_block_public_access_covers_every_bucket(scan, monkeypatch):
+    create_bucket(scan, 'bucket-one')
+    scan.get_client('s3control').put_public_access_block(AccountId='123456789012', PublicAccessBlockConfiguration=BLOCK_ALL)
+    s3_buckets = scan.collect_s3_buckets()
+    fetches = record_fetches(scan, monkeypatch)
+    result = scan.security_1_20_Bucket_PublicAccess_check(s3_buckets, '123456789012')
+    assert result['Result'] is True
+    assert 'enforced at the account level' in result['comments']
+    assert fetches == [('get_public_access_block', None)]
+
+
+def test_buckets_are_checked_without_a_complete_account_block(scan):
+    create_bucket(scan, 'bucket-one').put_public_access_block(Bucket='bucket-one', PublicAccessBlockConfiguration=BLOCK_ALL)
+    create_bucket(scan, 'bucket-two')
+    create_bucket(scan, 'bucket-three').put_public_access_block(Bucket='bucket-three', PublicAccessBlockConfiguration=dict(BLOCK_ALL, RestrictPublicBuckets=False))
+    scan.get_client('s3control').put_public_access_block(AccountId='123456789012', PublicAccessBlockConfiguration=dict(BLOCK_ALL, BlockPublicPolicy=False))
+    result = scan.security_1_20_Bucket_PublicAccess_check(scan.collect_s3_buckets(), '123456789012')
+    assert result['Result'] is False
+    assert sorted(result['NonCompliantAccounts']) == ['bucket-three', 'bucket-two']
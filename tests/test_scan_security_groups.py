@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+from security_groups import SecurityGroupIndex
+
+WORLD = [{'IpRanges': [{'CidrIp': '0.0.0.0/0'}]}]
+
+
+def inventory(scan, groups):
+    index = SecurityGroupIndex(groups)
+    return {'indexes': OrderedDict([('eu-west-1', index)]),
+            'exposed': OrderedDict([('eu-west-1', index.exposed_groups(scan.SENSITIVE_PORTS))]), 'unavailable': []}
+
+
+def test_invalid_sensitive_ports_are_skipped(scan, capsys):
+    assert scan.parse_sensitive_ports('') == [22, 3389]
+    assert scan.parse_sensitive_ports('3306, abc,,5432,70000,-1,22') == [22, 3306, 3389, 5432]
+    assert capsys.readouterr().out.count('Ignoring SENSITIVE_PORTS entry') == 3
+
+
+def test_other_sensitive_ports_are_reported(scan, monkeypatch):
+    monkeypatch.setattr(scan, 'SENSITIVE_PORTS', [22, 3306, 3389])
+    sg_inventory = inventory(scan, [
+        {'GroupId': 'sg-mysql', 'GroupName': 'db', 'IpPermissions': [dict(WORLD[0], IpProtocol='tcp', FromPort=3306, ToPort=3306)], 'IpPermissionsEgress': []},
+    ])
+    for control in (scan.security_5_1_ssh_not_public, scan.security_5_2_rdp_not_public):
+        result = control(sg_inventory)
+        # The other ports do not fail the control, they are listed in its comments
+        assert result['Result'] is True
+        assert 'other sensitive ports' in result['comments']
+        assert '<b>Port : </b>3306 <b>Groups :</b> sg-mysql' in result['comments']
+    assert 'other sensitive ports' not in scan.security_5_1_ssh_not_public(inventory(scan, []))['comments']
+
+
+class FakeProvider(object):
+    """Answers the filtered describe_security_groups pages, moto does not implement the IPv6 CIDR filter."""
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.filters = []
+
+    def prefetch(self, requests):
+        pass
+
+    def fetch_pages(self, service, operation, region=None, Filters=None):
+        self.filters.append(Filters[0]['Name'])
+        return [{'SecurityGroups': self.groups.get(Filters[0]['Name'], [])}]
+
+
+def test_only_world_open_and_default_groups_are_requested(scan, monkeypatch):
+    ssh = {'GroupId': 'sg-ssh', 'GroupName': 'web', 'IpPermissions': [dict(WORLD[0], IpProtocol='tcp', FromPort=22, ToPort=22)], 'IpPermissionsEgress': []}
+    rdp = {'GroupId': 'sg-rdp', 'GroupName': 'admin', 'IpPermissions': [{'IpProtocol': 'tcp', 'FromPort': 3389, 'ToPort': 3389, 'Ipv6Ranges': [{'CidrIpv6': '::/0'}]}], 'IpPermissionsEgress': []}
+    default = {'GroupId': 'sg-default', 'GroupName': 'default', 'IpPermissions': [], 'IpPermissionsEgress': [{'IpProtocol': '-1'}]}
+    provider = FakeProvider({'ip-permission.cidr': [ssh], 'ip-permission.ipv6-cidr': [rdp, dict(ssh)], 'group-name': [default]})
+    monkeypatch.setattr(scan, 'DATA_PROVIDER', provider)
+    sg_inventory = scan.get_security_group_inventory(['eu-west-1'])
+    assert provider.filters == ['ip-permission.cidr', 'ip-permission.ipv6-cidr', 'group-name']
+    # A group matching two filters is indexed once
+    assert scan.security_5_1_ssh_not_public(sg_inventory)['NonCompliantAccounts'] == ["<br><b>Region : </b>eu-west-1 <b>Groups :</b> sg-ssh"]
+    assert scan.security_5_2_rdp_not_public(sg_inventory)['Result'] is False
+    assert scan.security_5_4_default_security_groups_restricts_traffic(sg_inventory)['NonCompliantAccounts'] == ["<br><b>Region : </b>eu-west-1 <b>Groups :</b> sg-default"]
@@ -0,0 +1,53 @@
+import pytest
+
+
+def create_trail(scan, region, name, multiRegion, logGroup=None):
+    s3 = scan.get_client('s3', region)
+    bucket = name + '-logs'
+    if region == 'us-east-1':
+        s3.create_bucket(Bucket=bucket)
+    else:
+        s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': region})
+    params = {'Name': name, 'S3BucketName': bucket, 'IsMultiRegionTrail': multiRegion}
+    if logGroup is not None:
+        logs = scan.get_client('logs', region)
+        logs.create_log_group(logGroupName=logGroup)
+        logs.put_metric_filter(logGroupName=logGroup, filterName='root', filterPattern=scan.MONITORING_PATTERNS['4.3'],
+                               metricTransformations=[{'metricName': 'Root', 'metricNamespace': 'CIS', 'metricValue': '1'}])
+        params['CloudWatchLogsLogGroupArn'] = 'arn:aws:logs:' + region + ':123456789012:log-group:' + logGroup + ':*'
+        params['CloudWatchLogsRoleArn'] = 'arn:aws:iam::123456789012:role/trail'
+    cloudtrail = scan.get_client('cloudtrail', region)
+    cloudtrail.create_trail(**params)
+    cloudtrail.start_logging(Name=name)
+
+
+def test_trails_are_described_in_their_home_region(scan):
+    create_trail(scan, 'eu-west-1', 'main', True, logGroup='trail-logs')
+    inventory = scan.get_aws_cloudTrails(['us-east-1', 'eu-west-1'])
+    assert list(inventory['trails']) == ['eu-west-1']
+    assert inventory['unavailable'] == []
+    record = inventory['trails']['eu-west-1'][0]
+    assert record['Name'] == 'main'
+    assert record['LogGroupName'] == 'trail-logs'
+    assert scan.trail_setting(record, 'Status')['IsLogging'] is True
+    assert 'EventSelectors' in record
+    assert [m['filterName'] for m in scan.trail_setting(record, 'MetricFilters')['metricFilters']] == ['root']
+
+
+def test_multi_region_trails_homed_outside_the_scanned_regions_are_kept(scan):
+    create_trail(scan, 'us-west-2', 'organization', True)
+    create_trail(scan, 'ap-south-1', 'local', False)
+    inventory = scan.get_aws_cloudTrails(['eu-west-1'])
+    # The single region trail only logs a region that is not scanned
+    assert list(inventory['trails']) == ['us-west-2']
+    assert [m['Name'] for m in inventory['trails']['us-west-2']] == ['organization']
+    assert inventory['trails']['us-west-2'][0]['LogGroupName'] is None
+    assert scan.security_3_1_cloud_trail_all_regions(inventory)['Result'] is True
+
+
+def test_trail_setting_raises_the_error_of_its_call(scan):
+    error = RuntimeError('AccessDenied')
+    record = {'Status': error, 'EventSelectors': {'EventSelectors': []}}
+    assert scan.trail_setting(record, 'EventSelectors') == {'EventSelectors': []}
+    with pytest.raises(RuntimeError):
+        scan.trail_setting(record, 'Status')
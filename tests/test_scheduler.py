@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import check_plan, current_task, run_plan
+
+
+def test_check_plan_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="unknown task"):
+        check_plan({'a': (len, ('b',))})
+
+
+@pytest.mark.parametrize('tasks', [
+    {'a': (len, ('a',))},
+    {'a': (len, ('b',)), 'b': (len, ('a',))},
+    {'a': (len, ()), 'b': (len, ('a', 'd')), 'c': (len, ('b',)), 'd': (len, ('c',))},
+])
+def test_check_plan_rejects_cycles(tasks):
+    with pytest.raises(ValueError, match="cycle"):
+        check_plan(tasks)
+
+
+def test_run_plan_passes_results_in_declared_order():
+    tasks = {
+        'region_list': (lambda: ['eu-west-1', 'us-east-1'], ()),
+        'prefix': (lambda: 'region:', ()),
+        'labels': (lambda prefix, regions: [prefix + r for r in regions], ('prefix', 'region_list')),
+    }
+    results = run_plan(tasks, 2)
+    assert results['labels'] == ['region:eu-west-1', 'region:us-east-1']
+
+
+def test_run_plan_runs_independent_tasks_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    tasks = {
+        'a': (lambda: barrier.wait() is not None, ()),
+        'b': (lambda: barrier.wait() is not None, ()),
+        'c': (lambda a, b: a and b, ('a', 'b')),
+    }
+    assert run_plan(tasks, 2)['c'] is True
+
+
+def test_run_plan_sets_the_current_task():
+    tasks = {'1.4': (current_task, ()), '1.5': (current_task, ())}
+    assert run_plan(tasks, 2) == {'1.4': '1.4', '1.5': '1.5'}
+    assert current_task() is None
+
+
+def test_run_plan_stops_scheduling_on_the_first_error():
+    ran = []
+
+    def fail():
+        raise RuntimeError('no regions')
+
+    def slow():
+        time.sleep(0.05)
+        ran.append('slow')
+
+    tasks = {
+        'region_list': (fail, ()),
+        'slow': (slow, ()),
+        'control': (lambda regions: ran.append('control'), ('region_list',)),
+    }
+    with pytest.raises(RuntimeError):
+        run_plan(tasks, 2)
+    # The running task is waited for, the dependent one is never started
+    assert ran == ['slow']
@@ -0,0 +1,69 @@
+import pytest
+
+from security_groups import SecurityGroupIndex, port_interval, world_open
+
+WORLD = {'IpRanges': [{'CidrIp': '0.0.0.0/0'}]}
+
+
+def rule(protocol, low=None, high=None, **ranges):
+    permission = {'IpProtocol': protocol}
+    if low is not None:
+        permission['FromPort'] = low
+        permission['ToPort'] = high
+    permission.update(ranges or WORLD)
+    return permission
+
+
+def group(groupId, permissions, name='web', egress=()):
+    return {'GroupId': groupId, 'GroupName': name, 'IpPermissions': list(permissions), 'IpPermissionsEgress': list(egress)}
+
+
+def test_world_open():
+    assert world_open(rule('tcp', 22, 22))
+    assert world_open({'Ipv6Ranges': [{'CidrIpv6': '::/0'}]})
+    assert not world_open({'IpRanges': [{'CidrIp': '10.0.0.0/8'}], 'Ipv6Ranges': [{'CidrIpv6': '2001:db8::/32'}]})
+    assert not world_open({})
+
+
+@pytest.mark.parametrize('permission, interval', [
+    (rule('tcp', 22, 22), (22, 22)),
+    (rule('6', 1000, 2000), (1000, 2000)),
+    (rule('udp', 0, 65535), (0, 65535)),
+    # -1 is every protocol, the ports it carries (-1 as well) are ignored
+    (rule('-1', -1, -1), (0, 65535)),
+    (rule('-1'), (0, 65535)),
+    # ICMP ports are a type and a code, -1 meaning all of them, never TCP ports
+    (rule('icmp', -1, -1), None),
+    (rule('1', 8, 0), None),
+    (rule('icmpv6', -1, -1), None),
+])
+def test_port_interval(permission, interval):
+    assert port_interval(permission) == interval
+
+
+def test_exposed_groups():
+    index = SecurityGroupIndex([
+        group('sg-ssh', [rule('tcp', 22, 22)]),
+        group('sg-range', [rule('tcp', 20, 3389), rule('tcp', 3389, 3389)]),
+        group('sg-all', [rule('-1', -1, -1)]),
+        group('sg-icmp', [rule('icmp', -1, -1)]),
+        group('sg-private', [rule('tcp', 22, 22, IpRanges=[{'CidrIp': '10.0.0.0/8'}])]),
+        group('sg-udp', [rule('udp', 3389, 3389)]),
+    ])
+    exposed = index.exposed_groups([3389, 22, 22])
+    assert exposed == {
+        22: ['sg-ssh', 'sg-range', 'sg-all'],
+        3389: ['sg-range', 'sg-all', 'sg-udp'],
+    }
+    assert index.exposed_groups([]) == {}
+    assert index.exposed_groups([80]) == {80: ['sg-range', 'sg-all']}
+
+
+def test_default_groups_with_rules():
+    index = SecurityGroupIndex([
+        group('sg-1', [], name='default'),
+        group('sg-2', [], name='default', egress=[rule('-1')]),
+        group('sg-3', [rule('tcp', 22, 22)], name='default'),
+        group('sg-4', [rule('tcp', 22, 22)]),
+    ])
+    assert index.default_groups_with_rules() == ['sg-2', 'sg-3']